@@ -0,0 +1,77 @@
+"""Compare the vectorized CategoryEngine against the original masked-``.loc`` categorization.
+
+    PYTHONPATH=src python benchmarks/bench_categorize.py --rows 5000000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from aether.services.categorization import CategoryEngine
+
+THRESHOLDS = {
+    "pm25_safe": 25.0,
+    "pm25_moderate": 50.0,
+    "pm25_danger": 75.0,
+    "pm10_safe": 50.0,
+    "pm10_moderate": 100.0,
+    "pm10_danger": 150.0,
+}
+
+
+def categorize_pm25_reference(pm25: pd.Series, thresholds: dict[str, float]) -> pd.Series:
+    """The pre-engine implementation, kept here as the baseline."""
+    safe = thresholds["pm25_safe"]
+    mod = thresholds["pm25_moderate"]
+    dang = thresholds["pm25_danger"]
+
+    cat = pd.Series(["No data"] * len(pm25), index=pm25.index, dtype="object")
+    mask = pm25.notna()
+    cat.loc[mask & (pm25 <= safe)] = "Safe"
+    cat.loc[mask & (pm25 > safe) & (pm25 <= mod)] = "Moderate"
+    cat.loc[mask & (pm25 > mod) & (pm25 <= dang)] = "Unhealthy"
+    cat.loc[mask & (pm25 > dang)] = "Dangerous"
+    return cat
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    pm25 = pd.Series(rng.gamma(2.0, 15.0, args.rows).astype(np.float32))
+    pm25[rng.random(args.rows) < 0.02] = np.nan
+    frame = pd.DataFrame({"pm25": pm25, "pm10": pm25 * 1.8})
+
+    engine = CategoryEngine(THRESHOLDS)
+    expected = categorize_pm25_reference(pm25, THRESHOLDS)
+    assert (engine.categorize("pm25", pm25).astype(str) == expected).all()
+
+    results = {
+        "rows": args.rows,
+        "reference_pm25_s": best_of(lambda: categorize_pm25_reference(pm25, THRESHOLDS), args.repeat),
+        "engine_pm25_s": best_of(lambda: engine.categorize("pm25", pm25), args.repeat),
+        "engine_worst_s": best_of(lambda: engine.worst(frame), args.repeat),
+    }
+    results["speedup_pm25"] = results["reference_pm25_s"] / results["engine_pm25_s"]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
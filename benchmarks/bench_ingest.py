@@ -0,0 +1,142 @@
+"""Batch ingest throughput per wire format: decode, validate, persist and apply.
+
+    PYTHONPATH=src python benchmarks/bench_ingest.py --rows 50000
+
+Runs ``SensorManager`` directly against a temporary readings log (no HTTP), so the
+numbers are the per-format server cost. MessagePack and Arrow are skipped when
+``msgpack`` / ``pyarrow`` are not installed.
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from aether.config import ServerConfig
+from aether.domain.sensor import SensorInfo
+from aether.persistence.storage import SegmentedReadingStorage
+from aether.services import ingest_formats
+from aether.services.sensor_manager import SensorManager
+
+POLLUTANTS = ["pm25", "pm10", "no2", "o3"]
+THRESHOLDS = {
+    "pm25_safe": 25.0,
+    "pm25_moderate": 50.0,
+    "pm25_danger": 75.0,
+    "pm10_safe": 50.0,
+    "pm10_moderate": 100.0,
+    "pm10_danger": 150.0,
+}
+
+
+def make_manager(root: Path, n_sensors: int) -> SensorManager:
+    config = ServerConfig(
+        storage_file=str(root / "readings.json"),
+        historical_data_file=str(root / "historical.csv"),
+        host="127.0.0.1",
+        port=8000,
+        pollutants=POLLUTANTS,
+        thresholds=THRESHOLDS,
+        map_config={},
+        category_colors={},
+    )
+    sensors = {
+        f"s{i:05d}": SensorInfo(id=f"s{i:05d}", location="", latitude=52.0, longitude=5.0, metadata={"province": "P"})
+        for i in range(n_sensors)
+    }
+    empty = pd.DataFrame({"sensor_id": pd.Series([], dtype=str), "timestamp": pd.Series([], dtype="datetime64[ns]")})
+    storage = SegmentedReadingStorage(root / "readings.segments")
+    return SensorManager(config, sensors, storage, empty, {}, datetime.now())
+
+
+def make_columns(rows: int, n_sensors: int, seed: int) -> dict[str, list]:
+    rng = np.random.default_rng(seed)
+    base = np.datetime64("2024-01-01T00:00:00")
+    ts = base + rng.integers(0, 365 * 86400, rows).astype("timedelta64[s]")
+    cols: dict[str, list] = {
+        "sensor_id": [f"s{i:05d}" for i in rng.integers(0, n_sensors, rows)],
+        "timestamp": [str(t) for t in ts],
+    }
+    for p in POLLUTANTS:
+        cols[p] = np.round(rng.gamma(2.0, 15.0, rows), 2).tolist()
+    return cols
+
+
+def encode(columns: dict[str, list]) -> dict[str, tuple[bytes, str]]:
+    items = [
+        {"sensor_id": sid, "timestamp": ts, "readings": {p: columns[p][i] for p in POLLUTANTS}}
+        for i, (sid, ts) in enumerate(zip(columns["sensor_id"], columns["timestamp"]))
+    ]
+    csv_buf = io.StringIO()
+    pd.DataFrame(columns).to_csv(csv_buf, index=False)
+    bodies = {
+        "json": (json.dumps(items).encode(), "application/json"),
+        "ndjson": ("\n".join(json.dumps(i) for i in items).encode(), "application/x-ndjson"),
+        "csv": (csv_buf.getvalue().encode(), "text/csv"),
+    }
+    if ingest_formats.msgpack is not None:
+        bodies["msgpack_columns"] = (ingest_formats.msgpack.packb(columns), "application/msgpack")
+        bodies["msgpack_rows"] = (ingest_formats.msgpack.packb(items), "application/msgpack")
+    if ingest_formats.pa_ipc is not None:
+        import pyarrow as pa
+
+        table = pa.table(columns)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        bodies["arrow"] = (sink.getvalue().to_pybytes(), "application/vnd.apache.arrow.stream")
+    return bodies
+
+
+def ingest_once(sm: SensorManager, body: bytes, content_type: str) -> int:
+    decoder = ingest_formats.batch_decoder(content_type)
+    if decoder is None:
+        if "ndjson" in content_type:
+            batch = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            batch = json.loads(body)
+    else:
+        batch = decoder(body)
+    if isinstance(batch, list):
+        return sum(1 for r in sm.ingest_batch(batch) if r["code"] == 200)
+    accepted, _ = sm.ingest_frame(batch, include_accepted=False)
+    return accepted
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--sensors", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    bodies = encode(make_columns(args.rows, args.sensors, args.seed))
+    results: dict[str, object] = {"rows": args.rows, "sensors": args.sensors, "formats": {}}
+    for name, (body, content_type) in bodies.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory() as tmp:
+                sm = make_manager(Path(tmp), args.sensors)
+                started = time.perf_counter()
+                accepted = ingest_once(sm, body, content_type)
+                best = min(best, time.perf_counter() - started)
+                sm.close()
+            assert accepted == args.rows, (name, accepted)
+        results["formats"][name] = {
+            "body_bytes": len(body),
+            "seconds": best,
+            "rows_per_second": args.rows / best,
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""End-to-end benchmark suite over a synthetic dataset, with JSON results and baseline comparison.
+
+    PYTHONPATH=src python benchmarks/bench_suite.py --sensors 200 --years 1 --out results.json
+    PYTHONPATH=src python benchmarks/bench_suite.py --sensors 200 --years 1 --baseline results.json
+
+Measures historical cleaning, startup (cold, without the columnar cache, and warm; both
+until ingest is served and until the history is loaded), ingest throughput through the ASGI app in-process (sequential and concurrent)
+and p50/p99 latency of ``/history``, ``/distribution`` and ``/map``, both served from the
+render cache and rendered from scratch. With ``--baseline`` every metric is compared to a
+saved result; the exit status is 1 when any metric regressed by more than ``--tolerance``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic_data import generate  # noqa: E402
+
+from aether import dependencies  # noqa: E402
+from aether.main import create_app  # noqa: E402
+from aether.services.data_cleaning import DataCleaner  # noqa: E402
+
+
+async def asgi_request(
+    app: Any,
+    method: str,
+    path: str,
+    params: dict[str, Any] | None = None,
+    body: bytes = b"",
+    headers: dict[str, str] | None = None,
+) -> tuple[int, bytes]:
+    """Send one HTTP request straight into the ASGI app; no sockets, no client library."""
+    raw_headers = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    if body:
+        raw_headers.append((b"content-length", str(len(body)).encode()))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(params or {}).encode(),
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000),
+        "root_path": "",
+    }
+    sent = False
+    status = 0
+    chunks: list[bytes] = []
+
+    async def receive() -> dict[str, Any]:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+def percentiles(samples_s: list[float]) -> dict[str, float]:
+    ms = np.asarray(samples_s) * 1000
+    return {
+        "requests": len(ms),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "mean_ms": float(ms.mean()),
+    }
+
+
+def timed(fn: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+async def latency(app: Any, paths: list[tuple[str, dict[str, Any]]], uncached: bool) -> dict[str, float]:
+    samples = []
+    if not uncached:
+        for path, params in {(p, tuple(sorted(q.items()))): (p, q) for p, q in paths}.values():
+            await asgi_request(app, "GET", path, params)
+    for path, params in paths:
+        if uncached:
+            dependencies.get_render_cache().clear()
+        started = time.perf_counter()
+        status, _ = await asgi_request(app, "GET", path, params)
+        samples.append(time.perf_counter() - started)
+        if status not in (200, 404):
+            raise RuntimeError(f"GET {path} answered {status}")
+    return percentiles(samples)
+
+
+async def ingest(app: Any, sensor_ids: list[str], n: int, concurrency: int) -> dict[str, float]:
+    rng = np.random.default_rng(11)
+    bodies = [
+        json.dumps(
+            {
+                "sensor_id": sensor_ids[int(i)],
+                "readings": {p: float(v) for p, v in zip(("pm25", "pm10", "no2", "o3"), rng.gamma(2.0, 12.0, 4))},
+            }
+        ).encode()
+        for i in rng.integers(0, len(sensor_ids), n)
+    ]
+    headers = {"content-type": "application/json"}
+    samples: list[float] = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(body: bytes) -> None:
+        async with sem:
+            started = time.perf_counter()
+            status, _ = await asgi_request(app, "POST", "/ingest", body=body, headers=headers)
+            samples.append(time.perf_counter() - started)
+            if status != 200:
+                raise RuntimeError(f"POST /ingest answered {status}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(b) for b in bodies))
+    elapsed = time.perf_counter() - started
+    return {**percentiles(samples), "concurrency": concurrency, "readings_per_second": n / elapsed}
+
+
+async def run_app(args: argparse.Namespace, dataset: dict[str, Any]) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    app = create_app(dataset["server_config"], dataset["sensors"])
+    async with app.router.lifespan_context(app):
+        await asyncio.to_thread(dependencies.wait_until_ready)
+        sm = dependencies.get_sensor_manager()
+        sensor_ids = list(sm.sensors)
+        rng = np.random.default_rng(3)
+        start = pd.Timestamp(dataset["start"])
+        months = [(start + pd.DateOffset(months=int(m))) for m in rng.integers(0, 12 * dataset["years"], args.requests)]
+
+        history = [(f"/history/{sensor_ids[int(i)]}", {}) for i in rng.integers(0, len(sensor_ids), args.requests)]
+        distribution = [(f"/distribution/{m.year}/{m.month}", {}) for m in months]
+        map_paths = [("/map", {})] * args.requests
+        for name, paths in (("history", history), ("distribution", distribution), ("map", map_paths)):
+            results[f"latency_{name}_uncached"] = await latency(app, paths, uncached=True)
+            results[f"latency_{name}_cached"] = await latency(app, paths, uncached=False)
+
+        results["ingest_sequential"] = await ingest(app, sensor_ids, args.ingest, concurrency=1)
+        results["ingest_concurrent"] = await ingest(app, sensor_ids, args.ingest, concurrency=args.concurrency)
+    dependencies.reset_services()
+    return results
+
+
+def startup(dataset: dict[str, Any]) -> dict[str, float]:
+    """Time until ingest is served and until the background historical load is done."""
+    cache_dir = Path(dataset["historical_csv"]).with_suffix(".cache")
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    out = {}
+    for label in ("cold", "warm"):
+        started = time.perf_counter()
+        dependencies.initialize_services(dataset["server_config"], dataset["sensors"])
+        out[f"{label}_serving_seconds"] = time.perf_counter() - started
+        if not dependencies.wait_until_ready():
+            raise RuntimeError("historical data failed to load")
+        out[f"{label}_ready_seconds"] = time.perf_counter() - started
+        dependencies.shutdown_services()
+        dependencies.reset_services()
+    return out
+
+
+def flatten(results: dict[str, Any], prefix: str = "") -> dict[str, float]:
+    flat: dict[str, float] = {}
+    for k, v in results.items():
+        if isinstance(v, dict):
+            flat.update(flatten(v, f"{prefix}{k}."))
+        elif isinstance(v, (int, float)):
+            flat[f"{prefix}{k}"] = float(v)
+    return flat
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Metrics worse than the baseline by more than ``tolerance``; higher is better only for ``*_per_second``."""
+    now, base = flatten(current["results"]), flatten(baseline["results"])
+    regressions = []
+    for key in sorted(now.keys() & base.keys()):
+        new, old = now[key], base[key]
+        if key.endswith(("requests", "concurrency", "rows")) or old == 0:
+            continue
+        higher_is_better = key.endswith("_per_second")
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        flag = "REGRESSION" if worse > tolerance else ""
+        print(f"{key:55s} {old:14.3f} -> {new:14.3f} {change:+8.1%} {flag}")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sensors", type=int, default=200)
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--requests", type=int, default=200, help="requests per latency measurement")
+    parser.add_argument("--ingest", type=int, default=2000, help="readings per ingest measurement")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--data-dir", type=Path, help="keep the generated dataset here instead of a temp dir")
+    parser.add_argument("--out", type=Path, help="write the results JSON here")
+    parser.add_argument("--baseline", type=Path, help="compare against a previously written results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    tmp = None
+    root = args.data_dir
+    if root is None:
+        tmp = tempfile.TemporaryDirectory(prefix="aether-bench-")
+        root = Path(tmp.name)
+    try:
+        dataset = generate(root, args.sensors, args.years, seed=args.seed)
+        raw = pd.read_csv(dataset["historical_csv"])
+        results: dict[str, Any] = {
+            "clean_historical": {
+                "rows": len(raw),
+                "seconds": timed(lambda: DataCleaner.clean_historical(raw)),
+            },
+            "initialize_services": startup(dataset),
+        }
+        del raw
+        results.update(asyncio.run(run_app(args, dataset)))
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    report = {
+        "meta": {
+            "sensors": args.sensors,
+            "years": args.years,
+            "seed": args.seed,
+            "csv_rows": dataset["csv_rows"],
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out is not None:
+        args.out.write_text(text, encoding="utf-8")
+    print(text)
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline.get("meta", {}).get("csv_rows") != dataset["csv_rows"]:
+            print("warning: baseline was measured on a different dataset size", file=sys.stderr)
+        if compare(report, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
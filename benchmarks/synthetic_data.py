@@ -0,0 +1,192 @@
+"""Generate a national-scale synthetic dataset: a sensor registry, hourly history and configs.
+
+    PYTHONPATH=src python benchmarks/synthetic_data.py --out /tmp/aether-bench --sensors 500 --years 2
+
+Writes ``config/sensors.json`` (same shape as the shipped registry), ``config/server_config.json``
+and ``data/historical_readings.csv``. Every sensor gets hourly rows with outages (runs of
+missing hours) and a share of rows that the cleaning rules reject: missing or negative
+pollutants, PM2.5 above 500, unparseable timestamps and missing sensor ids. The same
+arguments and seed always produce the same files.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+POLLUTANTS = ["pm25", "pm10", "no2", "o3"]
+
+# province -> (lon, lat) centroid
+PROVINCES = {
+    "Groningen": (6.74, 53.22),
+    "Friesland": (5.80, 53.10),
+    "Drenthe": (6.62, 52.86),
+    "Overijssel": (6.45, 52.44),
+    "Flevoland": (5.60, 52.53),
+    "Gelderland": (5.87, 52.06),
+    "Utrecht": (5.20, 52.08),
+    "North Holland": (4.87, 52.52),
+    "South Holland": (4.49, 52.02),
+    "Zeeland": (3.84, 51.49),
+    "North Brabant": (5.20, 51.56),
+    "Limburg": (5.94, 51.21),
+}
+SITE_TYPES = ["urban_center", "residential", "industrial", "traffic", "rural", "port_area"]
+
+THRESHOLDS = {
+    "pm25_safe": 25.0,
+    "pm25_moderate": 50.0,
+    "pm25_danger": 75.0,
+    "pm10_safe": 50.0,
+    "pm10_moderate": 100.0,
+    "pm10_danger": 150.0,
+}
+
+
+def make_registry(n_sensors: int, rng: np.random.Generator) -> list[dict]:
+    names = list(PROVINCES)
+    sensors = []
+    for i in range(n_sensors):
+        province = names[i % len(names)]
+        lon, lat = PROVINCES[province]
+        lon += float(rng.normal(0, 0.12))
+        lat += float(rng.normal(0, 0.08))
+        slug = province.lower().replace(" ", "_")
+        sensors.append(
+            {
+                "id": f"sensor_{slug}_{i:05d}",
+                "location": f"POINT({lon:.4f} {lat:.4f})",
+                "metadata": {
+                    "region": f"{province} {i % 7 + 1}",
+                    "province": province,
+                    "deployment_date": "2023-01-01",
+                    "site_type": SITE_TYPES[i % len(SITE_TYPES)],
+                },
+            }
+        )
+    return sensors
+
+
+def sensor_history(
+    sensor_id: str,
+    hours: pd.DatetimeIndex,
+    rng: np.random.Generator,
+    gap_rate: float,
+    invalid_rate: float,
+) -> pd.DataFrame:
+    n = len(hours)
+    # outages: runs of 1..48 missing hours covering about gap_rate of the period
+    keep = np.ones(n, dtype=bool)
+    n_gaps = int(n * gap_rate / 24)
+    for start, length in zip(rng.integers(0, n, n_gaps), rng.integers(1, 49, n_gaps)):
+        keep[start:start + length] = False
+
+    hour_of_day = hours.hour.to_numpy()
+    daily = 1.0 + 0.35 * np.sin((hour_of_day - 8) / 24 * 2 * np.pi)
+    base = rng.gamma(2.0, 9.0) + 5.0
+    pm25 = np.maximum(0.0, base * daily + rng.normal(0, base * 0.25, n))
+    frame = pd.DataFrame(
+        {
+            "sensor_id": sensor_id,
+            "timestamp": hours.strftime("%Y-%m-%dT%H:%M:%S"),
+            "pm25": np.round(pm25, 2),
+            "pm10": np.round(pm25 * rng.uniform(1.4, 2.2, n), 2),
+            "no2": np.round(np.maximum(0.0, rng.normal(22, 8, n) * daily), 2),
+            "o3": np.round(np.maximum(0.0, rng.normal(45, 12, n) / daily), 2),
+        }
+    )[keep].reset_index(drop=True)
+
+    m = len(frame)
+    bad = np.flatnonzero(rng.random(m) < invalid_rate)
+    kinds = rng.integers(0, 5, len(bad))
+    frame = frame.astype({"sensor_id": object, "timestamp": object})
+    for kind, name in enumerate(("missing", "negative", "pm25_high", "bad_timestamp", "missing_id")):
+        rows = bad[kinds == kind]
+        if name == "missing":
+            frame.loc[rows, "no2"] = np.nan
+        elif name == "negative":
+            frame.loc[rows, "o3"] = -1.0
+        elif name == "pm25_high":
+            frame.loc[rows, "pm25"] = 999.0
+        elif name == "bad_timestamp":
+            frame.loc[rows, "timestamp"] = "not-a-time"
+        else:
+            frame.loc[rows, "sensor_id"] = None
+    return frame
+
+
+def generate(
+    out: Path,
+    n_sensors: int,
+    years: int,
+    seed: int = 7,
+    gap_rate: float = 0.03,
+    invalid_rate: float = 0.01,
+    start: str = "2023-01-01",
+) -> dict:
+    """Write the dataset under ``out`` and return a summary (paths and row counts)."""
+    rng = np.random.default_rng(seed)
+    config_dir, data_dir = out / "config", out / "data"
+    config_dir.mkdir(parents=True, exist_ok=True)
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+    sensors = make_registry(n_sensors, rng)
+    (config_dir / "sensors.json").write_text(json.dumps(sensors, indent=2), encoding="utf-8")
+
+    hours = pd.date_range(start, periods=years * 365 * 24, freq="h")
+    csv_path = data_dir / "historical_readings.csv"
+    rows = 0
+    with open(csv_path, "w", encoding="utf-8", newline="") as fh:
+        for i, sensor in enumerate(sensors):
+            frame = sensor_history(sensor["id"], hours, rng, gap_rate, invalid_rate)
+            frame.to_csv(fh, index=False, header=(i == 0))
+            rows += len(frame)
+
+    # start from an empty live store: drop whatever an earlier run derived from it
+    for stale in data_dir.glob("readings.*"):
+        if stale.is_dir():
+            shutil.rmtree(stale)
+        else:
+            stale.unlink()
+    (data_dir / "readings.json").write_text("[]", encoding="utf-8")
+    server_config = {
+        "storage_file": str(data_dir / "readings.json"),
+        "historical_data_file": str(csv_path),
+        "host": "127.0.0.1",
+        "port": 8000,
+        "pollutants": POLLUTANTS,
+        "thresholds": THRESHOLDS,
+        "map_config": {"default_zoom": 7, "map_style": "open-street-map"},
+        "category_colors": {"No data": "gray", "Safe": "green", "Moderate": "yellow", "Unhealthy": "orange", "Dangerous": "red"},
+    }
+    (config_dir / "server_config.json").write_text(json.dumps(server_config, indent=2), encoding="utf-8")
+    return {
+        "server_config": str(config_dir / "server_config.json"),
+        "sensors": str(config_dir / "sensors.json"),
+        "historical_csv": str(csv_path),
+        "sensor_count": n_sensors,
+        "years": years,
+        "csv_rows": rows,
+        "start": start,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--sensors", type=int, default=200)
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--gap-rate", type=float, default=0.03)
+    parser.add_argument("--invalid-rate", type=float, default=0.01)
+    args = parser.parse_args()
+    summary = generate(args.out, args.sensors, args.years, args.seed, args.gap_rate, args.invalid_rate)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 import json
 from typing import Any
@@ -16,6 +16,21 @@ class ServerConfig:
     thresholds: dict[str, float]
     map_config: dict[str, Any]
     category_colors: dict[str, str]
+    storage_segment_max_bytes: int = 64 * 1024 * 1024
+    ingest_batch_max_items: int = 10000
+    ingest_batch_max_bytes: int = 16 * 1024 * 1024
+    write_behind: dict[str, Any] = field(default_factory=dict)
+    historical_cache: dict[str, Any] = field(default_factory=dict)
+    historical_chunk_rows: int = 250_000
+    render_cache_max_bytes: int = 64 * 1024 * 1024
+    history_max_points: int = 2000
+    checkpoint: dict[str, Any] = field(default_factory=dict)
+    workers: int = 1
+    storage_backend: str = ""
+    profiling: dict[str, Any] = field(default_factory=dict)
+    hot_reload: dict[str, Any] = field(default_factory=dict)
+    compaction: dict[str, Any] = field(default_factory=dict)
+    hot_tier: dict[str, Any] = field(default_factory=dict)
 
     @staticmethod
     def load(path: str | Path) -> "ServerConfig":
@@ -30,4 +45,19 @@ class ServerConfig:
             thresholds=dict(data["thresholds"]),
             map_config=dict(data.get("map_config", {})),
             category_colors=dict(data.get("category_colors", {})),
+            storage_segment_max_bytes=int(data.get("storage_segment_max_bytes", 64 * 1024 * 1024)),
+            ingest_batch_max_items=int(data.get("ingest_batch_max_items", 10000)),
+            ingest_batch_max_bytes=int(data.get("ingest_batch_max_bytes", 16 * 1024 * 1024)),
+            write_behind=dict(data.get("write_behind", {})),
+            historical_cache=dict(data.get("historical_cache", {})),
+            historical_chunk_rows=int(data.get("historical_chunk_rows", 250_000)),
+            render_cache_max_bytes=int(data.get("render_cache_max_bytes", 64 * 1024 * 1024)),
+            history_max_points=int(data.get("history_max_points", 2000)),
+            checkpoint=dict(data.get("checkpoint", {})),
+            workers=max(1, int(data.get("workers", 1))),
+            storage_backend=str(data.get("storage_backend", "")),
+            profiling=dict(data.get("profiling", {})),
+            hot_reload=dict(data.get("hot_reload", {})),
+            compaction=dict(data.get("compaction", {})),
+            hot_tier=dict(data.get("hot_tier", {})),
         )
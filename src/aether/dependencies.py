@@ -1,55 +1,353 @@
 from __future__ import annotations
 
 import logging
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator
+
+import pandas as pd
 
 from aether.config import ServerConfig
-from aether.persistence.storage import JsonReadingStorage, HistoricalCsvRepository
+from aether.persistence.historical_cache import ColumnarHistoricalCache
+from aether.persistence.partitions import CompactedPartitionStore
+from aether.persistence.storage import (
+    HistoricalCsvRepository,
+    ReadingStorage,
+    SegmentedReadingStorage,
+    SqliteReadingStorage,
+)
 from aether.services.sensor_loader import load_sensors
+from aether.services.compaction import Compactor
 from aether.services.data_cleaning import DataCleaner
+from aether.services.hot_reload import SourceWatcher, source_state
+from aether.services.metrics import REGISTRY, span
+from aether.services.profiler import SlowRequestProfiler
+from aether.services.render_cache import RenderCache
 from aether.services.sensor_manager import SensorManager
-from aether.visualization.map_visualization import MapVisualizer
-from aether.visualization.temporal_visualization import TemporalVisualizer
+from aether.services.write_behind import WriteBehindWriter
+
+if TYPE_CHECKING:  # Plotly is imported on first use, not at startup
+    from aether.visualization.map_visualization import MapVisualizer
+    from aether.visualization.temporal_visualization import TemporalVisualizer
 
 log = logging.getLogger(__name__)
 
 _sensor_manager: SensorManager | None = None
 _map_viz: MapVisualizer | None = None
 _temp_viz: TemporalVisualizer | None = None
+_render_cache: RenderCache | None = None
+_profiler: SlowRequestProfiler | None = None
+_watcher: SourceWatcher | None = None
+_compactor: Compactor | None = None
+_startup_ms: dict[str, float] = {}
+_viz_lock = threading.Lock()
+_lifecycle_lock = threading.Lock()
+_shutting_down = False
+
+STORAGE_BACKENDS = ("log", "sqlite")
+SQLITE_SCHEME = "sqlite:///"
+
+
+@contextmanager
+def _phase(timings: dict[str, float], name: str) -> Iterator[None]:
+    """Time one startup phase into ``timings`` (ms) and the ``startup.<name>`` span."""
+    started = time.perf_counter()
+    with span(f"startup.{name}"):
+        yield
+    timings[name] = round((time.perf_counter() - started) * 1000, 3)
 
 
 def initialize_services(server_config_path: str, sensors_path: str) -> None:
-    global _sensor_manager, _map_viz, _temp_viz
+    """Open everything ingest, status and the map need, then load the history in the background.
+
+    Returns as soon as the live state is restored; ``wait_until_ready`` blocks until the
+    historical dataset is attached too.
+    """
+    global _sensor_manager, _map_viz, _temp_viz, _render_cache, _profiler, _startup_ms, _shutting_down
 
-    config = ServerConfig.load(server_config_path)
-    sensors = load_sensors(sensors_path)
+    started = time.perf_counter()
+    _shutting_down = False
+    timings: dict[str, float] = {}
+    _startup_ms = timings
+    with _phase(timings, "config"):
+        config = ServerConfig.load(server_config_path)
+    with _phase(timings, "sensors"):
+        sensors_state = source_state(Path(sensors_path))
+        sensors = load_sensors(sensors_path)
 
-    storage_path = Path(config.storage_file)
+    backend, storage_path = _storage_location(config)
     hist_path = Path(config.historical_data_file)
-    if not storage_path.is_absolute():
-        storage_path = Path.cwd() / config.storage_file
     if not hist_path.is_absolute():
         hist_path = Path.cwd() / config.historical_data_file
 
-    storage = JsonReadingStorage(storage_path)
-    hist_repo = HistoricalCsvRepository(hist_path)
-    raw_df = hist_repo.load()
-    cleaned_df, stats = DataCleaner.clean_historical(raw_df)
+    partitions = CompactedPartitionStore(storage_path.with_suffix(".compacted"))
+    with _phase(timings, "storage"):
+        storage = _open_storage(config, backend, storage_path)
+        log_base = partitions.through(backend)
+        if log_base is not None:
+            # a compaction may have stopped between writing its partition and truncating
+            storage.truncate(log_base)
+    writer = None
+    wb = config.write_behind
+    if wb.get("enabled", False):
+        writer = WriteBehindWriter(
+            storage,
+            max_queue=int(wb.get("max_queue", 10000)),
+            flush_batch_size=int(wb.get("flush_batch_size", 500)),
+            flush_interval_seconds=float(wb.get("flush_interval_seconds", 0.5)),
+            fsync=str(wb.get("fsync", "interval")),
+            fsync_interval_seconds=float(wb.get("fsync_interval_seconds", 1.0)),
+        )
 
     started_at = datetime.now(timezone.utc).replace(tzinfo=None)
-    _sensor_manager = SensorManager(config, sensors, storage, cleaned_df, stats, started_at)
-    _map_viz = MapVisualizer(config)
-    _temp_viz = TemporalVisualizer(config)
+    checkpoint_path = storage_path.with_suffix(".checkpoint.json") if config.checkpoint.get("enabled", True) else None
+    with _phase(timings, "live_state"):
+        sm = SensorManager(
+            config,
+            sensors,
+            storage,
+            None,
+            {},
+            started_at,
+            writer=writer,
+            checkpoint_path=checkpoint_path,
+            log_base=log_base or (0, 0),
+        )
+    _sensor_manager = sm
+    _map_viz = None
+    _temp_viz = None
+    _render_cache = RenderCache(config.render_cache_max_bytes)
+    REGISTRY.clear_collectors()
+    REGISTRY.add_collector(_collect_service_metrics)
+
+    prof = config.profiling
+    if prof.get("enabled", False):
+        out_dir = Path(prof.get("dir", "profiles"))
+        if not out_dir.is_absolute():
+            out_dir = Path.cwd() / out_dir
+        _profiler = SlowRequestProfiler(
+            out_dir,
+            slow_seconds=float(prof.get("slow_request_seconds", 1.0)),
+            interval_seconds=float(prof.get("interval_seconds", 0.005)),
+            max_profiles=int(prof.get("max_profiles", 100)),
+        )
+        _profiler.start()
+
+    compactor = None
+    cc = config.compaction
+    if cc.get("enabled", False):
+        if storage.shared:
+            log.warning("Compaction is off: it needs a single worker, and workers=%d", config.workers)
+        else:
+            compactor = Compactor(
+                sm,
+                storage,
+                partitions,
+                backend,
+                max_age_seconds=float(cc.get("max_age_hours", 168)) * 3600,
+                resolution=str(cc.get("resolution", "raw")),
+                interval_seconds=float(cc.get("interval_seconds", 3600.0)),
+            )
+
+    timings["serving"] = round((time.perf_counter() - started) * 1000, 3)
+    log.info("Serving ingest and status after %.1f ms: %s", timings["serving"], timings)
+    threading.Thread(
+        target=_load_historical_in_background,
+        args=(sm, config, hist_path, Path(sensors_path), sensors_state, partitions, compactor, timings, started),
+        name="aether-historical-loader",
+        daemon=True,
+    ).start()
 
+
+def _load_historical_in_background(
+    sm: SensorManager,
+    config: ServerConfig,
+    hist_path: Path,
+    sensors_path: Path,
+    sensors_state: tuple[int, int, int] | None,
+    partitions: CompactedPartitionStore,
+    compactor: Compactor | None,
+    timings: dict[str, float],
+    started: float,
+) -> None:
+    try:
+        with _phase(timings, "historical_load"):
+            cleaned_df, stats, csv_state = _load_historical(config, hist_path)
+        with _phase(timings, "compacted_load"):
+            compacted = partitions.load()
+            if compacted is not None and len(compacted):
+                cleaned_df = compacted if cleaned_df.empty else DataCleaner.concat_compact([cleaned_df, compacted])
+        with _phase(timings, "hot_tier"):
+            sm.load_hot_backlog()
+        with _phase(timings, "historical_index"):
+            sm.attach_historical(cleaned_df, stats)
+    except Exception as e:
+        log.exception("Loading historical data from %s failed", hist_path)
+        sm.historical_failed(str(e))
+        return
+    timings["ready"] = round((time.perf_counter() - started) * 1000, 3)
     log.info("Historical data stats: %s", stats)
+    log.info("Ready after %.1f ms: %s", timings["ready"], timings)
+
+    watcher = None
+    hr = config.hot_reload
+    if hr.get("enabled", True) and csv_state is not None:
+        watcher = SourceWatcher(
+            sm,
+            hist_path,
+            csv_offset=csv_state[1],
+            csv_inode=csv_state[0],
+            sensors_path=sensors_path,
+            sensors_state=sensors_state,
+            interval_seconds=float(hr.get("interval_seconds", 5.0)),
+        )
+    _start_after_ready(sm, watcher, compactor)
+    # pay for the Plotly import here rather than in the first page request
+    with _phase(timings, "visualization_import"):
+        import aether.visualization.map_visualization  # noqa: F401
+        import aether.visualization.temporal_visualization  # noqa: F401
+
+
+def _start_after_ready(sm: SensorManager, watcher: SourceWatcher | None, compactor: Compactor | None) -> None:
+    """Start the jobs that merge into the history; they need it attached first."""
+    global _watcher, _compactor
+    with _lifecycle_lock:
+        # services may have been shut down or re-initialized while the history was loading
+        if _sensor_manager is not sm or _shutting_down:
+            return
+        if watcher is not None:
+            _watcher = watcher
+            watcher.start()
+        if compactor is not None:
+            _compactor = compactor
+            compactor.start()
+
+
+def _collect_service_metrics() -> list[tuple[str, str, str, list[tuple[dict[str, str], float]]]]:
+    """Scrape-time values kept by the services themselves: live totals, render cache, write-behind queue."""
+    out = []
+    if _sensor_manager is not None:
+        status = _sensor_manager.get_status()
+        out.append(("aether_active_sensors", "gauge", "Sensors that have reported at least once.", [({}, status["active_sensors"])]))
+        out.append(("aether_stored_readings", "gauge", "Live readings in storage.", [({}, status["total_readings"])]))
+        out.append(("aether_historical_ready", "gauge", "1 once the historical dataset is loaded.", [({}, int(status["ready"]))]))
+        hot = _sensor_manager.hot_tier_stats()
+        if hot is not None:
+            out.append(("aether_hot_tier_readings", "gauge", "Live readings held in the hot tier.", [({}, hot["readings"])]))
+            out.append(("aether_hot_tier_bytes", "gauge", "Bytes allocated by the hot tier.", [({}, hot["bytes"])]))
+        wb = status["write_behind"]
+        if wb is not None:
+            out.append(("aether_write_behind_queue_depth", "gauge", "Readings waiting to be flushed.", [({}, wb["queue_depth"])]))
+            out.append(("aether_write_behind_rejected_total", "counter", "Readings refused by a full queue.", [({}, wb["rejected"])]))
+    if _render_cache is not None:
+        stats = _render_cache.stats()
+        out.append(("aether_render_cache_bytes", "gauge", "Bytes of rendered pages held.", [({}, stats["bytes"])]))
+        out.append(
+            (
+                "aether_render_cache_lookups_total",
+                "counter",
+                "Render cache lookups by result.",
+                [({"result": "hit"}, stats["hits"]), ({"result": "miss"}, stats["misses"])],
+            )
+        )
+    return out
+
+
+def _storage_location(config: ServerConfig) -> tuple[str, Path]:
+    """Backend name and path from ``storage_backend`` and ``storage_file`` (``sqlite:///`` selects SQLite)."""
+    location = config.storage_file
+    backend = config.storage_backend
+    if location.startswith(SQLITE_SCHEME):
+        location = location[len(SQLITE_SCHEME):]
+        backend = backend or "sqlite"
+    backend = backend or "log"
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"storage_backend must be one of {STORAGE_BACKENDS}, got {backend!r}")
+    path = Path(location)
+    if not path.is_absolute():
+        path = Path.cwd() / location
+    return backend, path
+
+
+def _open_storage(config: ServerConfig, backend: str, storage_path: Path) -> ReadingStorage:
+    shared = config.workers > 1
+    if backend == "sqlite":
+        db_path = storage_path if storage_path.suffix in (".db", ".sqlite", ".sqlite3") else storage_path.with_suffix(".db")
+        return SqliteReadingStorage(
+            db_path,
+            legacy_path=storage_path.with_suffix(".json"),
+            legacy_log_dir=storage_path.with_suffix(".segments"),
+            shared=shared,
+        )
+    return SegmentedReadingStorage(
+        storage_path.with_suffix(".segments"),
+        legacy_path=storage_path,
+        segment_max_bytes=config.storage_segment_max_bytes,
+        shared=shared,
+    )
+
+
+def _load_historical(
+    config: ServerConfig, hist_path: Path
+) -> tuple[pd.DataFrame, dict[str, Any], tuple[int, int, int] | None]:
+    """The cleaned history plus the ``source_state`` of the CSV it covers (read up to that size)."""
+    state = source_state(hist_path)
+    end = state[1] if state is not None else None
+    cache = None
+    hc = config.historical_cache
+    if hc.get("enabled", True):
+        cache_dir = Path(hc["dir"]) if hc.get("dir") else hist_path.with_suffix(".cache")
+        if not cache_dir.is_absolute():
+            cache_dir = Path.cwd() / cache_dir
+        cache = ColumnarHistoricalCache(cache_dir)
+        cached = cache.load(hist_path)
+        if cached is not None:
+            log.info("Loaded cleaned historical data from cache %s", cache_dir)
+            return (*cached, state)
+
+    chunks = HistoricalCsvRepository(hist_path).iter_chunks(config.historical_chunk_rows, end=end)
+    cleaned_df, stats = DataCleaner.clean_historical_chunks(chunks)
+    cleaned_df = cleaned_df.sort_values(["sensor_id", "timestamp"], kind="stable")
+    if cache is not None and source_state(hist_path) == state:
+        try:
+            cache.store(hist_path, cleaned_df, stats)
+            cached = cache.load(hist_path)
+            if cached is not None:
+                return (*cached, state)
+        except OSError:
+            log.exception("Could not write historical cache to %s", cache.cache_dir)
+    return cleaned_df, stats, state
+
+
+def shutdown_services() -> None:
+    """Drain pending writes and close storage; called from the app's lifespan on shutdown."""
+    global _shutting_down
+    with _lifecycle_lock:
+        _shutting_down = True
+        if _watcher is not None:
+            _watcher.close()
+        if _compactor is not None:
+            _compactor.close()
+    if _profiler is not None:
+        _profiler.close()
+    if _sensor_manager is not None:
+        _sensor_manager.close()
 
 
 def reset_services() -> None:
-    global _sensor_manager, _map_viz, _temp_viz
+    global _sensor_manager, _map_viz, _temp_viz, _render_cache, _profiler, _startup_ms, _watcher, _compactor
     _sensor_manager = None
     _map_viz = None
     _temp_viz = None
+    _render_cache = None
+    _profiler = None
+    _watcher = None
+    _compactor = None
+    _startup_ms = {}
+    REGISTRY.clear_collectors()
 
 
 def get_sensor_manager() -> SensorManager:
@@ -59,12 +357,53 @@ def get_sensor_manager() -> SensorManager:
 
 
 def get_map_visualizer() -> MapVisualizer:
-    if _map_viz is None:
-        raise RuntimeError("Services not initialized")
-    return _map_viz
+    global _map_viz
+    config = get_sensor_manager().config
+    with _viz_lock:
+        if _map_viz is None:
+            from aether.visualization.map_visualization import MapVisualizer
+
+            _map_viz = MapVisualizer(config)
+        return _map_viz
 
 
 def get_temporal_visualizer() -> TemporalVisualizer:
-    if _temp_viz is None:
+    global _temp_viz
+    config = get_sensor_manager().config
+    with _viz_lock:
+        if _temp_viz is None:
+            from aether.visualization.temporal_visualization import TemporalVisualizer
+
+            _temp_viz = TemporalVisualizer(config)
+        return _temp_viz
+
+
+def get_render_cache() -> RenderCache:
+    if _render_cache is None:
         raise RuntimeError("Services not initialized")
-    return _temp_viz
+    return _render_cache
+
+
+def wait_until_ready(timeout: float | None = None) -> bool:
+    """Block until the historical dataset is loaded; False on timeout or if loading failed."""
+    return get_sensor_manager().wait_historical(timeout)
+
+
+def get_startup_timings() -> dict[str, float]:
+    """Milliseconds per startup phase; ``serving`` and ``ready`` are measured from the start."""
+    return dict(_startup_ms)
+
+
+def get_profiler() -> SlowRequestProfiler | None:
+    """The slow-request profiler, or None when profiling is off (the default)."""
+    return _profiler
+
+
+def get_source_watcher() -> SourceWatcher | None:
+    """The historical CSV / registry watcher, once the history is loaded and if hot reload is on."""
+    return _watcher
+
+
+def get_compactor() -> Compactor | None:
+    """The live-readings compaction job, once the history is loaded and if compaction is on."""
+    return _compactor
@@ -26,5 +26,3 @@ class SensorInfo:
     latitude: float
     longitude: float
     metadata: dict[str, Any]
-    last_reading: dict[str, Any] | None = None
-    last_update: datetime | None = None
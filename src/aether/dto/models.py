@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import Any, Literal
+
 from pydantic import BaseModel, Field
 
 
@@ -17,9 +19,91 @@ class IngestResponse(BaseModel):
     timestamp: datetime
 
 
+class BatchIngestItemResult(BaseModel):
+    index: int
+    status: str
+    code: int
+    sensor_id: str | None = None
+    timestamp: datetime | None = None
+    errors: list[str] = Field(default_factory=list)
+
+
+class BatchIngestResponse(BaseModel):
+    accepted: int
+    rejected: int
+    results: list[BatchIngestItemResult]
+
+
+class PollutantAggregate(BaseModel):
+    count: int
+    sum: float
+    min: float | None
+    max: float | None
+    mean: float | None
+
+
+class RollupBucket(BaseModel):
+    start: datetime
+    count: int
+    stats: dict[str, PollutantAggregate]
+
+
+class RollupTotal(BaseModel):
+    count: int
+    stats: dict[str, PollutantAggregate]
+
+
+class RollupResponse(BaseModel):
+    scope: str
+    key: str
+    level: str
+    buckets: list[RollupBucket]
+    total: RollupTotal
+
+
+class SensorLocation(BaseModel):
+    id: str
+    latitude: float
+    longitude: float
+    metadata: dict[str, Any] = Field(default_factory=dict)
+    latest: dict[str, float] = Field(default_factory=dict)
+    last_update: datetime | None = None
+    distance_km: float | None = None
+
+
+class SensorSearchResponse(BaseModel):
+    count: int
+    sensors: list[SensorLocation]
+
+
+class WriteBehindStatus(BaseModel):
+    queue_depth: int
+    queue_capacity: int
+    flushes: int
+    records_written: int
+    rejected: int
+    last_flush_ms: float
+    max_flush_ms: float
+    fsync: str
+
+
+class RenderCacheStatus(BaseModel):
+    entries: int
+    bytes: int
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+
+
 class StatusResponse(BaseModel):
     status: str
     uptime_seconds: int
     active_sensors: int
     total_readings: int
     last_update: datetime | None
+    write_behind: WriteBehindStatus | None = None
+    render_cache: RenderCacheStatus | None = None
+    ready: bool = True
+    historical: Literal["loading", "ready", "failed"] = "ready"
+    startup_ms: dict[str, float] = Field(default_factory=dict)
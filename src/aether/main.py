@@ -1,21 +1,45 @@
 from __future__ import annotations
 
+import json
 import logging
 import os
 from contextlib import asynccontextmanager
-from typing import Annotated
+from datetime import datetime
+from typing import Annotated, Callable, Hashable, Literal
 
-from fastapi import Depends, FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 
 from aether.dependencies import (
     get_sensor_manager,
     get_map_visualizer,
+    get_profiler,
+    get_render_cache,
+    get_startup_timings,
     get_temporal_visualizer,
     initialize_services,
+    shutdown_services,
 )
-from aether.dto.models import IngestRequest, IngestResponse, StatusResponse
-from aether.services.exceptions import UnauthorizedSensorError, InvalidReadingError
+from aether.dto.models import (
+    BatchIngestResponse,
+    IngestRequest,
+    IngestResponse,
+    RollupResponse,
+    SensorSearchResponse,
+    StatusResponse,
+)
+from aether.services.exceptions import (
+    HistoricalDataNotReadyError,
+    IngestBackpressureError,
+    InvalidReadingError,
+    UnauthorizedSensorError,
+    UnsupportedIngestFormatError,
+)
+from aether.services.ingest_formats import batch_decoder
+from aether.services.metrics import REGISTRY, RequestMetricsMiddleware
+from aether.services.readings_query import decode_cursor, render_readings
+from aether.services.render_cache import RenderCache
 
 log = logging.getLogger(__name__)
 
@@ -29,8 +53,15 @@ def create_app(server_config_path: str | None = None, sensors_path: str | None =
         logging.basicConfig(level=logging.INFO)
         initialize_services(cfg, sensors_cfg)
         yield
+        shutdown_services()
 
     app = FastAPI(title="Aether AQMS", lifespan=lifespan)
+    app.add_middleware(RequestMetricsMiddleware, profiler=get_profiler)
+
+    @app.exception_handler(HistoricalDataNotReadyError)
+    async def historical_not_ready(request: Request, exc: HistoricalDataNotReadyError) -> JSONResponse:
+        # history-backed endpoints answer 503 until the background load has attached the dataset
+        return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
 
     @app.get("/", response_class=HTMLResponse)
     def welcome() -> str:
@@ -41,10 +72,18 @@ def create_app(server_config_path: str | None = None, sensors_path: str | None =
     <ul>
       <li><a href="/docs">API Docs</a></li>
       <li><a href="/status">System Status</a></li>
-      <li><a href="/map">Real-time Map</a></li>
-      <li><code>GET /history/{sensor_id}</code></li>
+      <li><a href="/map">Real-time Map</a> (<code>?bbox=min_lon,min_lat,max_lon,max_lat</code>)</li>
+      <li><code>GET /sensors/near?lat=&amp;lon=&amp;radius_km=&amp;limit=</code></li>
+      <li><code>GET /sensors/bbox?bbox=min_lon,min_lat,max_lon,max_lat&amp;limit=</code></li>
+      <li><a href="/metrics">Metrics</a> (Prometheus text format)</li>
+      <li><code>GET /history/{sensor_id}?from=&amp;to=&amp;points=&amp;downsample=lttb|minmax|none</code></li>
       <li><code>GET /distribution/{year}/{month}</code></li>
+      <li><code>GET /distribution/{year}</code></li>
+      <li><code>GET /distribution?from=YYYY-MM&amp;to=YYYY-MM</code></li>
+      <li><code>GET /rollups/{sensor|province}/{key}?level=hour|day|month&amp;from=&amp;to=&amp;pollutants=</code></li>
+      <li><code>GET /readings?sensor_id=&amp;from=&amp;to=&amp;pollutants=&amp;format=ndjson|csv&amp;limit=&amp;cursor=</code></li>
       <li><code>POST /ingest</code></li>
+      <li><code>POST /ingest/batch</code> (JSON, NDJSON, CSV, MessagePack or Arrow; <code>?results=rejected</code>)</li>
     </ul>
   </body>
 </html>
@@ -59,35 +98,261 @@ def create_app(server_config_path: str | None = None, sensors_path: str | None =
             raise HTTPException(status_code=403, detail=str(e))
         except InvalidReadingError as e:
             raise HTTPException(status_code=400, detail={"errors": e.errors})
+        except IngestBackpressureError as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+    @app.post("/ingest/batch", response_model=BatchIngestResponse)
+    async def ingest_batch(
+        request: Request,
+        results: Literal["all", "rejected"] = "all",
+        sm=Depends(get_sensor_manager),
+    ):
+        # refuse oversized bodies before reading them in full, let alone decoding them
+        max_bytes = sm.config.ingest_batch_max_bytes
+        declared = request.headers.get("content-length", "")
+        if declared.isdigit() and int(declared) > max_bytes:
+            raise HTTPException(status_code=413, detail=f"batch body exceeds {max_bytes} bytes")
+        body = await _read_body(request, max_bytes)
+        content_type = request.headers.get("content-type", "")
+        decoder = batch_decoder(content_type)
+        if decoder is None:
+            batch = _parse_batch_body(body, content_type)
+        else:
+            try:
+                batch = decoder(body)
+            except UnsupportedIngestFormatError as e:
+                raise HTTPException(status_code=415, detail=str(e))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        if len(batch) > sm.config.ingest_batch_max_items:
+            raise HTTPException(
+                status_code=413,
+                detail=f"batch exceeds {sm.config.ingest_batch_max_items} items",
+            )
+        try:
+            if isinstance(batch, list):
+                items = await run_in_threadpool(sm.ingest_batch, batch)
+                accepted = sum(1 for r in items if r["code"] == 200)
+                if results == "rejected":
+                    items = [r for r in items if r["code"] != 200]
+            else:
+                accepted, items = await run_in_threadpool(sm.ingest_frame, batch, results == "all")
+        except IngestBackpressureError as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+        return BatchIngestResponse(accepted=accepted, rejected=len(batch) - accepted, results=items)
 
     @app.get("/map", response_class=HTMLResponse)
-    def map_view(sm=Depends(get_sensor_manager), viz=Depends(get_map_visualizer)):
-        return viz.create_map_html(sm.sensors)
+    def map_view(
+        request: Request,
+        bbox: str | None = None,
+        sm=Depends(get_sensor_manager),
+        viz=Depends(get_map_visualizer),
+        cache=Depends(get_render_cache),
+    ):
+        box = _parse_bbox(bbox) if bbox else None
+        sensors, snap, rows = sm.map_view(box)
+        key = ("map", snap.version, box)
+        return _cached_html(request, cache, key, lambda: viz.create_map_html(sensors, snap, rows, box))
+
+    @app.get("/sensors/near", response_model=SensorSearchResponse)
+    def sensors_near(
+        lat: Annotated[float, Query(ge=-90, le=90)],
+        lon: Annotated[float, Query(ge=-180, le=180)],
+        radius_km: Annotated[float | None, Query(gt=0)] = None,
+        limit: Annotated[int, Query(ge=1, le=10_000)] = 10,
+        sm=Depends(get_sensor_manager),
+    ):
+        found = sm.sensors_near(lat, lon, radius_km, limit)
+        return SensorSearchResponse(count=len(found), sensors=found)
+
+    @app.get("/sensors/bbox", response_model=SensorSearchResponse)
+    def sensors_bbox(
+        bbox: str,
+        limit: Annotated[int | None, Query(ge=1)] = None,
+        sm=Depends(get_sensor_manager),
+    ):
+        count, found = sm.sensors_in_bbox(_parse_bbox(bbox), limit)
+        return SensorSearchResponse(count=count, sensors=found)
 
     @app.get("/status", response_model=StatusResponse)
-    def status(sm=Depends(get_sensor_manager)):
-        return StatusResponse(**sm.get_status())
+    def status(sm=Depends(get_sensor_manager), cache=Depends(get_render_cache)):
+        return StatusResponse(**sm.get_status(), render_cache=cache.stats(), startup_ms=get_startup_timings())
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def metrics():
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
     @app.get("/history/{sensor_id}", response_class=HTMLResponse)
-    def history(sensor_id: str, sm=Depends(get_sensor_manager), tv=Depends(get_temporal_visualizer)):
-        try:
-            df = sm.get_sensor_history(sensor_id)
-        except KeyError:
-            raise HTTPException(status_code=404, detail="sensor not found")
-        if df.empty:
-            raise HTTPException(status_code=404, detail="no historical data for sensor")
-        return tv.create_time_series_html(df, sensor_id)
+    def history(
+        request: Request,
+        sensor_id: str,
+        start: Annotated[datetime | None, Query(alias="from")] = None,
+        end: Annotated[datetime | None, Query(alias="to")] = None,
+        points: Annotated[int | None, Query(ge=3, le=100_000)] = None,
+        downsample: Annotated[Literal["lttb", "minmax", "none"], Query()] = "lttb",
+        sm=Depends(get_sensor_manager),
+        tv=Depends(get_temporal_visualizer),
+        cache=Depends(get_render_cache),
+    ):
+        max_points = None if downsample == "none" else (points or sm.config.history_max_points)
+
+        def render() -> str:
+            try:
+                df = sm.get_sensor_history(sensor_id, start, end)
+            except KeyError:
+                raise HTTPException(status_code=404, detail="sensor not found")
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            if df.empty:
+                raise HTTPException(status_code=404, detail="no historical data for sensor")
+            return tv.create_time_series_html(df, sensor_id, max_points=max_points, method=downsample)
+
+        key = ("history", sensor_id, start, end, max_points, downsample, sm.sensor_version(sensor_id))
+        return _cached_html(request, cache, key, render)
+
+    def distribution_page(request: Request, start: tuple[int, int], end: tuple[int, int], period: str, sm, tv, cache):
+        def render() -> str:
+            counts = sm.get_distribution_counts(start, end)
+            if counts.empty:
+                raise HTTPException(status_code=404, detail="no data for the specified period")
+            return tv.create_distribution_counts_html(counts, period)
+
+        key = ("distribution", start, end, sm.months_version(start, end))
+        return _cached_html(request, cache, key, render)
+
+    @app.get("/distribution", response_class=HTMLResponse)
+    def distribution_range(
+        request: Request,
+        start: Annotated[str, Query(alias="from", pattern=r"^\d{4}-\d{2}$")],
+        end: Annotated[str, Query(alias="to", pattern=r"^\d{4}-\d{2}$")],
+        sm=Depends(get_sensor_manager),
+        tv=Depends(get_temporal_visualizer),
+        cache=Depends(get_render_cache),
+    ):
+        lo = tuple(int(p) for p in start.split("-"))
+        hi = tuple(int(p) for p in end.split("-"))
+        if not (1 <= lo[1] <= 12 and 1 <= hi[1] <= 12):
+            raise HTTPException(status_code=400, detail="month must be 1..12")
+        if lo > hi:
+            raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+        return distribution_page(request, lo, hi, f"{start} to {end}", sm, tv, cache)
+
+    @app.get("/distribution/{year}", response_class=HTMLResponse)
+    def distribution_year(
+        request: Request,
+        year: int,
+        sm=Depends(get_sensor_manager),
+        tv=Depends(get_temporal_visualizer),
+        cache=Depends(get_render_cache),
+    ):
+        return distribution_page(request, (year, 1), (year, 12), str(year), sm, tv, cache)
 
     @app.get("/distribution/{year}/{month}", response_class=HTMLResponse)
-    def distribution(year: int, month: int, sm=Depends(get_sensor_manager), tv=Depends(get_temporal_visualizer)):
+    def distribution(
+        request: Request,
+        year: int,
+        month: int,
+        sm=Depends(get_sensor_manager),
+        tv=Depends(get_temporal_visualizer),
+        cache=Depends(get_render_cache),
+    ):
         if month < 1 or month > 12:
             raise HTTPException(status_code=400, detail="month must be 1..12")
-        df = sm.get_month_df(year, month)
-        if df.empty:
-            raise HTTPException(status_code=404, detail="no data for the specified period")
-        return tv.create_distribution_html(df, sm.sensors, year, month)
+        return distribution_page(request, (year, month), (year, month), f"{year}-{month:02d}", sm, tv, cache)
+
+    @app.get("/rollups/{scope}/{key}", response_model=RollupResponse)
+    def rollups(
+        scope: Literal["sensor", "province"],
+        key: str,
+        level: Literal["hour", "day", "month"] = "day",
+        start: Annotated[datetime | None, Query(alias="from")] = None,
+        end: Annotated[datetime | None, Query(alias="to")] = None,
+        pollutants: str | None = None,
+        sm=Depends(get_sensor_manager),
+    ):
+        selected = [p.strip() for p in pollutants.split(",") if p.strip()] if pollutants else None
+        try:
+            return sm.get_rollups(scope, key, level, start, end, selected)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"unknown {scope} '{key}'")
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    @app.get("/readings")
+    def readings(
+        request: Request,
+        sensor_id: str | None = None,
+        start: Annotated[datetime | None, Query(alias="from")] = None,
+        end: Annotated[datetime | None, Query(alias="to")] = None,
+        pollutants: str | None = None,
+        format: Literal["ndjson", "csv"] | None = None,
+        limit: Annotated[int | None, Query(ge=1)] = None,
+        cursor: str | None = None,
+        sm=Depends(get_sensor_manager),
+    ):
+        fmt = format or ("csv" if "text/csv" in request.headers.get("accept", "") else "ndjson")
+        selected = [p.strip() for p in pollutants.split(",") if p.strip()] if pollutants else list(sm.config.pollutants)
+        try:
+            after = decode_cursor(cursor) if cursor else None
+            rows = sm.iter_readings(sensor_id, start, end, selected, after)
+        except KeyError:
+            raise HTTPException(status_code=404, detail="sensor not found")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+        return StreamingResponse(render_readings(rows, fmt, selected, limit), media_type=media_type)
 
     return app
 
 
+def _cached_html(request: Request, cache: RenderCache, key: Hashable, render: Callable[[], str]) -> Response:
+    """Serve a page from the render cache, answering ``If-None-Match`` with 304."""
+    page = cache.get_or_render(key, render)
+    headers = {"ETag": page.etag}
+    if page.etag in (t.strip() for t in request.headers.get("if-none-match", "").split(",")):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(content=page.body, headers=headers)
+
+
+def _parse_bbox(text: str) -> tuple[float, float, float, float]:
+    """``min_lon,min_lat,max_lon,max_lat`` in degrees; ``min_lon > max_lon`` crosses the antimeridian."""
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(p) for p in text.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be min_lon,min_lat,max_lon,max_lat")
+    if not all(-180.0 <= v <= 180.0 for v in (min_lon, max_lon)) or not all(-90.0 <= v <= 90.0 for v in (min_lat, max_lat)):
+        raise HTTPException(status_code=400, detail="bbox is outside -180..180 / -90..90")
+    if min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="bbox min_lat must not be above max_lat")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+async def _read_body(request: Request, max_bytes: int) -> bytes:
+    """The request body, with a 413 as soon as more than ``max_bytes`` have arrived.
+
+    Covers chunked uploads, which have no ``Content-Length`` to check up front.
+    """
+    chunks: list[bytes] = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"batch body exceeds {max_bytes} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _parse_batch_body(body: bytes, content_type: str) -> list:
+    """Decode a batch body: a JSON array, or NDJSON with one reading per line."""
+    try:
+        if "ndjson" in content_type or "jsonlines" in content_type:
+            return [json.loads(line) for line in body.splitlines() if line.strip()]
+        items = json.loads(body)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"malformed batch body: {e}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="batch body must be a JSON array")
+    return items
+
+
 app = create_app()
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+
+
+def file_fingerprint(path: Path, with_hash: bool = False) -> dict[str, Any]:
+    st = path.stat()
+    fp: dict[str, Any] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if with_hash:
+        h = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1024 * 1024), b""):
+                h.update(block)
+        fp["sha256"] = h.hexdigest()
+    return fp
+
+
+def write_columns(gen_dir: Path, df: pd.DataFrame) -> list[dict[str, Any]] | None:
+    """Save every column of a compact frame as ``<name>.npy`` in a new ``gen_dir``.
+
+    Returns the column entries to record in a manifest, or None (and nothing written)
+    when a column is neither categorical, datetime nor numeric.
+    """
+    gen_dir.mkdir(parents=True)
+    columns: list[dict[str, Any]] = []
+    for name in df.columns:
+        col = df[name]
+        entry: dict[str, Any] = {"name": str(name)}
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            entry["kind"] = "category"
+            entry["categories"] = [str(c) for c in col.cat.categories]
+            values = col.cat.codes.to_numpy()
+        elif pd.api.types.is_datetime64_dtype(col.dtype):
+            entry["kind"] = "datetime"
+            values = col.to_numpy(dtype="datetime64[ns]")
+        elif pd.api.types.is_numeric_dtype(col.dtype):
+            entry["kind"] = "numeric"
+            values = col.to_numpy()
+        else:
+            shutil.rmtree(gen_dir, ignore_errors=True)
+            return None
+        np.save(gen_dir / f"{entry['name']}.npy", np.ascontiguousarray(values))
+        columns.append(entry)
+    return columns
+
+
+def read_columns(gen_dir: Path, columns: list[dict[str, Any]]) -> pd.DataFrame:
+    """The frame saved by ``write_columns``, memory-mapped read-only."""
+    out: dict[str, Any] = {}
+    for col in columns:
+        arr = np.load(gen_dir / f"{col['name']}.npy", mmap_mode="r")
+        if col["kind"] == "category":
+            arr = pd.Categorical.from_codes(arr, categories=col["categories"])
+        out[col["name"]] = arr
+    return pd.DataFrame(out, copy=False)
+
+
+class ColumnarHistoricalCache:
+    """On-disk columnar copy of the cleaned historical frame, opened with ``mmap_mode="r"``.
+
+    Every column is one ``.npy`` file: ``sensor_id`` as integer category codes plus a
+    category list in the manifest, ``timestamp`` as datetime64[ns] and the pollutants as
+    float32. Workers that open the same cache share the page cache instead of each
+    holding a parsed copy. ``manifest.json`` is written last and names the generation
+    directory holding the columns, so a half-written cache is never picked up.
+
+    The cache is valid while the source CSV keeps its size and mtime; when only the mtime
+    moved (a copy or ``touch``), the content hash decides.
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, cache_dir: str | Path):
+        self.cache_dir = Path(cache_dir)
+
+    def _read_manifest(self) -> dict[str, Any] | None:
+        p = self.cache_dir / self.MANIFEST
+        if not p.exists():
+            return None
+        try:
+            manifest = json.loads(p.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            return None
+        if manifest.get("version") != CACHE_FORMAT_VERSION:
+            return None
+        return manifest
+
+    def _is_current(self, manifest: dict[str, Any], source: Path) -> bool:
+        cached = manifest["source"]
+        fp = file_fingerprint(source)
+        if fp["size"] != cached["size"]:
+            return False
+        if fp["mtime_ns"] == cached["mtime_ns"]:
+            return True
+        if file_fingerprint(source, with_hash=True)["sha256"] != cached.get("sha256"):
+            return False
+        manifest["source"]["mtime_ns"] = fp["mtime_ns"]
+        self._write_manifest(manifest)
+        return True
+
+    def _write_manifest(self, manifest: dict[str, Any]) -> None:
+        tmp = self.cache_dir / f"{self.MANIFEST}.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        os.replace(tmp, self.cache_dir / self.MANIFEST)
+
+    def load(self, source: str | Path) -> tuple[pd.DataFrame, dict[str, Any]] | None:
+        """Return the cached (frame, stats) for ``source``, or None when missing or stale."""
+        source = Path(source)
+        manifest = self._read_manifest()
+        if manifest is None or not source.exists() or not self._is_current(manifest, source):
+            return None
+
+        try:
+            frame = read_columns(self.cache_dir / manifest["generation"], manifest["columns"])
+        except (OSError, ValueError):
+            log.warning("Historical cache at %s is unreadable; rebuilding", self.cache_dir)
+            return None
+        return frame, dict(manifest["stats"])
+
+    def store(self, source: str | Path, df: pd.DataFrame, stats: dict[str, Any]) -> None:
+        """Write ``df`` (already compact, see ``DataCleaner.compact_dtypes``) as a new generation."""
+        source = Path(source)
+        previous = self._read_manifest()
+        generation = uuid.uuid4().hex
+        gen_dir = self.cache_dir / generation
+        columns = write_columns(gen_dir, df)
+        if columns is None:
+            log.warning("Not caching historical data: it has a column of an unsupported dtype")
+            return
+
+        self._write_manifest(
+            {
+                "version": CACHE_FORMAT_VERSION,
+                "source": {"path": str(source), **file_fingerprint(source, with_hash=True)},
+                "generation": generation,
+                "rows": int(len(df)),
+                "columns": columns,
+                "stats": stats,
+            }
+        )
+        # only drop the generation this one replaced: another worker may be writing its own
+        if previous is not None and previous.get("generation") not in (None, generation):
+            shutil.rmtree(self.cache_dir / previous["generation"], ignore_errors=True)
+        log.info("Wrote historical cache %s (%d rows)", gen_dir, len(df))
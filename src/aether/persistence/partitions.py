@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from aether.persistence.historical_cache import read_columns, write_columns
+from aether.persistence.storage import LogPosition
+from aether.services.data_cleaning import DataCleaner
+
+log = logging.getLogger(__name__)
+
+PARTITIONS_FORMAT_VERSION = 1
+
+
+class CompactedPartitionStore:
+    """Live readings moved out of the readings store by compaction, as columnar partitions.
+
+    Each partition is a directory of ``.npy`` columns in the historical cache layout
+    (``write_columns``), so it loads memory-mapped like the cache. ``manifest.json`` lists
+    the partitions and the store position the readings store was truncated through; it is
+    replaced atomically once a partition is complete, so an interrupted compaction never
+    leaves a half-written partition in use. When a write would exceed ``max_partitions``,
+    all partitions are merged into one instead, which keeps startup to a few file opens.
+
+    Written by one process at a time (compaction only runs with a single worker).
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, root: str | Path, max_partitions: int = 8):
+        self.root = Path(root)
+        self.max_partitions = max(1, int(max_partitions))
+
+    def _read_manifest(self) -> dict[str, Any]:
+        p = self.root / self.MANIFEST
+        empty = {"version": PARTITIONS_FORMAT_VERSION, "partitions": [], "log": None}
+        if not p.exists():
+            return empty
+        try:
+            manifest = json.loads(p.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            log.warning("Ignoring unreadable compaction manifest %s", p)
+            return empty
+        if manifest.get("version") != PARTITIONS_FORMAT_VERSION:
+            log.warning("Ignoring compaction manifest %s of format %r", p, manifest.get("version"))
+            return empty
+        return manifest
+
+    def _write_manifest(self, manifest: dict[str, Any]) -> None:
+        tmp = self.root / f"{self.MANIFEST}.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        os.replace(tmp, self.root / self.MANIFEST)
+
+    def partitions(self) -> list[dict[str, Any]]:
+        """Manifest entries: ``name``, ``rows``, ``resolution`` (``raw``, ``hour`` or ``mixed``), ``start``, ``end``."""
+        return [{k: v for k, v in p.items() if k != "columns"} for p in self._read_manifest()["partitions"]]
+
+    def rows(self) -> int:
+        return sum(int(p["rows"]) for p in self._read_manifest()["partitions"])
+
+    def through(self, backend: str) -> LogPosition | None:
+        """Position the ``backend`` readings store has been (or must still be) truncated through."""
+        entry = self._read_manifest().get("log")
+        if not entry or entry.get("backend") != backend:
+            return None
+        return (int(entry["through"][0]), int(entry["through"][1]))
+
+    def load(self) -> pd.DataFrame | None:
+        """All partitions as one compact frame, or None when nothing was compacted yet."""
+        manifest = self._read_manifest()
+        frames = [read_columns(self.root / p["name"], p["columns"]) for p in manifest["partitions"]]
+        if not frames:
+            return None
+        if len(frames) == 1:
+            return frames[0]
+        return DataCleaner.concat_compact(frames)
+
+    def add(self, df: pd.DataFrame, through: LogPosition, backend: str, resolution: str) -> None:
+        """Record ``df`` (compact, see ``DataCleaner.compact_dtypes``) as covering the store up to ``through``."""
+        manifest = self._read_manifest()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._drop_unreferenced(manifest)
+
+        replaced: list[dict[str, Any]] = []
+        if len(manifest["partitions"]) + 1 > self.max_partitions:
+            replaced = manifest["partitions"]
+            frame = self.load()
+            if frame is not None:
+                df = DataCleaner.concat_compact([frame, df])
+            resolutions = {p["resolution"] for p in replaced} | {resolution}
+            resolution = resolutions.pop() if len(resolutions) == 1 else "mixed"
+        df = df.sort_values(["sensor_id", "timestamp"], kind="stable").reset_index(drop=True)
+
+        name = uuid.uuid4().hex
+        columns = write_columns(self.root / name, df)
+        if columns is None:
+            raise ValueError("compacted readings have a column of an unsupported dtype")
+        entry = {
+            "name": name,
+            "rows": int(len(df)),
+            "resolution": resolution,
+            "start": df["timestamp"].min().isoformat() if len(df) else None,
+            "end": df["timestamp"].max().isoformat() if len(df) else None,
+            "columns": columns,
+        }
+        kept = [p for p in manifest["partitions"] if p not in replaced]
+        self._write_manifest(
+            {
+                "version": PARTITIONS_FORMAT_VERSION,
+                "partitions": [*kept, entry],
+                "log": {"backend": backend, "through": list(through)},
+            }
+        )
+        for p in replaced:
+            shutil.rmtree(self.root / p["name"], ignore_errors=True)
+        log.info("Wrote compacted partition %s (%d rows, %s)", name, len(df), resolution)
+
+    def _drop_unreferenced(self, manifest: dict[str, Any]) -> None:
+        """Remove partition directories a crashed compaction wrote but never recorded."""
+        names = {p["name"] for p in manifest["partitions"]}
+        for child in self.root.iterdir():
+            if child.is_dir() and child.name not in names:
+                shutil.rmtree(child, ignore_errors=True)
@@ -1,10 +1,96 @@
 from __future__ import annotations
 
+import csv
+import io
 import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+from array import array
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any
+from typing import Any, IO, Iterable, Iterator, Protocol
+
+import numpy as np
 import pandas as pd
 
+from aether.services.conversions import naive_utc
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+LogPosition = tuple[int, int]
+# (sensor_id, start, end), both bounds inclusive and optional
+SensorRange = tuple[str, datetime | None, datetime | None]
+
+
+class ReadingStorage(Protocol):
+    """What the service needs from a readings store.
+
+    Records are the ``SensorReading.to_dict()`` objects, returned exactly as appended.
+    A ``LogPosition`` is opaque outside the backend that produced it: ``scan`` yields the
+    position just after each record, and resuming ``scan`` from it continues in append order.
+
+    ``expired`` and ``truncate`` drop the oldest part of the store once compaction has
+    copied it elsewhere; positions after the truncated prefix stay valid.
+    """
+
+    shared: bool
+
+    def scan(
+        self, position: LogPosition = (0, 0), end: LogPosition | None = None
+    ) -> Iterator[tuple[dict[str, Any], LogPosition]]: ...
+
+    def contains(self, position: LogPosition) -> bool: ...
+
+    def end_position(self) -> LogPosition: ...
+
+    def expired(self, before: datetime) -> LogPosition | None: ...
+
+    def truncate(self, position: LogPosition) -> None: ...
+
+    def iter_all(self) -> Iterator[dict[str, Any]]: ...
+
+    def load_all(self) -> list[dict[str, Any]]: ...
+
+    def query(
+        self,
+        sensor_id: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> Iterator[tuple[dict[str, Any], LogPosition]]: ...
+
+    def query_ranges(
+        self, ranges: Iterable[SensorRange]
+    ) -> Iterator[tuple[str, Iterator[tuple[dict[str, Any], LogPosition]]]]: ...
+
+    def append(self, item: dict[str, Any]) -> None: ...
+
+    def append_many(self, items: list[dict[str, Any]]) -> None: ...
+
+    def sync(self) -> None: ...
+
+    def close(self) -> None: ...
+
+
+def epoch_us(ts: Any) -> int | None:
+    """Microseconds since the epoch of an ISO timestamp, naive values taken as UTC."""
+    if isinstance(ts, str):
+        try:
+            ts = datetime.fromisoformat(ts)
+        except ValueError:
+            return None
+    if not isinstance(ts, datetime):
+        return None
+    return (naive_utc(ts) - datetime(1970, 1, 1)) // timedelta(microseconds=1)
+
 
 class JsonReadingStorage:
     def __init__(self, storage_path: str | Path):
@@ -25,9 +111,593 @@ class JsonReadingStorage:
         self.path.write_text(json.dumps(data, indent=2), encoding="utf-8")
 
 
+class SegmentedReadingStorage:
+    """Append-only log of readings, one JSON object per line, split into rotating segment files.
+
+    Appending costs one buffered write regardless of how many readings are already stored.
+    A legacy ``JsonReadingStorage`` array file is migrated once, the first time the log
+    directory is created; the legacy file itself is left untouched.
+
+    With ``shared=True`` several processes may append to the same log: every write (and the
+    one-off migration) holds an exclusive ``flock`` on ``<log_dir>.lock``, and the active
+    segment is re-resolved under that lock, so there is exactly one writer at a time and
+    rotation by one process is picked up by the others.
+    """
+
+    SEGMENT_PREFIX = "segment-"
+    SEGMENT_SUFFIX = ".ndjson"
+
+    def __init__(
+        self,
+        log_dir: str | Path,
+        legacy_path: str | Path | None = None,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        shared: bool = False,
+    ):
+        self.log_dir = Path(log_dir)
+        self.legacy_path = Path(legacy_path) if legacy_path is not None else None
+        self.segment_max_bytes = int(segment_max_bytes)
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._fh: IO[str] | None = None
+        self._active_index = 0
+        self._active_size = 0
+        self._lock_fh: IO[str] | None = None
+        if shared:
+            if fcntl is None:
+                raise RuntimeError("shared readings storage needs fcntl.flock, which this platform lacks")
+            self.log_dir.parent.mkdir(parents=True, exist_ok=True)
+            self._lock_fh = open(self.log_dir.with_name(self.log_dir.name + ".lock"), "a+")
+
+        with self._writer_lock():
+            if not self.log_dir.exists():
+                self._migrate_legacy()
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+
+    @contextmanager
+    def _writer_lock(self) -> Iterator[None]:
+        """Cross-process exclusive lock in shared mode; a no-op otherwise."""
+        if self._lock_fh is None:
+            yield
+            return
+        fcntl.flock(self._lock_fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fh.fileno(), fcntl.LOCK_UN)
+
+    def _segment_path(self, index: int) -> Path:
+        return self.log_dir / f"{self.SEGMENT_PREFIX}{index:06d}{self.SEGMENT_SUFFIX}"
+
+    def segments(self) -> list[Path]:
+        return sorted(self.log_dir.glob(f"{self.SEGMENT_PREFIX}*{self.SEGMENT_SUFFIX}"))
+
+    def _migrate_legacy(self) -> None:
+        if self.legacy_path is None or not self.legacy_path.exists():
+            return
+        items = JsonReadingStorage(self.legacy_path).load_all()
+        if not items:
+            return
+
+        tmp_dir = self.log_dir.with_name(self.log_dir.name + ".tmp")
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        tmp_dir.mkdir(parents=True)
+
+        index, size = 1, 0
+        fh = open(tmp_dir / self._segment_path(index).name, "w", encoding="utf-8")
+        try:
+            for item in items:
+                if size >= self.segment_max_bytes:
+                    fh.close()
+                    index, size = index + 1, 0
+                    fh = open(tmp_dir / self._segment_path(index).name, "w", encoding="utf-8")
+                line = json.dumps(item, separators=(",", ":")) + "\n"
+                fh.write(line)
+                size += len(line.encode("utf-8"))
+            fh.flush()
+            os.fsync(fh.fileno())
+        finally:
+            fh.close()
+
+        os.replace(tmp_dir, self.log_dir)
+        log.info("Migrated %d readings from %s into %s", len(items), self.legacy_path, self.log_dir)
+
+    def _open_active(self) -> IO[str]:
+        if self._fh is not None and self.shared:
+            # another process may have appended or rotated since our last write
+            segs = self.segments()
+            if segs and self._index_of(segs[-1]) != self._active_index:
+                self._fh.close()
+                self._fh = None
+            else:
+                self._active_size = os.fstat(self._fh.fileno()).st_size
+        if self._fh is None:
+            segs = self.segments()
+            if segs:
+                last = segs[-1]
+                self._active_index = self._index_of(last)
+                self._active_size = last.stat().st_size
+            else:
+                self._active_index = 1
+                self._active_size = 0
+            self._fh = open(self._segment_path(self._active_index), "a", encoding="utf-8")
+            if self._active_size and not self._ends_with_newline(self._segment_path(self._active_index)):
+                # a torn write from a crash: terminate it so the next record starts on its own line
+                self._fh.write("\n")
+                self._active_size += 1
+        if self._active_size >= self.segment_max_bytes:
+            self._fh.close()
+            self._active_index += 1
+            self._active_size = 0
+            self._fh = open(self._segment_path(self._active_index), "a", encoding="utf-8")
+        return self._fh
+
+    @staticmethod
+    def _ends_with_newline(path: Path) -> bool:
+        with open(path, "rb") as fh:
+            fh.seek(-1, os.SEEK_END)
+            return fh.read(1) == b"\n"
+
+    def _index_of(self, segment: Path) -> int:
+        return int(segment.name[len(self.SEGMENT_PREFIX):-len(self.SEGMENT_SUFFIX)])
+
+    def scan(
+        self, position: LogPosition = (0, 0), end: LogPosition | None = None
+    ) -> Iterator[tuple[dict[str, Any], LogPosition]]:
+        """Yield ``(record, position just after it)`` for every complete record after ``position``.
+
+        A trailing line without its newline is an append still in flight (or a torn write)
+        and is not yielded, so the returned positions are always safe to resume from.
+        With ``end``, records starting at or after it are not yielded.
+        """
+        for item, position, _ in self._records(position, end):
+            yield item, position
+
+    def _records(
+        self, position: LogPosition = (0, 0), end: LogPosition | None = None
+    ) -> Iterator[tuple[dict[str, Any], LogPosition, int]]:
+        """``scan`` with the byte length of every record's line."""
+        start_index, start_offset = position
+        for seg in self.segments():
+            index = self._index_of(seg)
+            if index < start_index:
+                continue
+            offset = start_offset if index == start_index else 0
+            with open(seg, "rb") as fh:
+                fh.seek(offset)
+                for raw in fh:
+                    if end is not None and (index, offset) >= end:
+                        return
+                    if not raw.endswith(b"\n"):
+                        break
+                    offset += len(raw)
+                    if not raw.strip():
+                        continue
+                    try:
+                        item = json.loads(raw)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        log.warning("Skipping corrupt record in %s ending at byte %d", seg.name, offset)
+                        continue
+                    yield item, (index, offset), len(raw)
+
+    def contains(self, position: LogPosition) -> bool:
+        """Whether ``position`` (e.g. from a checkpoint) points inside the current log."""
+        index, offset = position
+        if index == 0 and offset == 0:
+            return True
+        seg = self._segment_path(index)
+        return seg.exists() and seg.stat().st_size >= offset
+
+    def end_position(self) -> LogPosition:
+        """Position just after the last byte currently in the log; cheap enough to poll."""
+        segs = self.segments()
+        if not segs:
+            return (0, 0)
+        return (self._index_of(segs[-1]), segs[-1].stat().st_size)
+
+    def expired(self, before: datetime) -> LogPosition | None:
+        """Start of the first segment holding a reading timestamped at or after ``before``.
+
+        Everything before the returned position is old enough to compact; None when even
+        the first segment is not. Only whole segments expire. The active segment is sealed
+        (appends move on to a new one) when all of it has expired, so a quiet deployment
+        does not have to fill a whole segment first.
+        """
+        cutoff = epoch_us(before)
+        segs = self.segments()
+        end: LogPosition | None = None
+        for i, seg in enumerate(segs):
+            size = seg.stat().st_size
+            if size == 0 or not self._all_before(seg, size, cutoff):
+                break
+            if i + 1 < len(segs):
+                end = (self._index_of(segs[i + 1]), 0)
+            elif self._seal(seg, size):
+                end = (self._index_of(seg) + 1, 0)
+        return end
+
+    @staticmethod
+    def _all_before(seg: Path, size: int, cutoff: int | None) -> bool:
+        with open(seg, "rb") as fh:
+            for raw in io.BufferedReader(_BoundedReader(fh, size)):
+                if not raw.strip():
+                    continue
+                try:
+                    ts = epoch_us(json.loads(raw).get("timestamp"))
+                except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+                    continue
+                if ts is not None and cutoff is not None and ts >= cutoff:
+                    return False
+        return True
+
+    def _seal(self, seg: Path, size: int) -> bool:
+        """Start a new active segment if ``seg`` is still the last one and has not grown."""
+        with self._lock, self._writer_lock():
+            segs = self.segments()
+            if not segs or segs[-1] != seg or seg.stat().st_size != size:
+                return False
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+            self._segment_path(self._index_of(seg) + 1).touch()
+            return True
+
+    def truncate(self, position: LogPosition) -> None:
+        """Delete the segments before ``position``, which must be a segment start from ``expired``."""
+        index, offset = position
+        if offset != 0:
+            raise ValueError(f"segment log can only be truncated at a segment start, not {position}")
+        with self._lock, self._writer_lock():
+            removed = [seg for seg in self.segments() if self._index_of(seg) < index]
+            for seg in removed:
+                seg.unlink()
+        if removed:
+            log.info("Truncated %d segments before %s from %s", len(removed), position, self.log_dir)
+
+    def iter_all(self) -> Iterator[dict[str, Any]]:
+        for item, _ in self.scan():
+            yield item
+
+    def load_all(self) -> list[dict[str, Any]]:
+        return list(self.iter_all())
+
+    def query(
+        self,
+        sensor_id: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> Iterator[tuple[dict[str, Any], LogPosition]]:
+        """``(record, position)`` of one sensor in ``start..end``, oldest first (a full scan, see ``query_ranges``)."""
+        for _, hits in self.query_ranges([(sensor_id, start, end)]):
+            yield from hits
+
+    def query_ranges(
+        self, ranges: Iterable[SensorRange]
+    ) -> Iterator[tuple[str, Iterator[tuple[dict[str, Any], LogPosition]]]]:
+        """Per ``(sensor_id, start, end)`` in the given order, its ``(record, position)`` pairs by timestamp.
+
+        The log has no index, so this scans it once for all the ranges together. Only the
+        location of each match is kept (timestamp, segment and byte range), never the
+        record: the records are read back one at a time as the per-sensor iterators are
+        consumed. Segments truncated away in the meantime are skipped.
+        """
+        ranges = list(ranges)
+        wanted = {sid: (i, epoch_us(lo), epoch_us(hi)) for i, (sid, lo, hi) in enumerate(ranges)}
+        # (range, timestamp, segment, end offset, length) of every match, 40 bytes each
+        cols = [array("q") for _ in range(5)]
+        if wanted:
+            for item, (index, offset), length in self._records():
+                hit = wanted.get(item.get("sensor_id"))
+                if hit is None:
+                    continue
+                i, lo, hi = hit
+                ts = epoch_us(item.get("timestamp"))
+                if ts is None or (lo is not None and ts < lo) or (hi is not None and ts > hi):
+                    continue
+                for col, v in zip(cols, (i, ts, index, offset, length)):
+                    col.append(v)
+        rng, ts, seg, end, length = (np.frombuffer(c, dtype=np.int64) if len(c) else np.empty(0, np.int64) for c in cols)
+        order = np.lexsort((end, seg, ts, rng))
+        rng, seg, end, length = rng[order], seg[order], end[order], length[order]
+        bounds = np.searchsorted(rng, np.arange(len(ranges) + 1), side="left")
+        for i, (sid, _, _) in enumerate(ranges):
+            lo, hi = int(bounds[i]), int(bounds[i + 1])
+            yield sid, self._read_spans(seg[lo:hi], end[lo:hi], length[lo:hi])
+
+    def _read_spans(
+        self, segments: np.ndarray, ends: np.ndarray, lengths: np.ndarray
+    ) -> Iterator[tuple[dict[str, Any], LogPosition]]:
+        """The records whose lines end at ``(segment, offset)`` with the given lengths, read back in order."""
+        fh: IO[bytes] | None = None
+        open_index = -1
+        try:
+            for index, offset, length in zip(segments.tolist(), ends.tolist(), lengths.tolist()):
+                if index != open_index:
+                    if fh is not None:
+                        fh.close()
+                        fh = None
+                    open_index = index
+                    try:
+                        fh = open(self._segment_path(index), "rb")
+                    except FileNotFoundError:  # truncated by compaction since the scan
+                        continue
+                if fh is None:
+                    continue
+                fh.seek(offset - length)
+                yield json.loads(fh.read(length)), (index, offset)
+        finally:
+            if fh is not None:
+                fh.close()
+
+    def append(self, item: dict[str, Any]) -> None:
+        line = json.dumps(item, separators=(",", ":")) + "\n"
+        with self._lock, self._writer_lock():
+            fh = self._open_active()
+            fh.write(line)
+            fh.flush()
+            self._active_size += len(line.encode("utf-8"))
+
+    def append_many(self, items: list[dict[str, Any]]) -> None:
+        """Group commit: every item is written with one write and one flush."""
+        if not items:
+            return
+        payload = "".join(json.dumps(item, separators=(",", ":")) + "\n" for item in items)
+        with self._lock, self._writer_lock():
+            fh = self._open_active()
+            fh.write(payload)
+            fh.flush()
+            self._active_size += len(payload.encode("utf-8"))
+
+    def sync(self) -> None:
+        """fsync the active segment so everything appended so far survives a power loss."""
+        with self._lock:
+            if self._fh is not None:
+                os.fsync(self._fh.fileno())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+            if self._lock_fh is not None:
+                self._lock_fh.close()
+                self._lock_fh = None
+
+
+class SqliteReadingStorage:
+    """Readings in an embedded SQLite database in WAL mode, indexed by (sensor_id, timestamp).
+
+    Each record is kept verbatim as JSON next to its ``sensor_id`` and its timestamp in
+    epoch microseconds (UTC), so ``query`` is an index range scan. Batches are inserted
+    in one transaction, and the statements are fixed strings so ``sqlite3`` reuses the
+    prepared statements from its per-connection cache. Positions are ``(0, rowid)``.
+
+    SQLite's own locking makes it safe for several worker processes to write to one
+    database. When the database is created it imports existing readings, taken from
+    ``legacy_log_dir`` (a ``SegmentedReadingStorage`` directory) if it exists and
+    otherwise from the ``legacy_path`` JSON array file. Neither source is modified.
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS readings ("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " sensor_id TEXT NOT NULL,"
+        " ts INTEGER,"
+        " record TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS readings_sensor_ts ON readings (sensor_id, ts)",
+        "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    )
+    _INSERT = "INSERT INTO readings (sensor_id, ts, record) VALUES (?, ?, ?)"
+    _SCAN = "SELECT id, record FROM readings WHERE id > ? AND id <= ? ORDER BY id"
+    _LAST_ID = "SELECT seq FROM sqlite_sequence WHERE name = 'readings'"
+    _TRUNCATED = "SELECT value FROM meta WHERE key = 'truncated_through'"
+    _RANGE = "SELECT id, record FROM readings WHERE sensor_id = ? AND ts >= ? AND ts <= ? ORDER BY ts, id"
+    _FETCH_ROWS = 1000
+
+    def __init__(
+        self,
+        db_path: str | Path,
+        legacy_path: str | Path | None = None,
+        legacy_log_dir: str | Path | None = None,
+        shared: bool = False,
+        busy_timeout_seconds: float = 30.0,
+    ):
+        self.db_path = Path(db_path)
+        self.legacy_path = Path(legacy_path) if legacy_path is not None else None
+        self.legacy_log_dir = Path(legacy_log_dir) if legacy_log_dir is not None else None
+        self.shared = shared
+        self._timeout = float(busy_timeout_seconds)
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn: sqlite3.Connection | None = self._connect()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            for stmt in self._SCHEMA:
+                self._conn.execute(stmt)
+            # BEGIN IMMEDIATE: only one process gets to migrate into an empty database
+            self._conn.execute("BEGIN IMMEDIATE")
+            if self._conn.execute("SELECT 1 FROM readings LIMIT 1").fetchone() is None:
+                self._migrate_legacy()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=self._timeout, check_same_thread=False)
+
+    def _migrate_legacy(self) -> None:
+        if self.legacy_log_dir is not None and self.legacy_log_dir.exists():
+            source: Any = self.legacy_log_dir
+            items: Iterable[dict[str, Any]] = SegmentedReadingStorage(self.legacy_log_dir).iter_all()
+        elif self.legacy_path is not None and self.legacy_path.exists():
+            source = self.legacy_path
+            items = JsonReadingStorage(self.legacy_path).load_all()
+        else:
+            return
+        cur = self._conn.executemany(self._INSERT, (self._row(item) for item in items))
+        if cur.rowcount:
+            log.info("Migrated %d readings from %s into %s", cur.rowcount, source, self.db_path)
+
+    @staticmethod
+    def _row(item: dict[str, Any]) -> tuple[str, int | None, str]:
+        return str(item.get("sensor_id", "")), epoch_us(item.get("timestamp")), json.dumps(item, separators=(",", ":"))
+
+    def scan(
+        self, position: LogPosition = (0, 0), end: LogPosition | None = None
+    ) -> Iterator[tuple[dict[str, Any], LogPosition]]:
+        conn = self._connect()
+        try:
+            cur = conn.execute(self._SCAN, (position[1], end[1] if end is not None else 2**63 - 1))
+            while rows := cur.fetchmany(self._FETCH_ROWS):
+                for rowid, record in rows:
+                    yield json.loads(record), (0, rowid)
+        finally:
+            conn.close()
+
+    def contains(self, position: LogPosition) -> bool:
+        index, rowid = position
+        with self._lock:
+            row = self._conn.execute(self._TRUNCATED).fetchone()
+        return index == 0 and (row[0] if row else 0) <= rowid <= self.end_position()[1]
+
+    def end_position(self) -> LogPosition:
+        """``(0, last rowid ever assigned)``; AUTOINCREMENT never hands out a rowid twice, even after ``truncate``."""
+        with self._lock:
+            row = self._conn.execute(self._LAST_ID).fetchone()
+        return (0, int(row[0]) if row else 0)
+
+    def expired(self, before: datetime) -> LogPosition | None:
+        """Position after the last reading that precedes (in insert order) every reading at or after ``before``.
+
+        The prefix up to it holds only older readings (or ones without a timestamp); None
+        when the oldest reading is not old enough.
+        """
+        with self._lock:
+            young = self._conn.execute("SELECT MIN(id) FROM readings WHERE ts >= ?", (epoch_us(before),)).fetchone()[0]
+            if young is None:
+                last = self._conn.execute("SELECT MAX(id) FROM readings").fetchone()[0]
+            else:
+                last = self._conn.execute("SELECT MAX(id) FROM readings WHERE id < ?", (young,)).fetchone()[0]
+        return (0, int(last)) if last is not None else None
+
+    def truncate(self, position: LogPosition) -> None:
+        """Delete every reading up to ``position``; the freed pages are reused by later inserts."""
+        with self._lock, self._conn:
+            cur = self._conn.execute("DELETE FROM readings WHERE id <= ?", (position[1],))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('truncated_through', ?)", (position[1],)
+            )
+        if cur.rowcount:
+            log.info("Truncated %d readings up to %s from %s", cur.rowcount, position, self.db_path)
+
+    def iter_all(self) -> Iterator[dict[str, Any]]:
+        for item, _ in self.scan():
+            yield item
+
+    def load_all(self) -> list[dict[str, Any]]:
+        return list(self.iter_all())
+
+    def query(
+        self,
+        sensor_id: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> Iterator[tuple[dict[str, Any], LogPosition]]:
+        """``(record, position)`` of one sensor in ``start..end`` (inclusive), oldest first, via the index."""
+        lo = epoch_us(start) if start is not None else -(2**63)
+        hi = epoch_us(end) if end is not None else 2**63 - 1
+        conn = self._connect()
+        try:
+            cur = conn.execute(self._RANGE, (sensor_id, lo, hi))
+            while rows := cur.fetchmany(self._FETCH_ROWS):
+                for rowid, record in rows:
+                    yield json.loads(record), (0, rowid)
+        finally:
+            conn.close()
+
+    def query_ranges(
+        self, ranges: Iterable[SensorRange]
+    ) -> Iterator[tuple[str, Iterator[tuple[dict[str, Any], LogPosition]]]]:
+        """Per ``(sensor_id, start, end)`` in the given order, its ``(record, position)`` pairs; one index range scan each."""
+        for sid, lo, hi in ranges:
+            yield sid, self.query(sid, lo, hi)
+
+    def append(self, item: dict[str, Any]) -> None:
+        self.append_many([item])
+
+    def append_many(self, items: list[dict[str, Any]]) -> None:
+        """Insert every item in a single transaction."""
+        if not items:
+            return
+        rows = [self._row(item) for item in items]
+        with self._lock, self._conn:
+            self._conn.executemany(self._INSERT, rows)
+
+    def sync(self) -> None:
+        """Checkpoint the WAL into the database file, fsyncing both."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.execute("PRAGMA wal_checkpoint(FULL)")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class _BoundedReader(io.RawIOBase):
+    """The first ``limit`` bytes of a binary file, so a growing file is read up to a fixed size."""
+
+    def __init__(self, fh: IO[bytes], limit: int):
+        self._fh = fh
+        self._left = limit
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b: Any) -> int:
+        n = min(len(b), self._left)
+        if n <= 0:
+            return 0
+        got = self._fh.readinto(memoryview(b)[:n]) or 0
+        self._left -= got
+        return got
+
+
 class HistoricalCsvRepository:
     def __init__(self, csv_path: str | Path):
         self.path = Path(csv_path)
 
     def load(self) -> pd.DataFrame:
         return pd.read_csv(self.path)
+
+    def iter_chunks(self, chunk_rows: int, end: int | None = None) -> Iterator[pd.DataFrame]:
+        """Parse the file in chunks of ``chunk_rows``; with ``end``, only its first ``end`` bytes."""
+        if end is None:
+            with pd.read_csv(self.path, chunksize=chunk_rows) as reader:
+                yield from reader
+            return
+        with open(self.path, "rb") as fh, pd.read_csv(
+            io.BufferedReader(_BoundedReader(fh, end)), chunksize=chunk_rows
+        ) as reader:
+            yield from reader
+
+    def header(self) -> list[str]:
+        with open(self.path, "r", encoding="utf-8", newline="") as fh:
+            return next(csv.reader(fh), [])
+
+    def read_appended(self, start: int, end: int) -> tuple[pd.DataFrame, int]:
+        """Rows in bytes ``start``..``end`` that were appended after an earlier read up to ``start``.
+
+        Only complete lines count: bytes after the last newline may be a row still being
+        written, so they are left for the next call. Returns the rows (with the header's
+        column names) and the offset to resume from.
+        """
+        with open(self.path, "rb") as fh:
+            fh.seek(start)
+            data = fh.read(max(0, end - start))
+        cut = data.rfind(b"\n") + 1
+        if cut == 0:
+            return pd.DataFrame(columns=self.header()), start
+        frame = pd.read_csv(io.BytesIO(data[:cut]), header=None, names=self.header(), skip_blank_lines=True)
+        return frame, start + cut
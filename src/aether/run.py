@@ -11,7 +11,8 @@ def main() -> None:
     data = json.loads(Path(cfg).read_text(encoding="utf-8"))
     host = data.get("host", "0.0.0.0")
     port = int(data.get("port", 8000))
-    uvicorn.run("aether.main:app", host=host, port=port, reload=False)
+    workers = max(1, int(data.get("workers", 1)))
+    uvicorn.run("aether.main:app", host=host, port=port, reload=False, workers=workers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from typing import Mapping
+
+import numpy as np
+import pandas as pd
+
+CATEGORY_LABELS = ("Safe", "Moderate", "Unhealthy", "Dangerous", "No data")
+NO_DATA = CATEGORY_LABELS.index("No data")
+THRESHOLD_LEVELS = ("safe", "moderate", "danger")
+
+
+class CategoryEngine:
+    """Air-quality categorization compiled from ``ServerConfig.thresholds``.
+
+    Every pollutant with ``<pol>_safe``, ``<pol>_moderate`` and ``<pol>_danger`` thresholds
+    gets a sorted array of bin edges; a whole column is then classified with a single
+    ``np.searchsorted`` into int8 codes indexing ``CATEGORY_LABELS``. Upper edges are
+    inclusive, matching the original ``<= safe`` / ``<= moderate`` / ``<= danger`` bands.
+    """
+
+    def __init__(self, thresholds: Mapping[str, float]):
+        edges: dict[str, np.ndarray] = {}
+        pollutants = {k.rsplit("_", 1)[0] for k in thresholds if "_" in k}
+        for pol in sorted(pollutants):
+            keys = [f"{pol}_{level}" for level in THRESHOLD_LEVELS]
+            if not all(k in thresholds for k in keys):
+                continue
+            e = np.array([float(thresholds[k]) for k in keys], dtype=np.float64)
+            if np.any(np.diff(e) <= 0):
+                raise ValueError(f"thresholds for '{pol}' must be strictly increasing: {e.tolist()}")
+            edges[pol] = e
+        self._edges = edges
+
+    @property
+    def pollutants(self) -> list[str]:
+        return list(self._edges)
+
+    def codes(self, pollutant: str, values) -> np.ndarray:
+        """int8 codes into ``CATEGORY_LABELS``; NaN/None become ``NO_DATA``."""
+        s = values if isinstance(values, pd.Series) else pd.Series(values)
+        if not pd.api.types.is_numeric_dtype(s.dtype) or pd.api.types.is_bool_dtype(s.dtype):
+            s = pd.to_numeric(s, errors="coerce")
+        arr = s.to_numpy(dtype=np.float64, na_value=np.nan)
+        codes = np.searchsorted(self._edges[pollutant], arr, side="left").astype(np.int8)
+        codes[np.isnan(arr)] = NO_DATA
+        return codes
+
+    def code(self, pollutant: str, value: float | None) -> int:
+        """Scalar ``codes`` for a single ingested value."""
+        if value is None or value != value:
+            return NO_DATA
+        return int(np.searchsorted(self._edges[pollutant], float(value), side="left"))
+
+    @staticmethod
+    def to_categorical(codes: np.ndarray, index: pd.Index | None = None) -> pd.Series:
+        return pd.Series(pd.Categorical.from_codes(codes, categories=list(CATEGORY_LABELS)), index=index)
+
+    def categorize(self, pollutant: str, values: pd.Series) -> pd.Series:
+        return self.to_categorical(self.codes(pollutant, values), index=values.index)
+
+    def worst(self, frame: pd.DataFrame) -> pd.Series:
+        """Per-row worst category over every configured pollutant present in ``frame``.
+
+        Rows where no pollutant has a value are ``No data``.
+        """
+        cols = [p for p in self._edges if p in frame.columns]
+        worst = np.full(len(frame), -1, dtype=np.int8)
+        for pol in cols:
+            c = self.codes(pol, frame[pol])
+            np.maximum(worst, np.where(c == NO_DATA, -1, c).astype(np.int8), out=worst)
+        worst[worst < 0] = NO_DATA
+        return self.to_categorical(worst, index=frame.index)
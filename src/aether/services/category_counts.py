@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import threading
+from datetime import datetime
+from typing import Mapping
+
+import numpy as np
+import pandas as pd
+
+from aether.services.categorization import CATEGORY_LABELS, CategoryEngine
+from aether.services.conversions import naive_utc
+from aether.services.historical_index import month_key
+
+
+class CategoryCountTable:
+    """Reading counts per (year, month, province, category) for one pollutant.
+
+    Each month holds a small ``provinces x categories`` int64 matrix. The startup table is
+    built with a single ``np.bincount`` over the historical frame; every ingested reading
+    then increments one cell, and any month, year or run of months is answered by summing
+    those matrices without touching raw rows.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        provinces: Mapping[str, str],
+        engine: CategoryEngine,
+        pollutant: str = "pm25",
+    ):
+        self._engine = engine
+        self._pollutant = pollutant
+        self._province_of = dict(provinces)
+        self._provinces: list[str] = sorted(set(self._province_of.values()) | {"Unknown"})
+        self._province_pos = {p: i for i, p in enumerate(self._provinces)}
+        self._months: dict[int, np.ndarray] = {}
+        self._lock = threading.Lock()
+        if df.empty or pollutant not in df.columns:
+            return
+
+        n_cat = len(CATEGORY_LABELS)
+        n_prov = len(self._provinces)
+        sensor_pos = {sid: self._province_pos[p] for sid, p in self._province_of.items()}
+        prov = df["sensor_id"].astype(str).map(sensor_pos).fillna(self._province_pos["Unknown"]).to_numpy(dtype=np.int64)
+        cat = engine.codes(pollutant, df[pollutant]).astype(np.int64)
+        ts = pd.Series(df["timestamp"].to_numpy(dtype="datetime64[ns]"))
+        mk = ts.dt.year.to_numpy(dtype=np.int64) * 12 + ts.dt.month.to_numpy(dtype=np.int64) - 1
+
+        base = int(mk.min())
+        span = int(mk.max()) - base + 1
+        flat = ((mk - base) * n_prov + prov) * n_cat + cat
+        counts = np.bincount(flat, minlength=span * n_prov * n_cat).reshape(span, n_prov, n_cat)
+        for offset in np.flatnonzero(counts.sum(axis=(1, 2))):
+            self._months[base + int(offset)] = counts[offset].copy()
+
+    def _province_index(self, province: str) -> int:
+        pos = self._province_pos.get(province)
+        if pos is None:
+            pos = len(self._provinces)
+            self._provinces.append(province)
+            self._province_pos[province] = pos
+            for k, m in self._months.items():
+                self._months[k] = np.vstack([m, np.zeros((1, m.shape[1]), dtype=np.int64)])
+        return pos
+
+    def set_provinces(self, provinces: Mapping[str, str]) -> None:
+        """Use a new sensor -> province map for readings added from now on."""
+        with self._lock:
+            self._province_of = dict(provinces)
+
+    def add(self, sensor_id: str, timestamp: datetime, value: float | None) -> None:
+        timestamp = naive_utc(timestamp)
+        self.add_count(sensor_id, month_key(timestamp.year, timestamp.month), self._engine.code(self._pollutant, value))
+
+    def add_many(self, sensor_ids: list[str], timestamps: np.ndarray, values: np.ndarray) -> None:
+        """Vectorized ``add`` for naive-UTC datetime64[ns] ``timestamps``: one bincount per month touched."""
+        if len(sensor_ids) == 0:
+            return
+        ts = pd.Series(np.asarray(timestamps, dtype="datetime64[ns]"))
+        mk = ts.dt.year.to_numpy(dtype=np.int64) * 12 + ts.dt.month.to_numpy(dtype=np.int64) - 1
+        cat = self._engine.codes(self._pollutant, values).astype(np.int64)
+        n_cat = len(CATEGORY_LABELS)
+        with self._lock:
+            prov = np.array(
+                [self._province_index(self._province_of.get(sid, "Unknown")) for sid in sensor_ids], dtype=np.int64
+            )
+            n_prov = len(self._provinces)
+            for key in np.unique(mk).tolist():
+                sel = mk == key
+                counts = np.bincount(prov[sel] * n_cat + cat[sel], minlength=n_prov * n_cat).reshape(n_prov, n_cat)
+                m = self._months.get(key)
+                if m is None:
+                    self._months[key] = counts
+                else:
+                    m += counts
+
+    def add_count(self, sensor_id: str, key: int, category: int, n: int = 1) -> None:
+        with self._lock:
+            prov = self._province_index(self._province_of.get(sensor_id, "Unknown"))
+            m = self._months.get(key)
+            if m is None:
+                m = self._months[key] = np.zeros((len(self._provinces), len(CATEGORY_LABELS)), dtype=np.int64)
+            m[prov, category] += n
+
+    def absorb(self, other: "CategoryCountTable") -> None:
+        """Add every count of ``other`` to this table, matching provinces by name."""
+        with other._lock:
+            months = {k: m.copy() for k, m in other._months.items()}
+            provinces = list(other._provinces)
+        with self._lock:
+            rows = [self._province_index(p) for p in provinces]
+            n_prov = len(self._provinces)
+            for key, m in months.items():
+                target = self._months.get(key)
+                if target is None:
+                    target = self._months[key] = np.zeros((n_prov, len(CATEGORY_LABELS)), dtype=np.int64)
+                target[rows] += m
+
+    def counts(self, start: tuple[int, int], end: tuple[int, int]) -> pd.DataFrame:
+        """``province``/``category``/``count`` rows summed over months ``start``..``end`` inclusive."""
+        lo, hi = month_key(*start), month_key(*end)
+        with self._lock:
+            total = np.zeros((len(self._provinces), len(CATEGORY_LABELS)), dtype=np.int64)
+            for k, m in self._months.items():
+                if lo <= k <= hi:
+                    total += m
+            provinces = list(self._provinces)
+        p_idx, c_idx = np.nonzero(total)
+        return pd.DataFrame(
+            {
+                "province": [provinces[i] for i in p_idx],
+                "category": [CATEGORY_LABELS[j] for j in c_idx],
+                "count": total[p_idx, c_idx],
+            }
+        )
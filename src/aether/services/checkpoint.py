@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+
+from aether.persistence.storage import LogPosition, ReadingStorage
+from aether.services.categorization import CategoryEngine
+from aether.services.conversions import as_float, naive_utc
+from aether.services.historical_index import month_key
+from aether.services.rollups import bucket_of
+
+log = logging.getLogger(__name__)
+
+CHECKPOINT_FORMAT_VERSION = 3
+
+
+def _fmin(a: float, b: float) -> float:
+    """``min`` ignoring NaN, like ``np.fmin``."""
+    return b if a != a or b < a else a
+
+
+def _fmax(a: float, b: float) -> float:
+    return b if a != a or b > a else a
+
+
+@dataclass
+class LiveState:
+    """Everything the service derives from the readings log, folded up to ``position``.
+
+    ``latest`` is the last reading per sensor in log order and ``newest`` its greatest
+    timestamp; ``hourly`` holds the per-sensor hourly count/valid/sum/min/max cells behind the
+    rollups and ``categories`` the per-sensor monthly PM2.5 category counts behind
+    ``/distribution``. All of it is small compared to the log, but only ``latest`` and
+    ``newest`` are bounded by the fleet; the cells grow with the hours covered, so the
+    ones changed since the last save are tracked in ``dirty_hourly``/``dirty_categories``
+    for ``CheckpointStore`` to write incrementally.
+
+    ``base`` is where the fold started: the position compaction last truncated the log
+    through. A state with another base covers readings that have since moved to (or not
+    yet reached) the compacted partitions, so it must not be restored.
+    """
+
+    pollutants: list[str]
+    position: LogPosition = (0, 0)
+    base: LogPosition = (0, 0)
+    total_readings: int = 0
+    latest: dict[str, tuple[dict[str, Any], datetime]] = field(default_factory=dict)
+    newest: dict[str, datetime] = field(default_factory=dict)
+    hourly: dict[tuple[str, int], list[Any]] = field(default_factory=dict)
+    categories: dict[tuple[str, int, int], int] = field(default_factory=dict)
+    dirty_hourly: set[tuple[str, int]] = field(default_factory=set, repr=False)
+    dirty_categories: set[tuple[str, int, int]] = field(default_factory=set, repr=False)
+
+    def apply(self, item: dict[str, Any], engine: CategoryEngine) -> None:
+        self.total_readings += 1
+        sid = item.get("sensor_id")
+        ts = item.get("timestamp")
+        if not sid or not ts:
+            return
+        try:
+            dttm = naive_utc(datetime.fromisoformat(ts))
+        except (TypeError, ValueError):
+            return
+        readings = item.get("readings") or {}
+        self.latest[sid] = (readings, dttm)
+        newest = self.newest.get(sid)
+        if newest is None or dttm > newest:
+            self.newest[sid] = dttm
+
+        values = [as_float(readings.get(p)) for p in self.pollutants]
+        valid = [int(v == v) for v in values]
+        sums = [v if v == v else 0.0 for v in values]
+        hour = int(bucket_of(dttm, "hour").astype(np.int64))
+        cell = self.hourly.get((sid, hour))
+        if cell is None:
+            self.hourly[(sid, hour)] = [1, valid, sums, list(values), list(values)]
+        else:
+            cell[0] += 1
+            cell[1] = [a + b for a, b in zip(cell[1], valid)]
+            cell[2] = [a + b for a, b in zip(cell[2], sums)]
+            cell[3] = [_fmin(a, b) for a, b in zip(cell[3], values)]
+            cell[4] = [_fmax(a, b) for a, b in zip(cell[4], values)]
+        self.dirty_hourly.add((sid, hour))
+
+        cat_key = (sid, month_key(dttm.year, dttm.month), engine.code("pm25", readings.get("pm25")))
+        self.categories[cat_key] = self.categories.get(cat_key, 0) + 1
+        self.dirty_categories.add(cat_key)
+
+    def cell_rows(
+        self,
+        hourly: Iterable[tuple[str, int]] | None = None,
+        categories: Iterable[tuple[str, int, int]] | None = None,
+    ) -> Iterator[list[Any]]:
+        """Cells-file rows for the given hourly and category cells, or for all of them."""
+        for key in self.hourly if hourly is None else hourly:
+            yield ["h", *key, *self.hourly[key]]
+        for key in self.categories if categories is None else categories:
+            yield ["c", *key, self.categories[key]]
+
+    def restore_cell(self, row: list[Any]) -> None:
+        if row[0] == "h":
+            _, sid, hour, c, valid, sums, mins, maxs = row
+            self.hourly[(sid, int(hour))] = [int(c), [int(n) for n in valid], sums, mins, maxs]
+        elif row[0] == "c":
+            _, sid, mk, cat, n = row
+            self.categories[(sid, int(mk), int(cat))] = int(n)
+        else:
+            raise ValueError(f"unknown checkpoint cell {row[0]!r}")
+
+    def clear_dirty(self) -> None:
+        self.dirty_hourly.clear()
+        self.dirty_categories.clear()
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "pollutants": self.pollutants,
+            "position": list(self.position),
+            "base": list(self.base),
+            "total_readings": self.total_readings,
+            "latest": {sid: [r, ts.isoformat()] for sid, (r, ts) in self.latest.items()},
+            "newest": {sid: ts.isoformat() for sid, ts in self.newest.items()},
+        }
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any]) -> "LiveState":
+        return cls(
+            pollutants=list(data["pollutants"]),
+            position=(int(data["position"][0]), int(data["position"][1])),
+            base=(int(data.get("base", [0, 0])[0]), int(data.get("base", [0, 0])[1])),
+            total_readings=int(data["total_readings"]),
+            latest={sid: (r, naive_utc(datetime.fromisoformat(ts))) for sid, (r, ts) in data["latest"].items()},
+            newest={sid: naive_utc(datetime.fromisoformat(ts)) for sid, ts in data["newest"].items()},
+        )
+
+
+class CheckpointStore:
+    """A small JSON checkpoint, replaced atomically on every save, plus a cells file.
+
+    The JSON holds the part of ``LiveState`` bounded by the fleet (positions, totals, the
+    latest reading per sensor). The hourly and category cells go to
+    ``<checkpoint>.<token>.cells`` as JSON lines: a save appends only the cells changed
+    since the previous one, the last line of a cell wins, and the JSON records how many
+    bytes of the file it covers, so a torn append is cut off by the next save. The file
+    is rewritten with just the live cells on the first save of a process, after a rebase,
+    and once superseded lines outnumber the live cells by ``CELLS_SLACK_LINES``.
+
+    Each process appends to its own cells file (workers sharing the storage each run a
+    checkpointer). Files that are no longer current are removed after the next rewrite;
+    a JSON whose cells file is gone or does not start with its token is ignored.
+    """
+
+    CELLS_SLACK_LINES = 4096
+
+    def __init__(self, path: str | Path, fingerprint: dict[str, Any]):
+        self.path = Path(path)
+        self._fingerprint = fingerprint
+        self._cells_path: Path | None = None
+        self._cells_token = ""
+        self._cells_offset = 0
+        self._cells_lines = 0
+        self._stale: list[Path] = []
+
+    def load(self) -> LiveState | None:
+        self._stale = sorted(self.path.parent.glob(f"{self.path.name}.*.cells"))
+        if not self.path.exists():
+            return None
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") != CHECKPOINT_FORMAT_VERSION or data.get("fingerprint") != self._fingerprint:
+                log.info("Ignoring checkpoint %s written for a different configuration", self.path)
+                return None
+            state = LiveState.from_json(data["state"])
+            cells = data["cells"]
+            self._read_cells(self.path.with_name(cells["file"]), cells["token"], int(cells["offset"]), state)
+            return state
+        except (OSError, ValueError, KeyError, TypeError):
+            log.warning("Ignoring unreadable checkpoint %s", self.path)
+            return None
+
+    @staticmethod
+    def _read_cells(path: Path, token: str, offset: int, state: LiveState) -> None:
+        with open(path, "rb") as fh:
+            data = fh.read(offset)
+        if len(data) != offset:
+            raise ValueError(f"{path} is shorter than its checkpoint")
+        lines = data.splitlines()
+        if not lines or json.loads(lines[0]) != {"token": token}:
+            raise ValueError(f"{path} belongs to another checkpoint")
+        for line in lines[1:]:
+            state.restore_cell(json.loads(line))
+
+    def save(self, state: LiveState, rewrite: bool = False) -> None:
+        """Write the changed cells, then the JSON; ``rewrite`` starts a new cells file."""
+        live = len(state.hourly) + len(state.categories)
+        rewrite = rewrite or self._cells_path is None or self._cells_lines > live + self.CELLS_SLACK_LINES
+        if not rewrite:
+            try:
+                self._append_cells(state.cell_rows(state.dirty_hourly, state.dirty_categories))
+            except FileNotFoundError:  # removed by another worker's cleanup
+                rewrite = True
+        if rewrite:
+            self._rewrite_cells(state)
+
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        payload = {
+            "version": CHECKPOINT_FORMAT_VERSION,
+            "fingerprint": self._fingerprint,
+            "state": state.to_json(),
+            "cells": {"file": self._cells_path.name, "token": self._cells_token, "offset": self._cells_offset},
+        }
+        tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+        state.clear_dirty()
+
+        if rewrite:
+            for path in self._stale:
+                if path != self._cells_path:
+                    path.unlink(missing_ok=True)
+            self._stale = []
+
+    @staticmethod
+    def _encode(rows: Iterable[list[Any]]) -> tuple[bytes, int]:
+        lines = [json.dumps(row, separators=(",", ":")) for row in rows]
+        return "".join(f"{line}\n" for line in lines).encode("utf-8"), len(lines)
+
+    def _append_cells(self, rows: Iterable[list[Any]]) -> None:
+        data, n = self._encode(rows)
+        with open(self._cells_path, "r+b") as fh:
+            fh.seek(self._cells_offset)
+            fh.truncate()
+            fh.write(data)
+            offset = fh.tell()
+        self._cells_offset = offset
+        self._cells_lines += n
+
+    def _rewrite_cells(self, state: LiveState) -> None:
+        token = f"{os.getpid()}-{secrets.token_hex(4)}"
+        path = self.path.with_name(f"{self.path.name}.{token}.cells")
+        data, n = self._encode(state.cell_rows())
+        with open(path, "wb") as fh:
+            fh.write(json.dumps({"token": token}).encode("utf-8") + b"\n")
+            fh.write(data)
+            offset = fh.tell()
+        if self._cells_path is not None:
+            self._stale.append(self._cells_path)
+        self._cells_path, self._cells_token, self._cells_offset, self._cells_lines = path, token, offset, n
+
+
+class Checkpointer:
+    """Background thread that folds the log tail into its own ``LiveState`` and saves it.
+
+    The state is rebuilt from what is actually on disk, never from the in-memory sensor
+    state, so a checkpoint can never claim readings that are still in the write-behind
+    queue.
+    """
+
+    def __init__(
+        self,
+        storage: ReadingStorage,
+        store: CheckpointStore,
+        state: LiveState,
+        engine: CategoryEngine,
+        interval_seconds: float = 300.0,
+        min_new_readings: int = 1,
+        unsaved: int = 0,
+    ):
+        self._storage = storage
+        self._store = store
+        self._state = state
+        self._engine = engine
+        self._interval = float(interval_seconds)
+        self._min_new = max(1, int(min_new_readings))
+        self._unsaved = int(unsaved)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="aether-checkpointer", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def checkpoint(self, force: bool = False) -> int:
+        """Fold the unread tail of the log; save once ``min_new_readings`` are unsaved, or on ``force``."""
+        with self._lock:
+            started = time.perf_counter()
+            folded = 0
+            for item, position in self._storage.scan(self._state.position):
+                self._state.apply(item, self._engine)
+                self._state.position = position
+                folded += 1
+            self._unsaved += folded
+            if self._unsaved >= self._min_new or (force and self._unsaved):
+                self._store.save(self._state)
+                self._unsaved = 0
+                log.info(
+                    "Checkpoint at %s: %d readings total, %d new, %.1f ms",
+                    self._state.position, self._state.total_readings, folded, (time.perf_counter() - started) * 1000,
+                )
+            return folded
+
+    def rebase(self, base: LogPosition) -> None:
+        """Refold the log from ``base`` after compaction moved everything before it, and save.
+
+        The latest reading of a sensor whose readings all moved is carried over, so the map
+        still shows it after a restart.
+        """
+        with self._lock:
+            old = self._state
+            # the latest values to carry over may be in the part not folded yet
+            for item, position in self._storage.scan(old.position, end=base):
+                old.apply(item, self._engine)
+            state = LiveState(pollutants=old.pollutants, position=base, base=base)
+            for item, position in self._storage.scan(base):
+                state.apply(item, self._engine)
+                state.position = position
+            for sid, latest in old.latest.items():
+                if sid not in state.latest:
+                    state.latest[sid] = latest
+                    state.newest[sid] = old.newest[sid]
+            self._state = state
+            self._store.save(state, rewrite=True)
+            self._unsaved = 0
+            log.info("Checkpoint rebased onto %s: %d readings left in the log", base, state.total_readings)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            try:
+                self.checkpoint()
+            except Exception:  # keep checkpointing; the next interval retries from the last saved state
+                log.exception("Checkpoint failed")
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.checkpoint(force=True)
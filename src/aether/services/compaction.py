@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from aether.persistence.partitions import CompactedPartitionStore
+from aether.persistence.storage import ReadingStorage
+from aether.services.data_cleaning import DataCleaner
+from aether.services.metrics import COMPACTED, span
+from aether.services.sensor_manager import SensorManager
+
+log = logging.getLogger(__name__)
+
+RESOLUTIONS = ("raw", "hour")
+
+
+def hourly_means(frame: pd.DataFrame, pollutants: list[str]) -> pd.DataFrame:
+    """One row per sensor and hour holding the mean of each pollutant, stamped with the hour start."""
+    hours = frame.assign(timestamp=frame["timestamp"].dt.floor("h"))
+    means = hours.groupby(["sensor_id", "timestamp"], observed=True, sort=True)[pollutants].mean()
+    return DataCleaner.compact_dtypes(means.reset_index())
+
+
+class Compactor:
+    """Background thread that moves old live readings out of the readings store.
+
+    Every ``interval_seconds``, the longest prefix of the store holding only readings
+    timestamped more than ``max_age_seconds`` ago (``ReadingStorage.expired``) becomes a
+    compacted partition, either as stored (``resolution="raw"``) or as hourly means per
+    sensor (``"hour"``), and the store is truncated there. The steps run in an order a
+    crash cannot break:
+
+    1. the partition is written and the manifest records the truncation position;
+    2. the checkpoint is refolded from that position (``Checkpointer.rebase``);
+    3. the store is truncated and the rows are merged into the in-memory history.
+
+    On startup a truncation recorded in the manifest is (re)applied before the live state
+    is restored, and a checkpoint with a different ``base`` is not used, so a reading is
+    never counted both from the partitions and from the log.
+    """
+
+    def __init__(
+        self,
+        manager: SensorManager,
+        storage: ReadingStorage,
+        partitions: CompactedPartitionStore,
+        backend: str,
+        max_age_seconds: float,
+        resolution: str = "raw",
+        interval_seconds: float = 3600.0,
+    ):
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"compaction resolution must be one of {RESOLUTIONS}, got {resolution!r}")
+        self._manager = manager
+        self._storage = storage
+        self._partitions = partitions
+        self._backend = backend
+        self._max_age = timedelta(seconds=float(max_age_seconds))
+        self._resolution = resolution
+        self._interval = float(interval_seconds)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="aether-compactor", daemon=True)
+
+    @property
+    def manager(self) -> SensorManager:
+        return self._manager
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def compact(self, now: datetime | None = None) -> dict[str, int]:
+        """Run one compaction; returns the readings moved and the partition rows they became."""
+        with self._lock, span("compaction"):
+            started = time.perf_counter()
+            before = (now or datetime.now(timezone.utc).replace(tzinfo=None)) - self._max_age
+            end = self._storage.expired(before)
+            if end is None:
+                return {"readings": 0, "rows": 0}
+            pollutants = list(self._manager.config.pollutants)
+            raw, moved = DataCleaner.stored_readings_frame((item for item, _ in self._storage.scan(end=end)), pollutants)
+            frame = hourly_means(raw, pollutants) if self._resolution == "hour" else raw
+
+            self._partitions.add(frame, end, self._backend, self._resolution)
+            self._manager.rebase_live(end)
+            self._storage.truncate(end)
+            self._manager.absorb_compacted(frame, moved, raw)
+            COMPACTED.inc(moved)
+            log.info(
+                "Compacted %d readings older than %s into %d %s rows in %.1f ms",
+                moved, before.isoformat(), len(frame), self._resolution, (time.perf_counter() - started) * 1000,
+            )
+            return {"readings": moved, "rows": len(frame)}
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            try:
+                self.compact()
+            except Exception:
+                log.exception("Compacting live readings failed")
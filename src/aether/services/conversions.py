@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any
+
+import numpy as np
+
+
+def naive_utc(ts: datetime) -> datetime:
+    """``ts`` as naive UTC, the representation of every stored and indexed timestamp; naive values are taken as UTC."""
+    if ts.tzinfo is not None:
+        return ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def as_float(value: Any) -> float:
+    """A reading value as float; missing or non-numeric values become NaN."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Iterable
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
+
+from aether.services.categorization import CategoryEngine
 
 
 class DataCleaner:
@@ -21,42 +25,219 @@ class DataCleaner:
         return (len(errors) == 0), errors
 
     @staticmethod
-    def clean_historical(df: pd.DataFrame) -> tuple[pd.DataFrame, dict[str, Any]]:
-        before = len(df)
-        df2 = df.copy()
+    def validate_readings_batch(batch: list[Any], pollutants: list[str]) -> list[list[str]]:
+        """Validate many ``readings`` objects at once; returns one error list per item.
+
+        The checks match ``validate_readings`` but run column-wise over a frame of the
+        whole batch, so messages are only built for the rows that actually failed.
+        """
+        n = len(batch)
+        if n == 0:
+            return []
 
-        df2 = df2.dropna(subset=["sensor_id", "timestamp"])
+        is_obj = np.fromiter((isinstance(r, dict) and len(r) > 0 for r in batch), dtype=bool, count=n)
+        frame = pd.DataFrame.from_records([r if isinstance(r, dict) else {} for r in batch], index=range(n))
 
-        pollutant_cols = [c for c in df2.columns if c not in ("sensor_id", "timestamp")]
-        for c in pollutant_cols:
-            df2 = df2[df2[c].notna()]
-            df2 = df2[df2[c] >= 0]
+        missing = np.zeros((n, len(pollutants)), dtype=bool)
+        non_numeric = np.zeros((n, len(pollutants)), dtype=bool)
+        for j, k in enumerate(pollutants):
+            if k not in frame.columns:
+                missing[:, j] = True
+                continue
+            col = frame[k]
+            missing[:, j] = col.isna().to_numpy()
+            if not pd.api.types.is_numeric_dtype(col.dtype) or pd.api.types.is_bool_dtype(col.dtype):
+                numeric = col.map(lambda v: isinstance(v, (int, float)), na_action="ignore")
+                non_numeric[:, j] = ~missing[:, j] & ~numeric.fillna(True).astype(bool).to_numpy()
 
-        if "pm25" in df2.columns:
-            df2 = df2[df2["pm25"] <= 500]
+        errors: list[list[str]] = [[] for _ in range(n)]
+        bad_rows = np.flatnonzero(~is_obj | missing.any(axis=1) | non_numeric.any(axis=1))
+        for i in bad_rows:
+            if not is_obj[i]:
+                errors[i] = ["readings must be a non-empty object"]
+                continue
+            for j, k in enumerate(pollutants):
+                if missing[i, j]:
+                    errors[i].append(f"missing '{k}'")
+                elif non_numeric[i, j]:
+                    errors[i].append(f"'{k}' must be numeric")
+        return errors
+
+    @staticmethod
+    def validate_columns(frame: pd.DataFrame, pollutants: list[str]) -> tuple[pd.DataFrame, dict[int, list[str]]]:
+        """Validate a columnar batch (one column per pollutant) without touching single rows.
 
-        df2["timestamp"] = pd.to_datetime(df2["timestamp"], errors="coerce")
-        df2 = df2.dropna(subset=["timestamp"])
+        Returns every reading column (all but ``sensor_id``/``timestamp``) as float64 with
+        NaN where absent, and the ``validate_readings`` messages of the rows that failed.
+        """
+        n = len(frame)
+        value_cols = [c for c in frame.columns if c not in ("sensor_id", "timestamp")]
+        columns: dict[str, pd.Series] = {}
+        for c in value_cols:
+            col = frame[c]
+            if not pd.api.types.is_numeric_dtype(col.dtype) or pd.api.types.is_bool_dtype(col.dtype):
+                col = pd.to_numeric(col, errors="coerce")
+            columns[c] = col.astype(np.float64)
+        values = pd.DataFrame(columns, index=frame.index)
 
-        after = len(df2)
-        stats = {
+        missing = np.zeros((n, len(pollutants)), dtype=bool)
+        non_numeric = np.zeros((n, len(pollutants)), dtype=bool)
+        for j, k in enumerate(pollutants):
+            if k not in values.columns:
+                missing[:, j] = True
+                continue
+            absent = frame[k].isna().to_numpy()
+            missing[:, j] = absent
+            non_numeric[:, j] = ~absent & np.isnan(values[k].to_numpy())
+
+        errors: dict[int, list[str]] = {}
+        for i in np.flatnonzero(missing.any(axis=1) | non_numeric.any(axis=1)):
+            errors[int(i)] = [
+                f"missing '{k}'" if missing[i, j] else f"'{k}' must be numeric"
+                for j, k in enumerate(pollutants)
+                if missing[i, j] or non_numeric[i, j]
+            ]
+        return values, errors
+
+    CLEANING_RULES = (
+        "missing_id_or_timestamp",
+        "missing_pollutant",
+        "negative_pollutant",
+        "pm25_out_of_range",
+        "invalid_timestamp",
+    )
+
+    @staticmethod
+    def _clean_chunk(df: pd.DataFrame) -> tuple[pd.DataFrame, dict[str, int]]:
+        """Apply every validity rule as one combined mask; each dropped row is counted
+        against the first rule it fails, in ``CLEANING_RULES`` order."""
+        n = len(df)
+        pollutant_cols = [c for c in df.columns if c not in ("sensor_id", "timestamp")]
+        values = df[pollutant_cols]
+
+        failed = np.zeros(n, dtype=bool)
+        counts: dict[str, int] = {}
+
+        def apply(rule: str, bad: np.ndarray) -> None:
+            new = bad & ~failed
+            counts[rule] = int(new.sum())
+            failed[:] |= new
+
+        apply("missing_id_or_timestamp", df[["sensor_id", "timestamp"]].isna().any(axis=1).to_numpy())
+        apply("missing_pollutant", values.isna().any(axis=1).to_numpy())
+        apply("negative_pollutant", (values < 0).any(axis=1).to_numpy())
+        if "pm25" in df.columns:
+            apply("pm25_out_of_range", (df["pm25"] > 500).to_numpy())
+        else:
+            counts["pm25_out_of_range"] = 0
+
+        kept = df[~failed]
+        ts = pd.to_datetime(kept["timestamp"], errors="coerce")
+        bad_ts = ts.isna().to_numpy()
+        counts["invalid_timestamp"] = int(bad_ts.sum())
+        kept = kept.assign(timestamp=ts)[~bad_ts]
+        return kept, counts
+
+    @staticmethod
+    def _stats(before: int, after: int, dropped_by_rule: dict[str, int]) -> dict[str, Any]:
+        return {
             "rows_loaded": int(before),
             "rows_kept": int(after),
             "rows_dropped": int(before - after),
             "percent_cleaned": float((before - after) / before * 100) if before else 0.0,
+            "dropped_by_rule": dropped_by_rule,
         }
-        return df2, stats
+
+    @staticmethod
+    def clean_historical(df: pd.DataFrame) -> tuple[pd.DataFrame, dict[str, Any]]:
+        kept, counts = DataCleaner._clean_chunk(df)
+        return kept, DataCleaner._stats(len(df), len(kept), counts)
+
+    @staticmethod
+    def clean_historical_chunks(chunks: Iterable[pd.DataFrame]) -> tuple[pd.DataFrame, dict[str, Any]]:
+        """Clean a CSV read in chunks; returns a compact frame (see ``compact_dtypes``).
+
+        Only one raw chunk is alive at a time, so peak memory is the compact result plus
+        one chunk rather than several copies of the whole file.
+        """
+        parts: list[pd.DataFrame] = []
+        loaded = 0
+        dropped_by_rule = dict.fromkeys(DataCleaner.CLEANING_RULES, 0)
+        for chunk in chunks:
+            loaded += len(chunk)
+            kept, counts = DataCleaner._clean_chunk(chunk)
+            for rule, c in counts.items():
+                dropped_by_rule[rule] += c
+            parts.append(DataCleaner.compact_dtypes(kept))
+
+        if not parts:
+            return pd.DataFrame(columns=["sensor_id", "timestamp"]), DataCleaner._stats(0, 0, dropped_by_rule)
+
+        df = DataCleaner.concat_compact(parts)
+        return df, DataCleaner._stats(loaded, len(df), dropped_by_rule)
+
+    @staticmethod
+    def concat_compact(parts: list[pd.DataFrame]) -> pd.DataFrame:
+        """Concatenate compact frames, keeping ``sensor_id`` categorical over the union of categories."""
+        parts = [p.copy(deep=False) for p in parts]
+        categories = union_categoricals([p["sensor_id"] for p in parts], sort_categories=True).categories
+        for p in parts:
+            p["sensor_id"] = p["sensor_id"].cat.set_categories(categories)
+        return pd.concat(parts, ignore_index=True)
+
+    @staticmethod
+    def merge_stats(a: dict[str, Any], b: dict[str, Any]) -> dict[str, Any]:
+        """Cleaning stats of two loads combined, as if they had been one."""
+        rules = {**a.get("dropped_by_rule", {})}
+        for rule, n in b.get("dropped_by_rule", {}).items():
+            rules[rule] = rules.get(rule, 0) + n
+        loaded = a.get("rows_loaded", 0) + b.get("rows_loaded", 0)
+        kept = a.get("rows_kept", 0) + b.get("rows_kept", 0)
+        return DataCleaner._stats(loaded, kept, rules)
+
+    @staticmethod
+    def stored_readings_frame(records: Iterable[dict[str, Any]], pollutants: list[str]) -> tuple[pd.DataFrame, int]:
+        """Compact frame of stored ``SensorReading.to_dict()`` records, and how many records there were.
+
+        Records without a sensor id or a parseable timestamp cannot be placed in a time
+        series and are left out of the frame (but still counted).
+        """
+        sids: list[Any] = []
+        stamps: list[Any] = []
+        columns: dict[str, list[Any]] = {p: [] for p in pollutants}
+        for item in records:
+            readings = item.get("readings")
+            if not isinstance(readings, dict):
+                readings = {}
+            sids.append(item.get("sensor_id"))
+            stamps.append(item.get("timestamp"))
+            for p in pollutants:
+                columns[p].append(readings.get(p))
+
+        ts = pd.to_datetime(pd.Series(stamps, dtype=object), errors="coerce", utc=True, format="ISO8601")
+        frame = pd.DataFrame(
+            {
+                "sensor_id": pd.Series(sids, dtype="string"),
+                "timestamp": ts.dt.tz_localize(None).astype("datetime64[ns]"),
+                **{p: pd.to_numeric(pd.Series(v, dtype=object), errors="coerce") for p, v in columns.items()},
+            }
+        )
+        ok = frame["sensor_id"].notna() & (frame["sensor_id"].str.len() > 0) & frame["timestamp"].notna()
+        return DataCleaner.compact_dtypes(frame[ok.to_numpy(dtype=bool)].reset_index(drop=True)), len(sids)
+
+    @staticmethod
+    def compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+        """Categorical ``sensor_id``, naive datetime64 ``timestamp`` and float32 pollutants."""
+        out = df.copy(deep=False)
+        if "sensor_id" in out.columns:
+            out["sensor_id"] = out["sensor_id"].astype(str).astype("category")
+        if "timestamp" in out.columns and isinstance(out["timestamp"].dtype, pd.DatetimeTZDtype):
+            out["timestamp"] = out["timestamp"].dt.tz_convert("UTC").dt.tz_localize(None)
+        for c in out.columns:
+            if c not in ("sensor_id", "timestamp") and pd.api.types.is_numeric_dtype(out[c].dtype):
+                out[c] = out[c].astype(np.float32)
+        return out
 
     @staticmethod
     def categorize_pm25(pm25: pd.Series, thresholds: dict[str, float]) -> pd.Series:
-        safe = thresholds["pm25_safe"]
-        mod = thresholds["pm25_moderate"]
-        dang = thresholds["pm25_danger"]
-
-        cat = pd.Series(["No data"] * len(pm25), index=pm25.index, dtype="object")
-        mask = pm25.notna()
-        cat.loc[mask & (pm25 <= safe)] = "Safe"
-        cat.loc[mask & (pm25 > safe) & (pm25 <= mod)] = "Moderate"
-        cat.loc[mask & (pm25 > mod) & (pm25 <= dang)] = "Unhealthy"
-        cat.loc[mask & (pm25 > dang)] = "Dangerous"
-        return cat
+        return CategoryEngine(thresholds).categorize("pm25", pm25)
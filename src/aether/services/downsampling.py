@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import numpy as np
+
+DOWNSAMPLING_METHODS = ("lttb", "minmax", "none")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of ``n_out`` points that keep the visual shape.
+
+    The first and last points are always kept. Bucket averages are computed for all buckets
+    at once with ``np.add.reduceat``; the remaining per-bucket step is an argmax over that
+    bucket's triangle areas.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts = np.r_[edges[:-1], n - 1]
+    counts = np.diff(np.r_[starts, n])
+    mean_x = np.add.reduceat(x, starts) / counts
+    mean_y = np.add.reduceat(y, starts) / counts
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[a] - mean_x[i + 1]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (mean_y[i + 1] - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Per-bucket min and max, so every spike survives; fully vectorized, ~``n_out`` points."""
+    n = len(y)
+    buckets = max(1, (n_out - 2) // 2)
+    if n_out >= n or n <= 2:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    inner = n - 2
+    size = -(-inner // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:inner] = y[1:-1]
+    padded = padded.reshape(buckets, size)
+    valid = ~np.all(np.isnan(padded), axis=1)
+    padded = padded[valid]
+    offsets = np.flatnonzero(valid) * size + 1
+
+    lo = offsets + np.nanargmin(padded, axis=1)
+    hi = offsets + np.nanargmax(padded, axis=1)
+    return np.unique(np.r_[0, lo, hi, n - 1])
+
+
+def downsample_indices(x: np.ndarray, y: np.ndarray, n_out: int, method: str = "lttb") -> np.ndarray:
+    if method == "lttb":
+        return lttb_indices(x, y, n_out)
+    if method == "minmax":
+        return minmax_indices(y, n_out)
+    if method == "none":
+        return np.arange(len(y))
+    raise ValueError(f"unknown downsampling method {method!r}; expected one of {DOWNSAMPLING_METHODS}")
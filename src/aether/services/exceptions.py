@@ -6,3 +6,15 @@ class InvalidReadingError(Exception):
     def __init__(self, errors: list[str]):
         super().__init__("Invalid reading")
         self.errors = errors
+
+
+class IngestBackpressureError(Exception):
+    pass
+
+
+class UnsupportedIngestFormatError(Exception):
+    pass
+
+
+class HistoricalDataNotReadyError(Exception):
+    pass
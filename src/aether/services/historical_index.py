@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from aether.services.conversions import naive_utc
+from aether.services.data_cleaning import DataCleaner
+
+
+def _sensor_keys(sensor_id: pd.Series) -> np.ndarray:
+    """Comparable per-row keys: category codes when categorical, the raw values otherwise."""
+    if isinstance(sensor_id.dtype, pd.CategoricalDtype):
+        return sensor_id.cat.codes.to_numpy()
+    return sensor_id.to_numpy()
+
+
+def _naive_datetime64(ts: pd.Series) -> np.ndarray:
+    if isinstance(ts.dtype, pd.DatetimeTZDtype):
+        ts = ts.dt.tz_convert("UTC").dt.tz_localize(None)
+    return ts.to_numpy(dtype="datetime64[ns]")
+
+
+def _concat(parts: list[pd.DataFrame]) -> pd.DataFrame:
+    if all(isinstance(p["sensor_id"].dtype, pd.CategoricalDtype) for p in parts):
+        return DataCleaner.concat_compact(parts)
+    return pd.concat(parts, ignore_index=True)
+
+
+def to_datetime64(value: datetime) -> np.datetime64:
+    """Normalize a query bound to naive UTC, the representation used by the sorted arrays."""
+    return np.datetime64(naive_utc(value), "ns")
+
+
+class SensorHistoryIndex:
+    """Historical rows sorted by (sensor_id, timestamp) with one contiguous row range per sensor.
+
+    Built once from the cleaned frame; a lookup is two dict reads plus, when time bounds are
+    given, a binary search over that sensor's timestamps, and returns an ``iloc`` slice.
+
+    Rows merged later (``with_rows``) go to a small ``delta`` index next to the base frame,
+    so an append sorts only the new rows and the base (possibly memory-mapped) is left as
+    it is; lookups combine the two slices. Once the delta outgrows ``DELTA_MAX_ROWS`` or an
+    eighth of the base, both are folded into a new base.
+    """
+
+    DELTA_MAX_ROWS = 65536
+
+    def __init__(self, df: pd.DataFrame):
+        self._delta: SensorHistoryIndex | None = None
+        if df.empty:
+            self._df = df.reset_index(drop=True)
+            self._ts = np.array([], dtype="datetime64[ns]")
+            self._ranges: dict[str, tuple[int, int]] = {}
+            return
+
+        if not self._is_sorted(df):
+            df = df.sort_values(["sensor_id", "timestamp"], kind="stable")
+        ordered = df.reset_index(drop=True)
+        ids = _sensor_keys(ordered["sensor_id"])
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        ends = np.r_[starts[1:], len(ids)]
+        labels = ordered["sensor_id"].iloc[starts].astype(str).tolist()
+
+        self._df = ordered
+        self._ts = _naive_datetime64(ordered["timestamp"])
+        self._ranges = {sid: (int(s), int(e)) for sid, s, e in zip(labels, starts, ends)}
+
+    @staticmethod
+    def _is_sorted(df: pd.DataFrame) -> bool:
+        """True when rows are already in (sensor_id, timestamp) order, e.g. loaded from the cache."""
+        sid = df["sensor_id"]
+        if isinstance(sid.dtype, pd.CategoricalDtype) and not sid.cat.categories.is_monotonic_increasing:
+            return False
+        ids = _sensor_keys(sid)
+        if len(ids) < 2:
+            return True
+        if np.any(ids[1:] < ids[:-1]):
+            return False
+        ts = _naive_datetime64(df["timestamp"])
+        same = ids[1:] == ids[:-1]
+        return not np.any(same & (ts[1:] < ts[:-1]))
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """The base frame; rows merged since the last fold are in ``delta``."""
+        return self._df
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Naive UTC datetime64[ns] timestamps aligned with ``frame`` rows."""
+        return self._ts
+
+    @property
+    def delta(self) -> "SensorHistoryIndex | None":
+        return self._delta
+
+    def combined(self) -> pd.DataFrame:
+        """Base and delta rows in one frame, sorted within each part only."""
+        return self._df if self._delta is None else _concat([self._df, self._delta.frame])
+
+    def with_rows(self, rows: pd.DataFrame) -> "SensorHistoryIndex":
+        """A new index over these rows plus ``rows``; this one is left untouched."""
+        if rows.empty:
+            return self
+        pending = rows if self._delta is None else _concat([self._delta.frame, rows])
+        if self._df.empty or len(pending) > max(self.DELTA_MAX_ROWS, len(self._df) // 8):
+            return SensorHistoryIndex(pending if self._df.empty else _concat([self._df, pending]))
+        index = object.__new__(SensorHistoryIndex)
+        index._df, index._ts, index._ranges = self._df, self._ts, self._ranges
+        index._delta = SensorHistoryIndex(pending)
+        return index
+
+    def sensor_ids(self) -> list[str]:
+        if self._delta is None:
+            return list(self._ranges)
+        return list(self._ranges) + [sid for sid in self._delta.sensor_ids() if sid not in self._ranges]
+
+    def bounds(self, sensor_id: str, start: datetime | None = None, end: datetime | None = None) -> tuple[int, int]:
+        """Row range ``[lo, hi)`` of ``sensor_id`` with ``start <= timestamp <= end``."""
+        if start is not None and end is not None and to_datetime64(start) > to_datetime64(end):
+            raise ValueError("'from' must not be after 'to'")
+        lo, hi = self._ranges.get(sensor_id, (0, 0))
+        if lo == hi:
+            return lo, lo
+        if start is not None:
+            lo += int(np.searchsorted(self._ts[lo:hi], to_datetime64(start), side="left"))
+        if end is not None:
+            hi = lo + int(np.searchsorted(self._ts[lo:hi], to_datetime64(end), side="right"))
+        return lo, max(lo, hi)
+
+    def lookup(self, sensor_id: str, start: datetime | None = None, end: datetime | None = None) -> pd.DataFrame:
+        lo, hi = self.bounds(sensor_id, start, end)
+        rows = self._df.iloc[lo:hi]
+        if self._delta is None:
+            return rows
+        extra = self._delta.lookup(sensor_id, start, end)
+        if extra.empty:
+            return rows
+        if rows.empty:
+            return extra
+        return _concat([rows, extra]).sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+
+def month_key(year: int, month: int) -> int:
+    return year * 12 + (month - 1)
+
+
+class MonthPartitionIndex:
+    """Row positions of the historical frame grouped by calendar month.
+
+    The frame itself is left as it is (sensor-sorted and possibly memory-mapped); only a
+    stable month ordering of its row numbers is kept, 12 bytes per row with the month
+    keys. A month, a year or any run of consecutive months is one slice of that ordering,
+    and only the rows asked for are copied out, in (sensor_id, timestamp) order within a
+    month.
+
+    ``with_delta`` pairs the base with a month index over the history index's delta rows,
+    so merging a few rows does not re-sort the whole base; views touching delta months
+    merge the two.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self._delta: MonthPartitionIndex | None = None
+        self._df = df
+        if df.empty:
+            self._order = np.array([], dtype=np.int64)
+            self._keys = np.array([], dtype=np.int32)
+            self._ranges: dict[int, tuple[int, int]] = {}
+            return
+
+        # datetime64[M] counts months since 1970-01, month_key counts them since year 0
+        months = _naive_datetime64(df["timestamp"]).astype("datetime64[M]").astype(np.int64)
+        keys = (months + 1970 * 12).astype(np.int32)
+        self._order = np.argsort(keys, kind="stable")
+        self._keys = keys[self._order]
+        uniq, starts = np.unique(self._keys, return_index=True)
+        ends = np.r_[starts[1:], len(self._keys)]
+        self._ranges = {int(k): (int(s), int(e)) for k, s, e in zip(uniq, starts, ends)}
+
+    def with_delta(self, delta: pd.DataFrame | None) -> "MonthPartitionIndex":
+        """This base with ``delta`` (sorted by sensor and timestamp) as its delta rows."""
+        index = object.__new__(MonthPartitionIndex)
+        index._df, index._order, index._keys, index._ranges = self._df, self._order, self._keys, self._ranges
+        index._delta = MonthPartitionIndex(delta) if delta is not None and not delta.empty else None
+        return index
+
+    def months(self) -> list[tuple[int, int]]:
+        keys = set(self._ranges) if self._delta is None else set(self._ranges) | set(self._delta._ranges)
+        return [(k // 12, k % 12 + 1) for k in sorted(keys)]
+
+    def _rows(self, lo: int, hi: int) -> pd.DataFrame:
+        return self._df.take(self._order[lo:max(lo, hi)]).reset_index(drop=True)
+
+    def month(self, year: int, month: int) -> pd.DataFrame:
+        return self.span((year, month), (year, month))
+
+    def span(self, start: tuple[int, int], end: tuple[int, int]) -> pd.DataFrame:
+        """All rows from month ``start`` through month ``end`` inclusive, as (year, month) pairs."""
+        lo = int(np.searchsorted(self._keys, month_key(*start), side="left"))
+        hi = int(np.searchsorted(self._keys, month_key(*end), side="right"))
+        rows = self._rows(lo, hi)
+        if self._delta is None:
+            return rows
+        extra = self._delta.span(start, end)
+        if extra.empty:
+            return rows
+        if rows.empty:
+            return extra
+        merged = _concat([rows, extra])
+        merged["_month"] = _naive_datetime64(merged["timestamp"]).astype("datetime64[M]")
+        merged = merged.sort_values(["_month", "sensor_id", "timestamp"], kind="stable")
+        return merged.drop(columns="_month").reset_index(drop=True)
+
+    def year(self, year: int) -> pd.DataFrame:
+        return self.span((year, 1), (year, 12))
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from pathlib import Path
+
+from aether.persistence.storage import HistoricalCsvRepository
+from aether.services.data_cleaning import DataCleaner
+from aether.services.sensor_loader import load_sensors
+from aether.services.sensor_manager import SensorManager
+
+log = logging.getLogger(__name__)
+
+
+def source_state(path: Path) -> tuple[int, int, int] | None:
+    """``(inode, size, mtime_ns)`` of a watched file, or None if it cannot be stat'ed."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class SourceWatcher:
+    """Background thread that picks up changes to the historical CSV and the sensor registry.
+
+    Both files are polled with ``stat`` every ``interval_seconds``. When the CSV has grown,
+    only the appended bytes are read, cleaned and merged (``SensorManager.append_historical``).
+    A CSV that shrank or was replaced by another file cannot be tailed; that is logged once
+    and needs a restart. When ``sensors.json`` changed, it is reloaded and swapped in
+    whole; a file that does not parse (e.g. caught mid-write) is retried on the next poll.
+    """
+
+    def __init__(
+        self,
+        manager: SensorManager,
+        historical_csv: Path,
+        csv_offset: int,
+        csv_inode: int | None,
+        sensors_path: Path,
+        sensors_state: tuple[int, int, int] | None,
+        interval_seconds: float = 5.0,
+    ):
+        # offset/inode and sensors_state describe what was loaded at startup, so changes
+        # made while the service was starting are picked up by the first poll
+        self._manager = manager
+        self._csv = HistoricalCsvRepository(historical_csv)
+        self._offset = int(csv_offset)
+        self._csv_key: tuple[int, int, int] | None = None
+        self._csv_inode = csv_inode
+        self._csv_stuck = False
+        self._sensors_path = sensors_path
+        self._sensors_key = sensors_state
+        self._interval = float(interval_seconds)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="aether-source-watcher", daemon=True)
+
+    @property
+    def manager(self) -> SensorManager:
+        return self._manager
+
+    @property
+    def csv_offset(self) -> int:
+        return self._offset
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def poll(self) -> dict[str, int]:
+        """Check both sources once; returns the historical rows merged and sensors now registered (0 if unchanged)."""
+        with self._lock:
+            return {"historical_rows": self._poll_csv(), "sensors": self._poll_sensors()}
+
+    def _poll_csv(self) -> int:
+        key = source_state(self._csv.path)
+        if key is None or key == self._csv_key or self._csv_stuck:
+            return 0
+        inode, size, _ = key
+        if (self._csv_inode is not None and inode != self._csv_inode) or size < self._offset:
+            log.warning("Historical CSV %s was replaced or truncated; restart to reload it", self._csv.path)
+            self._csv_stuck = True
+            return 0
+        started = time.perf_counter()
+        raw, offset = self._csv.read_appended(self._offset, size)
+        cleaned, stats = DataCleaner.clean_historical(raw)
+        merged = self._manager.append_historical(DataCleaner.compact_dtypes(cleaned), stats)
+        self._offset = offset
+        # a trailing partial line leaves the offset short of the size; look again next poll
+        self._csv_key = key if offset == size else None
+        if len(raw):
+            log.info(
+                "Merged %d of %d rows appended to %s in %.1f ms",
+                merged, len(raw), self._csv.path, (time.perf_counter() - started) * 1000,
+            )
+        return merged
+
+    def _poll_sensors(self) -> int:
+        key = source_state(self._sensors_path)
+        if key is None or key == self._sensors_key:
+            return 0
+        try:
+            sensors = load_sensors(self._sensors_path)
+        except (OSError, ValueError, TypeError, AttributeError) as e:  # unreadable, mid-write or not a list of objects
+            log.warning("Could not reload sensors from %s (%s); keeping the current registry", self._sensors_path, e)
+            return 0
+        self._manager.reload_sensors(sensors)
+        self._sensors_key = key
+        log.info("Reloaded sensor registry from %s: %d sensors", self._sensors_path, len(sensors))
+        return len(sensors)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            try:
+                self.poll()
+            except Exception:
+                log.exception("Polling historical data and sensor registry failed")
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import threading
+
+import numpy as np
+
+
+class _Buffer:
+    """One sensor's readings, sorted by timestamp, in ``ts[start:stop]`` and ``values[start:stop]``."""
+
+    __slots__ = ("ts", "values", "start", "stop")
+
+    def __init__(self, size: int, width: int):
+        self.ts = np.empty(size, dtype="datetime64[ns]")
+        self.values = np.empty((size, width), dtype=np.float32)
+        self.start = 0
+        self.stop = 0
+
+
+class HotTier:
+    """Recent live readings per sensor, merged with the historical slices at query time.
+
+    Every sensor has its own buffer sorted by timestamp. A buffer starts small and grows
+    up to ``max_bytes_per_sensor`` of allocated timestamps and float32 values. A fifth of
+    that is slack, so appends in timestamp order are amortized O(1): the live rows shift
+    back to the front only once the slack is used up. Past ``capacity`` readings the
+    oldest timestamps are dropped. A reading older than the newest one buffered is merged
+    in, which rebuilds that sensor's buffer.
+
+    Reads copy the matching rows out under the lock, so they never see a half-applied
+    update. ``version`` changes with every update.
+    """
+
+    MIN_ALLOC = 16
+
+    def __init__(self, pollutants: list[str], max_bytes_per_sensor: int):
+        self._pollutants = list(pollutants)
+        self._width = len(self._pollutants)
+        self._alloc_max = max(2, int(max_bytes_per_sensor) // (8 + 4 * self._width))
+        self._capacity = max(1, self._alloc_max * 4 // 5)
+        self._buffers: dict[str, _Buffer] = {}
+        self._version = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pollutants(self) -> list[str]:
+        return self._pollutants
+
+    @property
+    def capacity(self) -> int:
+        """Readings kept per sensor."""
+        return self._capacity
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def add_many(self, sensor_ids: list[str], ts: np.ndarray, values: np.ndarray) -> None:
+        """Buffer readings: ``ts`` naive UTC datetime64[ns], ``values`` one column per pollutant."""
+        if not sensor_ids:
+            return
+        ts = np.asarray(ts, dtype="datetime64[ns]")
+        values = np.asarray(values, dtype=np.float32).reshape(len(sensor_ids), self._width)
+        with self._lock:
+            for sid, rows in _group(sensor_ids):
+                self._insert(sid, ts[rows], values[rows])
+            self._version += 1
+
+    def _insert(self, sid: str, ts: np.ndarray, values: np.ndarray) -> None:
+        if len(ts) > 1 and np.any(ts[1:] < ts[:-1]):
+            order = np.argsort(ts, kind="stable")
+            ts, values = ts[order], values[order]
+        buf = self._buffers.get(sid)
+        if buf is None:
+            buf = self._buffers[sid] = _Buffer(min(self._alloc_max, max(self.MIN_ALLOC, len(ts))), self._width)
+        elif buf.stop > buf.start and ts[0] < buf.ts[buf.stop - 1]:
+            # a late reading: merge everything and rewrite the buffer from the front
+            ts = np.concatenate([buf.ts[buf.start:buf.stop], ts])
+            values = np.concatenate([buf.values[buf.start:buf.stop], values])
+            order = np.argsort(ts, kind="stable")
+            ts, values = ts[order], values[order]
+            buf.start = buf.stop = 0
+
+        ts, values = ts[-self._capacity:], values[-self._capacity:]
+        n = len(ts)
+        if buf.stop + n > len(buf.ts):
+            keep = min(buf.stop - buf.start, self._capacity - n)
+            size = len(buf.ts)
+            if size < self._alloc_max:
+                size = min(self._alloc_max, max(2 * size, keep + n))
+            new_ts = np.empty(size, dtype="datetime64[ns]") if size != len(buf.ts) else buf.ts
+            new_values = np.empty((size, self._width), dtype=np.float32) if size != len(buf.ts) else buf.values
+            new_ts[:keep] = buf.ts[buf.stop - keep:buf.stop]
+            new_values[:keep] = buf.values[buf.stop - keep:buf.stop]
+            buf.ts, buf.values, buf.start, buf.stop = new_ts, new_values, 0, keep
+        buf.ts[buf.stop:buf.stop + n] = ts
+        buf.values[buf.stop:buf.stop + n] = values
+        buf.stop += n
+        buf.start = max(buf.start, buf.stop - self._capacity)
+
+    def evict(self, sensor_ids: list[str], ts: np.ndarray) -> int:
+        """Drop buffered readings with exactly these ``(sensor_id, timestamp)`` pairs; returns how many."""
+        if not sensor_ids:
+            return 0
+        ts = np.asarray(ts, dtype="datetime64[ns]")
+        dropped = 0
+        with self._lock:
+            for sid, rows in _group(sensor_ids):
+                buf = self._buffers.get(sid)
+                if buf is None:
+                    continue
+                live = buf.ts[buf.start:buf.stop]
+                gone = np.isin(live, ts[rows])
+                n = int(gone.sum())
+                if not n:
+                    continue
+                kept = ~gone
+                left = len(live) - n
+                buf.ts[:left] = live[kept]
+                buf.values[:left] = buf.values[buf.start:buf.stop][kept]
+                buf.start, buf.stop = 0, left
+                dropped += n
+            self._version += 1
+        return dropped
+
+    def window(self, sensor_id: str, start: np.datetime64 | None, end: np.datetime64 | None) -> tuple[np.ndarray, np.ndarray]:
+        """Copies of one sensor's timestamps and values with ``start <= timestamp <= end``."""
+        with self._lock:
+            buf = self._buffers.get(sensor_id)
+            if buf is None:
+                return np.array([], dtype="datetime64[ns]"), np.empty((0, self._width), dtype=np.float32)
+            live = buf.ts[buf.start:buf.stop]
+            lo = int(np.searchsorted(live, start, side="left")) if start is not None else 0
+            hi = int(np.searchsorted(live, end, side="right")) if end is not None else len(live)
+            hi = max(lo, hi)
+            return live[lo:hi].copy(), buf.values[buf.start + lo:buf.start + hi].copy()
+
+    def span(self, start: np.datetime64, end: np.datetime64) -> tuple[list[str], np.ndarray, np.ndarray]:
+        """Readings of every sensor with ``start <= timestamp < end``, as sensor ids, timestamps and values."""
+        sids: list[str] = []
+        ts_parts: list[np.ndarray] = []
+        value_parts: list[np.ndarray] = []
+        with self._lock:
+            for sid, buf in self._buffers.items():
+                live = buf.ts[buf.start:buf.stop]
+                lo = int(np.searchsorted(live, start, side="left"))
+                hi = int(np.searchsorted(live, end, side="left"))
+                if hi > lo:
+                    sids += [sid] * (hi - lo)
+                    ts_parts.append(live[lo:hi].copy())
+                    value_parts.append(buf.values[buf.start + lo:buf.start + hi].copy())
+        if not sids:
+            return [], np.array([], dtype="datetime64[ns]"), np.empty((0, self._width), dtype=np.float32)
+        return sids, np.concatenate(ts_parts), np.concatenate(value_parts)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "sensors": len(self._buffers),
+                "readings": sum(b.stop - b.start for b in self._buffers.values()),
+                "bytes": sum(b.ts.nbytes + b.values.nbytes for b in self._buffers.values()),
+                "capacity_per_sensor": self._capacity,
+            }
+
+
+def _group(sensor_ids: list[str]) -> list[tuple[str, np.ndarray]]:
+    """Row indices per sensor id, in first-seen order, each in input order."""
+    if len(sensor_ids) == 1:
+        return [(sensor_ids[0], np.array([0]))]
+    rows: dict[str, list[int]] = {}
+    for i, sid in enumerate(sensor_ids):
+        rows.setdefault(sid, []).append(i)
+    return [(sid, np.array(idx)) for sid, idx in rows.items()]
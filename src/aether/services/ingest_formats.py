@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import io
+from typing import Any, Callable
+
+import pandas as pd
+
+try:
+    import msgpack
+except ImportError:  # optional: only needed for application/msgpack bodies
+    msgpack = None
+
+try:
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # optional: only needed for Arrow IPC stream bodies
+    pa_ipc = None
+
+from aether.services.exceptions import UnsupportedIngestFormatError
+
+CSV_TYPES = ("text/csv",)
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+ARROW_TYPES = ("application/vnd.apache.arrow.stream",)
+
+
+def decode_csv(body: bytes) -> pd.DataFrame:
+    """Columnar CSV: a ``sensor_id`` column, an optional ``timestamp`` column and one column per pollutant."""
+    if not body.strip():
+        return pd.DataFrame({"sensor_id": pd.Series([], dtype="string")})
+    try:
+        return pd.read_csv(io.BytesIO(body), dtype={"sensor_id": "string", "timestamp": "string"})
+    except (pd.errors.ParserError, UnicodeDecodeError) as e:
+        raise ValueError(f"malformed CSV batch: {e}") from None
+
+
+def decode_msgpack(body: bytes) -> pd.DataFrame | list[Any]:
+    """A MessagePack map of equal-length columns, or an array of ``/ingest``-style objects.
+
+    The array form is returned as-is for the per-object batch path.
+    """
+    if msgpack is None:
+        raise UnsupportedIngestFormatError("MessagePack ingest needs the 'msgpack' package")
+    try:
+        payload = msgpack.unpackb(body, raw=False)
+    except ValueError as e:  # msgpack's format/extra-data errors all derive from ValueError
+        raise ValueError(f"malformed MessagePack batch: {e}") from None
+    if isinstance(payload, list):
+        return payload
+    if not isinstance(payload, dict):
+        raise ValueError("MessagePack batch must be a map of columns or an array of readings")
+    try:
+        return pd.DataFrame(payload)
+    except ValueError as e:
+        raise ValueError(f"MessagePack columns must have equal lengths: {e}") from None
+
+
+def decode_arrow(body: bytes) -> pd.DataFrame:
+    """An Arrow IPC stream with the same columns as the CSV format."""
+    if pa_ipc is None:
+        raise UnsupportedIngestFormatError("Arrow ingest needs the 'pyarrow' package")
+    try:
+        return pa_ipc.open_stream(body).read_all().to_pandas()
+    except Exception as e:  # pyarrow raises its own ArrowInvalid/ArrowException family
+        raise ValueError(f"malformed Arrow batch: {e}") from None
+
+
+def batch_decoder(content_type: str) -> Callable[[bytes], pd.DataFrame | list[Any]] | None:
+    """The decoder for a compact batch ``Content-Type``; None means JSON or NDJSON."""
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type in CSV_TYPES:
+        return decode_csv
+    if media_type in MSGPACK_TYPES:
+        return decode_msgpack
+    if media_type in ARROW_TYPES:
+        return decode_arrow
+    return None
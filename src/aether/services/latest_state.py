@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from aether.services.conversions import as_float, naive_utc
+
+
+def _to_ns(ts: datetime) -> np.datetime64:
+    return np.datetime64(naive_utc(ts), "ns")
+
+
+@dataclass(frozen=True)
+class LatestSnapshot:
+    """One immutable version of the latest-state table.
+
+    ``values[pollutant][i]`` and ``timestamps[i]`` belong to ``sensor_ids[i]``; a sensor
+    that never reported has NaN values and a NaT timestamp. The arrays are read-only and
+    never modified after publication, so a reader can use a snapshot for as long as it
+    likes without locking.
+    """
+
+    version: int
+    sensor_ids: tuple[str, ...]
+    values: Mapping[str, np.ndarray]
+    timestamps: np.ndarray
+    active: int
+    total_readings: int
+    last_update: datetime | None
+
+    def frame(self) -> pd.DataFrame:
+        """``sensor_id``, one column per pollutant and ``timestamp``; built from the arrays, not per row."""
+        return pd.DataFrame(
+            {"sensor_id": list(self.sensor_ids), **self.values, "timestamp": self.timestamps},
+            copy=False,
+        )
+
+
+class LatestStateTable:
+    """Struct-of-arrays latest reading per sensor, published as versioned snapshots.
+
+    Sensors get a fixed row when the table is built. Writers serialize on a lock, copy the
+    arrays once per batch, apply the batch and publish a new ``LatestSnapshot`` with a single
+    reference assignment; readers call ``snapshot()`` and never block. The active-sensor
+    count is kept up to date as sensors report for the first time.
+    """
+
+    def __init__(self, sensor_ids: Iterable[str], pollutants: Iterable[str]):
+        ids = tuple(sensor_ids)
+        self._rows = {sid: i for i, sid in enumerate(ids)}
+        self._pollutants = list(dict.fromkeys(pollutants))
+        self._lock = threading.Lock()
+        self._snapshot = self._publish(
+            version=0,
+            sensor_ids=ids,
+            values={p: np.full(len(ids), np.nan) for p in self._pollutants},
+            timestamps=np.full(len(ids), np.datetime64("NaT"), dtype="datetime64[ns]"),
+            active=0,
+            total_readings=0,
+            last_update=None,
+        )
+
+    @staticmethod
+    def _publish(**fields: Any) -> LatestSnapshot:
+        for arr in (*fields["values"].values(), fields["timestamps"]):
+            arr.flags.writeable = False
+        return LatestSnapshot(**fields)
+
+    @property
+    def pollutants(self) -> list[str]:
+        return list(self._pollutants)
+
+    def snapshot(self) -> LatestSnapshot:
+        return self._snapshot
+
+    def reindex(self, sensor_ids: Iterable[str]) -> LatestSnapshot:
+        """Switch to a new set of sensor rows as one new version, e.g. after a registry reload.
+
+        Sensors that stay keep their latest values; new ones start empty and removed ones
+        are dropped. The reading total and last update are unchanged.
+        """
+        ids = tuple(sensor_ids)
+        with self._lock:
+            cur = self._snapshot
+            old_rows = np.array([self._rows.get(sid, -1) for sid in ids], dtype=np.int64)
+            kept = old_rows >= 0
+            values = {}
+            for p, arr in cur.values.items():
+                new = np.full(len(ids), np.nan)
+                new[kept] = arr[old_rows[kept]]
+                values[p] = new
+            timestamps = np.full(len(ids), np.datetime64("NaT"), dtype="datetime64[ns]")
+            timestamps[kept] = cur.timestamps[old_rows[kept]]
+            self._rows = {sid: i for i, sid in enumerate(ids)}
+            self._snapshot = self._publish(
+                version=cur.version + 1,
+                sensor_ids=ids,
+                values=values,
+                timestamps=timestamps,
+                active=int((~np.isnat(timestamps)).sum()),
+                total_readings=cur.total_readings,
+                last_update=cur.last_update,
+            )
+            return self._snapshot
+
+    def apply(
+        self,
+        updates: list[tuple[str, Mapping[str, Any], datetime]],
+        counted: int | None = None,
+        last_update: datetime | None = None,
+    ) -> LatestSnapshot:
+        """Record ``(sensor_id, readings, timestamp)`` updates in order, as one new version.
+
+        ``counted`` readings are added to the total (default: one per update, but stored
+        readings of unknown sensors count too). ``last_update`` defaults to the timestamp of
+        the last update. Updates for sensors without a row are ignored.
+        """
+        with self._lock:
+            cur = self._snapshot
+            values = {p: arr.copy() for p, arr in cur.values.items()}
+            timestamps = cur.timestamps.copy()
+            rows = np.fromiter((self._rows.get(sid, -1) for sid, _, _ in updates), dtype=np.int64, count=len(updates))
+            # only the last update of each sensor in the batch is visible afterwards
+            rev_rows, rev_pos = np.unique(rows[::-1], return_index=True)
+            last = {int(r): len(updates) - 1 - int(p) for r, p in zip(rev_rows, rev_pos) if r >= 0}
+            active = cur.active + int(np.isnat(timestamps[list(last)]).sum()) if last else cur.active
+            for i, u in last.items():
+                _, readings, ts = updates[u]
+                timestamps[i] = _to_ns(ts)
+                for p, arr in values.items():
+                    arr[i] = as_float(readings.get(p))
+            if last_update is None and updates:
+                last_update = updates[-1][2]
+            self._snapshot = self._publish(
+                version=cur.version + 1,
+                sensor_ids=cur.sensor_ids,
+                values=values,
+                timestamps=timestamps,
+                active=active,
+                total_readings=cur.total_readings + (len(updates) if counted is None else counted),
+                last_update=last_update if last_update is not None else cur.last_update,
+            )
+            return self._snapshot
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+# seconds; spans and requests here range from tens of microseconds to whole-file loads
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict[str, str] | None) -> Labels:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(labels: Labels, extra: tuple[str, str] | None = None) -> str:
+    pairs = [*labels, extra] if extra is not None else list(labels)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(_labels(labels), 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in values]
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram per label set, in the Prometheus layout."""
+
+    def __init__(self, name: str, help: str, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self._bounds = tuple(sorted(buckets))
+        # per label set: [count per bucket (last one is +Inf), sum]
+        self._series: dict[Labels, tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, **labels: str) -> None:
+        key = _labels(labels)
+        slot = bisect.bisect_left(self._bounds, seconds)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self._bounds) + 1), [0.0])
+            series[0][slot] += 1
+            series[1][0] += seconds
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(_labels(labels))
+            return sum(series[0]) if series is not None else 0
+
+    def render(self) -> list[str]:
+        with self._lock:
+            series = sorted((k, (list(counts), total[0])) for k, (counts, total) in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, n in zip((*self._bounds, float("inf")), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named counters and histograms rendered together in the Prometheus text format.
+
+    ``collectors`` are called at render time for values another component already keeps
+    (render cache, write-behind queue); they return ``(name, type, help, [(labels, value)])``.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Histogram] = {}
+        self._collectors: list[Callable[[], list[tuple[str, str, str, list[tuple[dict[str, str], float]]]]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, help))
+
+    def histogram(self, name: str, help: str, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, help, buckets))
+
+    def _get_or_create(self, name: str, make: Callable[[], Any]) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = make()
+            return metric
+
+    def add_collector(self, collector: Callable[[], list[tuple[str, str, str, list[tuple[dict[str, str], float]]]]]) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def clear_collectors(self) -> None:
+        with self._lock:
+            self._collectors.clear()
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+            collectors = list(self._collectors)
+        lines: list[str] = []
+        for _, metric in metrics:
+            lines += metric.render()
+        for collect in collectors:
+            for name, kind, help, samples in collect():
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                lines += [f"{name}{_format_labels(_labels(l))} {_format_value(v)}" for l, v in samples]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+SPAN_SECONDS = REGISTRY.histogram("aether_span_duration_seconds", "Time spent in named hot-path spans.")
+HTTP_SECONDS = REGISTRY.histogram(
+    "aether_http_request_duration_seconds", "HTTP request latency until the response headers are sent."
+)
+HTTP_REQUESTS = REGISTRY.counter("aether_http_requests_total", "HTTP requests by route and status.")
+INGESTED = REGISTRY.counter("aether_ingest_readings_total", "Readings offered for ingest, by result.")
+COMPACTED = REGISTRY.counter(
+    "aether_compacted_readings_total", "Live readings moved from the readings store into compacted partitions."
+)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Record the wall time of the block under ``aether_span_duration_seconds{span=name}``.
+
+    Exceptions are timed too; the span still ends when the block exits.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        SPAN_SECONDS.observe(time.perf_counter() - started, span=name)
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware timing every HTTP request into the registry, optionally profiling slow ones.
+
+    Requests are labelled with the route template (``/history/{sensor_id}``) rather than
+    the raw path so the number of series stays bounded. Timing stops at the response start,
+    so streamed bodies are not included.
+    """
+
+    def __init__(self, app: Any, profiler: Callable[[], Any] | None = None):
+        self.app = app
+        self._profiler = profiler
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: dict[str, Any]) -> None:
+            nonlocal status, elapsed
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = time.perf_counter() - started
+            await send(message)
+
+        elapsed: float | None = None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if elapsed is None:
+                elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            labels = {"method": scope["method"], "route": template, "status": str(status)}
+            HTTP_SECONDS.observe(elapsed, **labels)
+            HTTP_REQUESTS.inc(**labels)
+            profiler = self._profiler() if self._profiler is not None else None
+            if profiler is not None:
+                profiler.request_finished(scope["method"], template, started, elapsed)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+from types import FrameType
+
+log = logging.getLogger(__name__)
+
+# innermost frames of threads that are waiting for work rather than doing it
+_IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+
+def _collapse(frame: FrameType) -> str | None:
+    """``outer;...;inner`` stack string, or None for an idle thread."""
+    code = frame.f_code
+    if (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES:
+        return None
+    names = []
+    f: FrameType | None = frame
+    while f is not None:
+        c = f.f_code
+        names.append(f"{c.co_name} ({os.path.basename(c.co_filename)}:{f.f_lineno})")
+        f = f.f_back
+    return ";".join(reversed(names))
+
+
+class SlowRequestProfiler:
+    """Opt-in sampling profiler that keeps a profile only for requests slower than a threshold.
+
+    One background thread samples the stacks of all other threads every ``interval_seconds``
+    into a bounded ring (``window_seconds`` long). When a request finishes slower than
+    ``slow_seconds``, the samples taken during it are written to ``out_dir`` in collapsed
+    stack format (one ``stack count`` line per distinct stack), which flamegraph.pl and
+    speedscope read directly. Samples cover every busy thread, so a profile of a request
+    that overlapped others also shows their work.
+    """
+
+    def __init__(
+        self,
+        out_dir: Path,
+        slow_seconds: float = 1.0,
+        interval_seconds: float = 0.005,
+        window_seconds: float = 60.0,
+        max_profiles: int = 100,
+    ):
+        self._out_dir = out_dir
+        self._slow = float(slow_seconds)
+        self._interval = max(0.001, float(interval_seconds))
+        self._samples: deque[tuple[float, list[str]]] = deque(maxlen=max(1, int(window_seconds / self._interval)))
+        self._max_profiles = int(max_profiles)
+        self._written = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="aether-profiler", daemon=True)
+
+    @property
+    def profiles_written(self) -> int:
+        return self._written
+
+    def start(self) -> None:
+        self._out_dir.mkdir(parents=True, exist_ok=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self._interval):
+            now = time.perf_counter()
+            stacks = [s for tid, frame in sys._current_frames().items() if tid != own and (s := _collapse(frame))]
+            if stacks:
+                with self._lock:
+                    self._samples.append((now, stacks))
+
+    def request_finished(self, method: str, route: str, started: float, elapsed: float) -> Path | None:
+        """Write the profile of a finished request if it was slow; returns the file written."""
+        if elapsed < self._slow or self._written >= self._max_profiles:
+            return None
+        end = started + elapsed
+        with self._lock:
+            window = [stacks for ts, stacks in self._samples if started <= ts <= end]
+        counts = Counter(s for stacks in window for s in stacks)
+        slug = route.strip("/").replace("/", "_").replace("{", "").replace("}", "") or "root"
+        path = self._out_dir / f"{time.strftime('%Y%m%dT%H%M%S')}-{method}-{slug}-{elapsed * 1000:.0f}ms.folded"
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, n in counts.most_common():
+                    f.write(f"{stack} {n}\n")
+        except OSError:
+            log.exception("Could not write request profile to %s", path)
+            return None
+        self._written += 1
+        log.info("Slow request %s %s took %.0f ms; %d samples in %s", method, route, elapsed * 1000, len(window), path)
+        return path
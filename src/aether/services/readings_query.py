@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import base64
+import csv
+import io
+import json
+import math
+from datetime import datetime, timedelta
+from heapq import merge
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+
+from aether.persistence.storage import LogPosition, ReadingStorage, epoch_us
+from aether.services.historical_index import SensorHistoryIndex, to_datetime64
+
+READINGS_FORMATS = ("ndjson", "csv")
+HISTORICAL, LIVE = 0, 1
+SOURCES = ("historical", "live")
+
+# (sensor_id, timestamp ns, source, position...) -- unique and totally ordered
+ReadingKey = tuple[str, int, int, int, int]
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def encode_cursor(key: ReadingKey) -> str:
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> ReadingKey:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sid, ts, source, a, b = json.loads(raw)
+        return str(sid), int(ts), int(source), int(a), int(b)
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor") from None
+
+
+def _iso(ns: int) -> str:
+    return (_EPOCH + timedelta(microseconds=ns // 1000)).isoformat()
+
+
+def _value(v: Any) -> Any:
+    if v is None or (isinstance(v, float) and math.isnan(v)):
+        return None
+    return v
+
+
+class ReadingsQuery:
+    """Raw historical and live readings in keyset order: (sensor_id, timestamp, source, position).
+
+    Sensors are visited in id order; within a sensor the historical slice and the live
+    readings from storage are merged by timestamp. Rows are produced lazily from a chunk of
+    historical rows and the storage cursor, so memory stays flat however many rows are read.
+    The live readings of all sensors come from one ``query_ranges`` call: an index range
+    scan per sensor on SQLite, and on the segmented log a single pass that keeps only the
+    location of each match (40 bytes) and reads the records back as they are streamed.
+    Historical positions are a row number and the part of the history index it is in (base
+    or delta), live ones storage positions, so a key identifies one row and resuming after
+    it is exact.
+    """
+
+    CHUNK_ROWS = 2000
+
+    def __init__(self, history: SensorHistoryIndex, storage: ReadingStorage):
+        self._history = history
+        self._storage = storage
+
+    def rows(
+        self,
+        sensor_ids: Iterable[str],
+        pollutants: list[str],
+        start: datetime | None = None,
+        end: datetime | None = None,
+        after: ReadingKey | None = None,
+    ) -> Iterator[tuple[ReadingKey, dict[str, Any]]]:
+        start = _naive(start)
+        end = _naive(end)
+        ranges = []
+        for sid in sorted(sensor_ids):
+            if after is not None and sid < after[0]:
+                continue
+            lo = start
+            if after is not None and sid == after[0]:
+                cursor_ts = _EPOCH + timedelta(microseconds=after[1] // 1000)
+                lo = cursor_ts if lo is None or cursor_ts > lo else lo
+            ranges.append((sid, lo, end))
+        # one storage query for all sensors: a single pass over an unindexed log
+        for (sid, lo, hi), (_, live) in zip(ranges, self._storage.query_ranges(ranges)):
+            resume = after[1:] if after is not None and sid == after[0] else None
+            streams = merge(
+                self._historical(self._history, 0, sid, pollutants, lo, hi),
+                self._historical(self._history.delta, 1, sid, pollutants, lo, hi),
+                self._live(sid, live, pollutants),
+                key=lambda r: r[0],
+            )
+            for key, row in streams:
+                if resume is not None and key[1:] <= resume:
+                    continue
+                yield key, row
+
+    def _historical(
+        self,
+        history: SensorHistoryIndex | None,
+        part: int,
+        sid: str,
+        pollutants: list[str],
+        start: datetime | None,
+        end: datetime | None,
+    ) -> Iterator[tuple[ReadingKey, dict[str, Any]]]:
+        """Rows of one part of the history: ``0`` for the base frame, ``1`` for the delta."""
+        if history is None:
+            return
+        lo, hi = history.bounds(sid, start, end)
+        frame = history.frame
+        present = [p for p in pollutants if p in frame.columns]
+        for c0 in range(lo, hi, self.CHUNK_ROWS):
+            c1 = min(hi, c0 + self.CHUNK_ROWS)
+            ts = history.timestamps[c0:c1].astype(np.int64)
+            cols = {p: frame[p].iloc[c0:c1].to_numpy(dtype=np.float64) for p in present}
+            for i in range(c1 - c0):
+                ns = int(ts[i])
+                row = {"sensor_id": sid, "timestamp": _iso(ns), "source": SOURCES[HISTORICAL]}
+                for p in pollutants:
+                    row[p] = _value(cols[p][i]) if p in cols else None
+                yield (sid, ns, HISTORICAL, c0 + i, part), row
+
+    def _live(
+        self, sid: str, hits: Iterator[tuple[dict[str, Any], LogPosition]], pollutants: list[str]
+    ) -> Iterator[tuple[ReadingKey, dict[str, Any]]]:
+        for item, position in hits:
+            us = epoch_us(item.get("timestamp"))
+            if us is None:
+                continue
+            readings = item.get("readings") or {}
+            row = {"sensor_id": sid, "timestamp": _iso(us * 1000), "source": SOURCES[LIVE]}
+            for p in pollutants:
+                row[p] = _value(readings.get(p))
+            yield (sid, us * 1000, LIVE, position[0], position[1]), row
+
+
+def _naive(value: datetime | None) -> datetime | None:
+    if value is None:
+        return None
+    return to_datetime64(value).astype("datetime64[us]").item()
+
+
+def render_readings(
+    rows: Iterator[tuple[ReadingKey, dict[str, Any]]],
+    fmt: str,
+    pollutants: list[str],
+    limit: int | None = None,
+    flush_rows: int = 1000,
+) -> Iterator[str]:
+    """Serialize rows as NDJSON or CSV, yielding text every ``flush_rows`` rows.
+
+    When ``limit`` rows have been written and more remain, the stream ends with the cursor
+    to continue from: ``{"next_cursor": ...}`` in NDJSON, ``# next_cursor=...`` in CSV.
+    """
+    if fmt not in READINGS_FORMATS:
+        raise ValueError(f"format must be one of {READINGS_FORMATS}, got {fmt!r}")
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n") if fmt == "csv" else None
+    columns = ["sensor_id", "timestamp", "source", *pollutants]
+    if writer is not None:
+        writer.writerow(columns)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+
+    written = 0
+    last: ReadingKey | None = None
+    for key, row in rows:
+        if limit is not None and written >= limit:
+            cursor = encode_cursor(last) if last is not None else ""
+            if writer is not None:
+                buf.write(f"# next_cursor={cursor}\n")
+            else:
+                buf.write(json.dumps({"next_cursor": cursor}) + "\n")
+            break
+        if writer is not None:
+            writer.writerow(["" if row[c] is None else row[c] for c in columns])
+        else:
+            buf.write(json.dumps(row, separators=(",", ":")) + "\n")
+        written += 1
+        last = key
+        if written % flush_rows == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable
+
+
+@dataclass(frozen=True)
+class RenderedPage:
+    body: bytes
+    etag: str
+
+
+class RenderCache:
+    """LRU cache of rendered HTML pages, bounded by total body size.
+
+    Keys carry the data version of whatever the page was rendered from, so a version bump
+    makes the old entry unreachable and it simply ages out. ETags are a hash of the body,
+    hence strong validators.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self._max_bytes = int(max_bytes)
+        self._entries: OrderedDict[Hashable, RenderedPage] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get_or_render(self, key: Hashable, render: Callable[[], str]) -> RenderedPage:
+        with self._lock:
+            page = self._entries.get(key)
+            if page is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return page
+            self._misses += 1
+
+        body = render().encode("utf-8")
+        page = RenderedPage(body=body, etag='"' + hashlib.sha1(body).hexdigest() + '"')
+        self._put(key, page)
+        return page
+
+    def _put(self, key: Hashable, page: RenderedPage) -> None:
+        size = len(page.body)
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            self._entries[key] = page
+            self._bytes += size
+            while self._bytes > self._max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
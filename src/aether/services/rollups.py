@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import threading
+from datetime import datetime
+from typing import Any, Iterator, Mapping
+
+import numpy as np
+import pandas as pd
+
+from aether.services.conversions import as_float, naive_utc
+
+ROLLUP_LEVELS = {"hour": "h", "day": "D", "month": "M"}
+ROLLUP_SCOPES = ("sensor", "province")
+
+
+def bucket_of(ts: datetime, level: str) -> np.datetime64:
+    return np.datetime64(naive_utc(ts), ROLLUP_LEVELS[level]).astype("datetime64[ns]")
+
+
+def _floor(ts: np.ndarray, level: str) -> np.ndarray:
+    return ts.astype(f"datetime64[{ROLLUP_LEVELS[level]}]").astype("datetime64[ns]")
+
+
+class RollupTable:
+    """count/sum/min/max per pollutant for one (level, scope), keyed by (key, bucket start).
+
+    ``count`` is the number of readings in a cell and ``valid`` the number with a value for
+    each pollutant; sums skip missing (NaN) values and min/max are NaN-ignoring, so one
+    reading without a pollutant does not poison the cell. The aggregate lives in flat arrays sorted by (key, bucket), with one row range per key,
+    so a range query is a binary search plus a slice. Readings ingested later go to a
+    small per-key delta that is merged into query results; once the delta holds more than
+    ``DELTA_MAX_CELLS`` cells (or an eighth of the flat rows, whichever is larger) it is
+    folded into the flat arrays, so the delta stays small however long the process runs.
+    """
+
+    DELTA_MAX_CELLS = 4096
+
+    def __init__(self, keys: np.ndarray, buckets: np.ndarray, count: np.ndarray, valid: np.ndarray,
+                 sums: np.ndarray, mins: np.ndarray, maxs: np.ndarray):
+        self._set_arrays(keys, buckets, count, valid, sums, mins, maxs)
+        self._delta: dict[str, dict[np.datetime64, list[Any]]] = {}
+        self._delta_cells = 0
+
+    def _set_arrays(self, keys: np.ndarray, buckets: np.ndarray, count: np.ndarray, valid: np.ndarray,
+                    sums: np.ndarray, mins: np.ndarray, maxs: np.ndarray) -> None:
+        self._buckets = buckets
+        self._count = count
+        self._valid = valid
+        self._sums = sums
+        self._mins = mins
+        self._maxs = maxs
+        self._ranges: dict[str, tuple[int, int]] = {}
+        if len(keys):
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            ends = np.r_[starts[1:], len(keys)]
+            self._ranges = {str(keys[s]): (int(s), int(e)) for s, e in zip(starts, ends)}
+
+    @classmethod
+    def build(cls, pollutants: list[str], keys: pd.Series, buckets: np.ndarray, values: pd.DataFrame) -> "RollupTable":
+        n_pol = len(pollutants)
+        if len(keys) == 0:
+            empty = np.zeros((0, n_pol))
+            return cls(np.array([], dtype=object), np.array([], dtype="datetime64[ns]"),
+                       np.array([], dtype=np.int64), np.zeros((0, n_pol), dtype=np.int64), empty, empty, empty)
+
+        frame = values.assign(_key=keys.to_numpy(), _bucket=buckets)
+        g = frame.groupby(["_key", "_bucket"], sort=True, observed=True)
+        size = g.size()
+        idx = size.index
+        return cls(
+            idx.get_level_values(0).astype(str).to_numpy(),
+            idx.get_level_values(1).to_numpy(dtype="datetime64[ns]"),
+            size.to_numpy(dtype=np.int64),
+            g[pollutants].count().to_numpy(dtype=np.int64).reshape(-1, n_pol),
+            g[pollutants].sum().to_numpy(dtype=np.float64).reshape(-1, n_pol),
+            g[pollutants].min().to_numpy(dtype=np.float64).reshape(-1, n_pol),
+            g[pollutants].max().to_numpy(dtype=np.float64).reshape(-1, n_pol),
+        )
+
+    def keys(self) -> set[str]:
+        return set(self._ranges) | set(self._delta)
+
+    def add(self, key: str, bucket: np.datetime64, count: int, valid: np.ndarray, sums: np.ndarray,
+            mins: np.ndarray, maxs: np.ndarray) -> None:
+        acc = self._delta.setdefault(key, {}).get(bucket)
+        if acc is None:
+            self._delta[key][bucket] = [count, valid.copy(), sums.copy(), mins.copy(), maxs.copy()]
+            self._delta_cells += 1
+            if self._delta_cells > max(self.DELTA_MAX_CELLS, len(self._count) // 8):
+                self.fold()
+            return
+        acc[0] += count
+        acc[1] += valid
+        acc[2] += sums
+        np.fmin(acc[3], mins, out=acc[3])
+        np.fmax(acc[4], maxs, out=acc[4])
+
+    def fold(self) -> None:
+        """Merge the delta into the sorted flat arrays and empty it."""
+        if not self._delta:
+            return
+        n_base = len(self._count)
+        width = self._sums.shape[1]
+        delta = [(key, bucket, *acc) for key, buckets in self._delta.items() for bucket, acc in buckets.items()]
+        base_keys = np.empty(n_base, dtype=object)
+        for key, (lo, hi) in self._ranges.items():
+            base_keys[lo:hi] = key
+        keys = np.concatenate([base_keys, np.array([d[0] for d in delta], dtype=object)])
+        buckets = np.concatenate([self._buckets, np.array([d[1] for d in delta], dtype="datetime64[ns]")])
+        count = np.concatenate([self._count, np.array([d[2] for d in delta], dtype=np.int64)])
+        valid = np.concatenate([self._valid, np.array([d[3] for d in delta], dtype=np.int64).reshape(-1, width)])
+        sums, mins, maxs = (
+            np.concatenate([base, np.array([d[i] for d in delta], dtype=np.float64).reshape(-1, width)])
+            for i, base in ((4, self._sums), (5, self._mins), (6, self._maxs))
+        )
+
+        codes, uniques = pd.factorize(keys, sort=True)
+        order = np.lexsort((buckets, codes))
+        k, b = codes[order], buckets[order]
+        starts = np.flatnonzero(np.r_[True, (k[1:] != k[:-1]) | (b[1:] != b[:-1])])
+        self._set_arrays(
+            np.asarray(uniques, dtype=object)[k[starts]],
+            b[starts],
+            np.add.reduceat(count[order], starts),
+            np.add.reduceat(valid[order], starts, axis=0),
+            np.add.reduceat(sums[order], starts, axis=0),
+            np.fmin.reduceat(mins[order], starts, axis=0),
+            np.fmax.reduceat(maxs[order], starts, axis=0),
+        )
+        self._delta = {}
+        self._delta_cells = 0
+
+    def cells(self) -> Iterator[tuple[str, np.datetime64, int, np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """Every ``(key, bucket, count, valid, sums, mins, maxs)`` cell, startup aggregate first, then the delta."""
+        for key, (lo, hi) in self._ranges.items():
+            for i in range(lo, hi):
+                yield (key, self._buckets[i], int(self._count[i]), self._valid[i],
+                       self._sums[i], self._mins[i], self._maxs[i])
+        for key, buckets in self._delta.items():
+            for bucket, (c, n, s, mn, mx) in buckets.items():
+                yield key, bucket, c, n, s, mn, mx
+
+    def query(self, key: str, start: np.datetime64 | None, end: np.datetime64 | None) -> list[tuple[Any, ...]]:
+        """Rows ``(bucket, count, valid, sums, mins, maxs)`` for ``key`` with ``start <= bucket <= end``."""
+        lo, hi = self._ranges.get(key, (0, 0))
+        if start is not None:
+            lo += int(np.searchsorted(self._buckets[lo:hi], start, side="left"))
+        if end is not None:
+            hi = lo + int(np.searchsorted(self._buckets[lo:hi], end, side="right"))
+        hi = max(lo, hi)
+
+        rows: dict[np.datetime64, list[Any]] = {
+            self._buckets[i]: [
+                int(self._count[i]), self._valid[i].copy(), self._sums[i].copy(), self._mins[i].copy(), self._maxs[i].copy()
+            ]
+            for i in range(lo, hi)
+        }
+        for bucket, (c, n, s, mn, mx) in self._delta.get(key, {}).items():
+            if (start is not None and bucket < start) or (end is not None and bucket > end):
+                continue
+            row = rows.get(bucket)
+            if row is None:
+                rows[bucket] = [c, n.copy(), s.copy(), mn.copy(), mx.copy()]
+            else:
+                row[0] += c
+                row[1] += n
+                row[2] += s
+                np.fmin(row[3], mn, out=row[3])
+                np.fmax(row[4], mx, out=row[4])
+        return [(b, *rows[b]) for b in sorted(rows)]
+
+
+class RollupStore:
+    """Hourly, daily and monthly rollups per sensor and per province.
+
+    Built once from the cleaned historical frame, then kept current by ``add`` for every
+    ingested reading. Provinces come from ``SensorInfo.metadata["province"]``.
+    """
+
+    def __init__(self, df: pd.DataFrame, pollutants: list[str], provinces: Mapping[str, str]):
+        self._pollutants = [p for p in pollutants if df.empty or p in df.columns]
+        self._provinces = dict(provinces)
+        self._lock = threading.Lock()
+        self._tables: dict[tuple[str, str], RollupTable] = {}
+
+        ts = df["timestamp"].to_numpy(dtype="datetime64[ns]") if not df.empty else np.array([], dtype="datetime64[ns]")
+        values = df[self._pollutants] if not df.empty else pd.DataFrame(columns=self._pollutants)
+        sensor_keys = df["sensor_id"].astype(str) if not df.empty else pd.Series([], dtype=str)
+        province_keys = sensor_keys.map(self._provinces).fillna("Unknown")
+        for level in ROLLUP_LEVELS:
+            buckets = _floor(ts, level)
+            self._tables[(level, "sensor")] = RollupTable.build(self._pollutants, sensor_keys, buckets, values)
+            self._tables[(level, "province")] = RollupTable.build(self._pollutants, province_keys, buckets, values)
+
+    @property
+    def pollutants(self) -> list[str]:
+        return list(self._pollutants)
+
+    def province_of(self, sensor_id: str) -> str:
+        return self._provinces.get(sensor_id, "Unknown")
+
+    def set_provinces(self, provinces: Mapping[str, str]) -> None:
+        """Use a new sensor -> province map for readings added from now on."""
+        self._provinces = dict(provinces)
+
+    def provinces(self) -> set[str]:
+        return set(self._provinces.values()) | self._tables[("month", "province")].keys()
+
+    def add(self, sensor_id: str, timestamp: datetime, readings: Mapping[str, Any]) -> None:
+        values = np.array([as_float(readings.get(p)) for p in self._pollutants], dtype=np.float64)
+        valid = ~np.isnan(values)
+        self.add_aggregate(
+            sensor_id, bucket_of(timestamp, "hour"), 1, valid.astype(np.int64), np.where(valid, values, 0.0), values, values
+        )
+
+    def add_many(self, sensor_ids: list[str], timestamps: np.ndarray, values: np.ndarray) -> None:
+        """Vectorized ``add`` for a batch: naive-UTC ``timestamps`` (datetime64[ns]) and one
+        ``values`` row per reading, in ``pollutants`` order.
+
+        Readings are folded per (key, bucket) with ``reduceat`` first, so each table sees
+        one update per distinct bucket rather than one per reading.
+        """
+        n = len(sensor_ids)
+        if n == 0:
+            return
+        sids = np.asarray(sensor_ids, dtype=object)
+        provinces = np.array([self.province_of(sid) for sid in sensor_ids], dtype=object)
+        values = np.asarray(values, dtype=np.float64).reshape(n, len(self._pollutants))
+        present = ~np.isnan(values)
+        with self._lock:
+            for level in ROLLUP_LEVELS:
+                buckets = _floor(timestamps, level)
+                for scope, keys in (("sensor", sids), ("province", provinces)):
+                    codes, uniques = pd.factorize(keys)
+                    order = np.lexsort((buckets, codes))
+                    k, b = codes[order], buckets[order]
+                    starts = np.flatnonzero(np.r_[True, (k[1:] != k[:-1]) | (b[1:] != b[:-1])])
+                    count = np.diff(np.r_[starts, n])
+                    v, ok = values[order], present[order]
+                    valid = np.add.reduceat(ok.astype(np.int64), starts, axis=0)
+                    sums = np.add.reduceat(np.where(ok, v, 0.0), starts, axis=0)
+                    mins = np.fmin.reduceat(v, starts, axis=0)
+                    maxs = np.fmax.reduceat(v, starts, axis=0)
+                    table = self._tables[(level, scope)]
+                    for g, start in enumerate(starts):
+                        table.add(str(uniques[k[start]]), b[start], int(count[g]), valid[g], sums[g], mins[g], maxs[g])
+
+    def absorb(self, other: "RollupStore") -> None:
+        """Add every cell of ``other`` to this store, e.g. live readings indexed before the history was loaded.
+
+        ``other`` must cover this store's pollutants; columns are matched by name.
+        """
+        cols = [other._pollutants.index(p) for p in self._pollutants]
+        with other._lock:
+            cells = {name: list(table.cells()) for name, table in other._tables.items()}
+        with self._lock:
+            for name, rows in cells.items():
+                table = self._tables[name]
+                for key, bucket, count, valid, sums, mins, maxs in rows:
+                    table.add(key, bucket, count, valid[cols], sums[cols], mins[cols], maxs[cols])
+
+    def add_aggregate(self, sensor_id: str, hour: np.datetime64, count: int, valid: np.ndarray, sums: np.ndarray,
+                      mins: np.ndarray, maxs: np.ndarray) -> None:
+        """Fold an already aggregated hourly cell (e.g. restored from a checkpoint) into every level.
+
+        ``valid`` counts the readings with a value per pollutant; ``sums`` must not contain NaN.
+        """
+        province = self.province_of(sensor_id)
+        with self._lock:
+            for level in ROLLUP_LEVELS:
+                bucket = hour.astype(f"datetime64[{ROLLUP_LEVELS[level]}]").astype("datetime64[ns]")
+                self._tables[(level, "sensor")].add(sensor_id, bucket, count, valid, sums, mins, maxs)
+                self._tables[(level, "province")].add(province, bucket, count, valid, sums, mins, maxs)
+
+    def query(
+        self,
+        scope: str,
+        key: str,
+        level: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        pollutants: list[str] | None = None,
+    ) -> dict[str, Any]:
+        names = list(pollutants or self._pollutants)
+        unknown = [p for p in names if p not in self._pollutants]
+        if unknown:
+            raise ValueError(f"unknown pollutants: {', '.join(unknown)}")
+        cols = [self._pollutants.index(p) for p in names]
+        lo = bucket_of(start, level) if start is not None else None
+        hi = bucket_of(end, level) if end is not None else None
+        with self._lock:
+            rows = self._tables[(level, scope)].query(key, lo, hi)
+
+        buckets = []
+        total_count = 0
+        total_valid = np.zeros(len(cols), dtype=np.int64)
+        total_sum = np.zeros(len(cols))
+        total_min = np.full(len(cols), np.nan)
+        total_max = np.full(len(cols), np.nan)
+        for bucket, count, valid, sums, mins, maxs in rows:
+            total_count += count
+            total_valid += valid[cols]
+            total_sum += sums[cols]
+            np.fmin(total_min, mins[cols], out=total_min)
+            np.fmax(total_max, maxs[cols], out=total_max)
+            buckets.append(
+                {
+                    "start": pd.Timestamp(bucket).to_pydatetime(),
+                    "count": count,
+                    "stats": _stats(names, valid[cols], sums[cols], mins[cols], maxs[cols]),
+                }
+            )
+        total = {
+            "count": total_count,
+            "stats": _stats(names, total_valid, total_sum, total_min, total_max) if total_count else {},
+        }
+        return {"scope": scope, "key": key, "level": level, "buckets": buckets, "total": total}
+
+
+def _stats(
+    names: list[str], valid: np.ndarray, sums: np.ndarray, mins: np.ndarray, maxs: np.ndarray
+) -> dict[str, dict[str, float | int | None]]:
+    """Per-pollutant aggregates over the readings that have a value; min/max/mean are None without any."""
+    stats: dict[str, dict[str, float | int | None]] = {}
+    for j, name in enumerate(names):
+        n = int(valid[j])
+        stats[name] = {
+            "count": n,
+            "sum": float(sums[j]),
+            "min": float(mins[j]) if n else None,
+            "max": float(maxs[j]) if n else None,
+            "mean": float(sums[j] / n) if n else None,
+        }
+    return stats
@@ -1,41 +1,130 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any
+from pathlib import Path
+from typing import Any, Iterator
 
+import numpy as np
 import pandas as pd
 
 from aether.config import ServerConfig
 from aether.domain.sensor import SensorReading, SensorInfo
-from aether.persistence.storage import JsonReadingStorage
+from aether.persistence.storage import LogPosition, ReadingStorage
 from aether.services.data_cleaning import DataCleaner
-from aether.services.exceptions import UnauthorizedSensorError, InvalidReadingError
+from aether.services.categorization import CategoryEngine
+from aether.services.checkpoint import Checkpointer, CheckpointStore, LiveState
+from aether.services.conversions import as_float, naive_utc
+from aether.services.category_counts import CategoryCountTable
+from aether.services.rollups import RollupStore
+from aether.services.spatial_index import SensorGrid
+from aether.services.latest_state import LatestSnapshot, LatestStateTable
+from aether.services.metrics import INGESTED, span
+from aether.services.historical_index import MonthPartitionIndex, SensorHistoryIndex, to_datetime64
+from aether.services.hot_tier import HotTier
+from aether.services.readings_query import ReadingKey, ReadingsQuery
+from aether.services.exceptions import (
+    HistoricalDataNotReadyError,
+    IngestBackpressureError,
+    InvalidReadingError,
+    UnauthorizedSensorError,
+)
+from aether.services.write_behind import WriteBehindWriter
+
+log = logging.getLogger(__name__)
 
 
 @dataclass
 class SensorManagerState:
-    total_readings: int = 0
-    last_update: datetime | None = None
+    sensor_versions: dict[str, int] = field(default_factory=dict)
+    month_versions: dict[tuple[int, int], int] = field(default_factory=dict)
 
 
 class SensorManager:
+    """Owns the sensor registry, the historical indexes and everything derived from ingest.
+
+    When the storage is shared between worker processes (``workers > 1``), the readings log
+    is the single source of truth: ingest only appends to it, and every worker folds new
+    log records (its own and other workers') into its in-memory state in ``refresh``,
+    which the read paths call first. All workers therefore report the same totals, latest
+    readings and versions once they have caught up to the same log position.
+
+    Without ``historical_df`` the manager starts with an empty history and serves ingest,
+    status and the map straight away; ``attach_historical`` swaps the dataset in once it is
+    loaded, and until then the history-backed reads raise ``HistoricalDataNotReadyError``.
+
+    Live readings also go to a per-sensor ``HotTier``, which ``get_sensor_history`` and the
+    month views merge with the historical slices, so they show without reloading anything.
+    """
+
+    # below this many readings, indexing one by one beats the vectorized batch path
+    VECTORIZE_MIN_READINGS = 32
+    # stored records parsed at a time when filling the hot tier from the log
+    HOT_LOAD_CHUNK = 50_000
+    # merged month views kept until the hot tier or the history changes
+    MONTH_VIEWS_MAX = 32
+    # how long a shared-mode ingest waits for write-behind to put its readings in the log
+    SHARED_FLUSH_TIMEOUT_SECONDS = 10.0
+
     def __init__(
         self,
         config: ServerConfig,
         sensors: dict[str, SensorInfo],
-        storage: JsonReadingStorage,
-        historical_df: pd.DataFrame,
+        storage: ReadingStorage,
+        historical_df: pd.DataFrame | None,
         historical_stats: dict[str, Any],
         started_at: datetime,
+        writer: WriteBehindWriter | None = None,
+        checkpoint_path: Path | None = None,
+        log_base: LogPosition = (0, 0),
     ):
         self._config = config
         self._sensors = sensors
         self._storage = storage
-        self._historical_df = historical_df
+        self._provinces = {sid: s.metadata.get("province", "Unknown") for sid, s in sensors.items()}
+        self._category_engine = CategoryEngine(config.thresholds)
+        self._historical_ready = threading.Event()
+        self._historical_settled = threading.Event()
+        self._historical_error: str | None = None
+        if historical_df is None:
+            historical_df = pd.DataFrame(
+                {"sensor_id": pd.Series([], dtype=str), "timestamp": pd.Series([], dtype="datetime64[ns]")}
+            )
+        else:
+            self._historical_ready.set()
+            self._historical_settled.set()
+        self._history_index = SensorHistoryIndex(historical_df)
+        self._month_index = MonthPartitionIndex(self._history_index.frame)
+        self._readings = ReadingsQuery(self._history_index, storage)
+        ht = config.hot_tier
+        self._hot: HotTier | None = None
+        if ht.get("enabled", True):
+            self._hot = HotTier(list(config.pollutants), int(ht.get("max_bytes_per_sensor", 32 * 1024)))
+        self._hot_backlog: LogPosition | None = None
+        self._month_views: dict[tuple[tuple[int, int], tuple[int, int]], tuple[Any, int, pd.DataFrame]] = {}
+        self._grid = SensorGrid(sensors, self._grid_cell_degrees())
+        self._rollups = RollupStore(self._history_index.frame, config.pollutants, self._provinces)
+        self._latest = LatestStateTable(sensors, [*config.pollutants, *self._category_engine.pollutants])
+        self._category_counts = CategoryCountTable(self._history_index.frame, self._provinces, self._category_engine)
         self._historical_stats = historical_stats
         self._started_at = started_at
+        self._writer = writer
         self._state = SensorManagerState()
+        self._shared = storage.shared
+        self._applied: LogPosition = (0, 0)
+        self._log_base = log_base
+        self._refresh_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._registry_lock = threading.Lock()
+        self._merge_lock = threading.Lock()
+        self._checkpointer: Checkpointer | None = None
+        self._checkpoints = None
+        if checkpoint_path is not None:
+            fingerprint = {"pollutants": self._rollups.pollutants, "thresholds": dict(config.thresholds)}
+            self._checkpoints = CheckpointStore(checkpoint_path, fingerprint)
         self._hydrate_from_storage()
 
     @property
@@ -48,65 +137,733 @@ class SensorManager:
 
     @property
     def historical_df(self) -> pd.DataFrame:
-        return self._historical_df
+        return self._history_index.combined()
+
+    @property
+    def month_partitions(self) -> MonthPartitionIndex:
+        return self._month_index
+
+    @property
+    def historical_state(self) -> str:
+        """``loading``, ``ready`` or ``failed``."""
+        if self._historical_ready.is_set():
+            return "ready"
+        return "failed" if self._historical_error is not None else "loading"
+
+    def wait_historical(self, timeout: float | None = None) -> bool:
+        """Block until the historical dataset is attached or failed to load; True if it is attached."""
+        self._historical_settled.wait(timeout)
+        return self._historical_ready.is_set()
+
+    def attach_historical(self, historical_df: pd.DataFrame, historical_stats: dict[str, Any]) -> None:
+        """Swap in the historical dataset loaded in the background.
+
+        The indexes are built without holding any lock. Rollups and category counts
+        collected from live readings so far are then folded into the new ones under the
+        write lock, so no ingest is lost or counted twice, and every structure is
+        replaced by a single reference assignment.
+        """
+        index = SensorHistoryIndex(historical_df)
+        frame = index.frame
+        month_index = MonthPartitionIndex(frame)
+        rollups = RollupStore(frame, self._config.pollutants, self._provinces)
+        category_counts = CategoryCountTable(frame, self._provinces, self._category_engine)
+        with self._write_lock:
+            rollups.absorb(self._rollups)
+            category_counts.absorb(self._category_counts)
+            self._history_index = index
+            self._month_index = month_index
+            self._readings = ReadingsQuery(index, self._storage)
+            self._rollups = rollups
+            self._category_counts = category_counts
+            self._historical_stats = historical_stats
+        self._historical_ready.set()
+        self._historical_settled.set()
+
+    def append_historical(self, rows: pd.DataFrame, stats: dict[str, Any]) -> int:
+        """Merge cleaned, compact rows newly appended to the historical CSV; returns how many.
+
+        The new rows are sorted into a delta next to the history and month indexes (both
+        are rebuilt only when the delta folds) off the request path and swapped in by
+        reference, so readers see either the old or the new dataset. Rollups and category counts take the new rows incrementally, and the
+        versions of the sensors and months they touch are bumped so cached pages are
+        re-rendered. Merges (from the source watcher and compaction) run one at a time.
+        """
+        return self._merge_history(rows, stats, aggregate=True)
+
+    def rebase_live(self, base: LogPosition) -> None:
+        """Re-checkpoint the live state from ``base``, before compaction truncates the log there."""
+        self._log_base = base
+        if self._checkpointer is not None:
+            self._checkpointer.rebase(base)
+
+    def absorb_compacted(self, rows: pd.DataFrame, moved: int, raw: pd.DataFrame | None = None) -> int:
+        """Merge rows compaction built from ``moved`` live readings, once they left the log.
+
+        The readings are already in the rollups, category counts and latest values, so
+        only the history and month indexes take the rows; the stored-readings total drops
+        by ``moved``, as it would after a restart. The readings as stored (``raw``, when
+        ``rows`` are downsampled) leave the hot tier, so they are not shown twice.
+        """
+        merged = self._merge_history(rows, {}, aggregate=False)
+        if self._hot is not None:
+            gone = rows if raw is None else raw
+            self._hot.evict(gone["sensor_id"].astype(str).tolist(), gone["timestamp"].to_numpy(dtype="datetime64[ns]"))
+        if moved:
+            with self._write_lock:
+                self._latest.apply([], counted=-moved)
+        return merged
+
+    def _merge_history(self, rows: pd.DataFrame, stats: dict[str, Any], aggregate: bool) -> int:
+        with self._merge_lock:
+            return self._merge_history_locked(rows, stats, aggregate)
+
+    def _merge_history_locked(self, rows: pd.DataFrame, stats: dict[str, Any], aggregate: bool) -> int:
+        if rows.empty:
+            self._historical_stats = DataCleaner.merge_stats(self._historical_stats, stats)
+            return 0
+        # only the new rows are sorted; the base frame is re-sorted when the delta folds
+        index = self._history_index.with_rows(rows)
+        if index.frame is self._history_index.frame:
+            month_index = self._month_index.with_delta(index.delta.frame)
+        else:
+            month_index = MonthPartitionIndex(index.frame)
+
+        sids = rows["sensor_id"].astype(str).tolist()
+        ts = pd.to_datetime(rows["timestamp"]).to_numpy(dtype="datetime64[ns]")
+        pollutants = self._rollups.pollutants
+        values = np.column_stack(
+            [rows[p].to_numpy(dtype=np.float64) if p in rows.columns else np.full(len(rows), np.nan) for p in pollutants]
+        ).reshape(len(rows), len(pollutants))
+        pm25 = rows["pm25"].to_numpy(dtype=np.float64) if "pm25" in rows.columns else np.full(len(rows), np.nan)
+        months = pd.Series(ts).dt.to_period("M").unique()
+
+        state = self._state
+        with self._write_lock:
+            if aggregate:
+                self._rollups.add_many(sids, ts, values)
+                self._category_counts.add_many(sids, ts, pm25)
+            for sid in set(sids):
+                state.sensor_versions[sid] = state.sensor_versions.get(sid, 0) + 1
+            for period in months:
+                key = (period.year, period.month)
+                state.month_versions[key] = state.month_versions.get(key, 0) + 1
+            self._history_index = index
+            self._month_index = month_index
+            self._readings = ReadingsQuery(index, self._storage)
+            self._historical_stats = DataCleaner.merge_stats(self._historical_stats, stats)
+        return len(rows)
+
+    def reload_sensors(self, sensors: dict[str, SensorInfo]) -> None:
+        """Swap in a reloaded sensor registry.
+
+        New sensors can ingest and show on the map right away; removed ones are refused
+        and leave the map. Latest values of the sensors that stay are kept.
+        """
+        provinces = {sid: s.metadata.get("province", "Unknown") for sid, s in sensors.items()}
+        grid = SensorGrid(sensors, self._grid_cell_degrees())
+        with self._registry_lock:
+            self._rollups.set_provinces(provinces)
+            self._category_counts.set_provinces(provinces)
+            self._provinces = provinces
+            self._sensors = sensors
+            self._grid = grid
+            self._latest.reindex(sensors)
+
+    def historical_failed(self, message: str) -> None:
+        self._historical_error = message
+        self._historical_settled.set()
+
+    def _require_historical(self) -> None:
+        if self._historical_ready.is_set():
+            return
+        if self._historical_error is not None:
+            raise HistoricalDataNotReadyError(f"historical data failed to load: {self._historical_error}")
+        raise HistoricalDataNotReadyError("historical data is still loading")
 
     def _hydrate_from_storage(self) -> None:
-        data = self._storage.load_all()
-        self._state.total_readings = len(data)
+        """Restore per-sensor state from the latest checkpoint plus the log written after it."""
+        started = time.perf_counter()
+        live = self._checkpoints.load() if self._checkpoints is not None else None
+        if live is not None and live.base != self._log_base:
+            log.info("Checkpoint predates compaction through %s; replaying the log", self._log_base)
+            live = None
+        if live is not None and not self._storage.contains(live.position):
+            log.warning("Checkpoint position %s is not in the readings log; replaying everything", live.position)
+            live = None
+        from_checkpoint = live is not None
+        if live is None:
+            live = LiveState(pollutants=self._rollups.pollutants, position=self._log_base, base=self._log_base)
+        loaded = time.perf_counter()
+
+        replayed = 0
+        records: list[dict[str, Any]] = []
+        if from_checkpoint:
+            # readings up to the checkpoint are loaded into the hot tier later, off the startup path
+            self._hot_backlog = live.position
+        for item, position in self._storage.scan(live.position):
+            live.apply(item, self._category_engine)
+            live.position = position
+            replayed += 1
+            if self._hot is not None:
+                records.append(item)
+                if len(records) >= self.HOT_LOAD_CHUNK:
+                    self._hot_add_records(records)
+                    records = []
+        self._hot_add_records(records)
+        self._seed(live)
+        self._applied = live.position
+        done = time.perf_counter()
+
+        log.info(
+            "Restored %d stored readings: checkpoint %s in %.1f ms, replayed %d in %.1f ms, total %.1f ms",
+            live.total_readings,
+            "loaded" if from_checkpoint else "not used",
+            (loaded - started) * 1000,
+            replayed,
+            (done - loaded) * 1000,
+            (done - started) * 1000,
+        )
+        if self._checkpoints is not None:
+            cp = self._config.checkpoint
+            self._checkpointer = Checkpointer(
+                self._storage,
+                self._checkpoints,
+                live,
+                self._category_engine,
+                interval_seconds=float(cp.get("interval_seconds", 300.0)),
+                min_new_readings=int(cp.get("min_new_readings", 1000)),
+                unsaved=replayed,
+            )
+            self._checkpointer.start()
+
+    def load_hot_backlog(self) -> int:
+        """Fill the hot tier with the stored readings a restored checkpoint covered; returns how many.
 
+        Startup only replays the log after the checkpoint, so the readings before it are
+        read here instead, once, from the background loader. They are older than anything
+        ingested since, so the hot tier merges them in behind the newer readings.
+        """
+        end, self._hot_backlog = self._hot_backlog, None
+        if self._hot is None or end is None:
+            return 0
+        loaded = 0
+        records: list[dict[str, Any]] = []
+        for item, _ in self._storage.scan(self._log_base, end=end):
+            records.append(item)
+            if len(records) >= self.HOT_LOAD_CHUNK:
+                loaded += self._hot_add_records(records)
+                records = []
+        return loaded + self._hot_add_records(records)
+
+    def _hot_add_records(self, records: list[dict[str, Any]]) -> int:
+        if self._hot is None or not records:
+            return 0
+        frame, _ = DataCleaner.stored_readings_frame(records, self._hot.pollutants)
+        self._hot.add_many(
+            frame["sensor_id"].astype(str).tolist(),
+            frame["timestamp"].to_numpy(dtype="datetime64[ns]"),
+            frame[self._hot.pollutants].to_numpy(dtype=np.float32),
+        )
+        return len(frame)
+
+    def _seed(self, live: LiveState) -> None:
+        updates = [(sid, readings, dttm) for sid, (readings, dttm) in live.latest.items() if sid in self._sensors]
         last = None
-        for item in data:
+        for sid, _, _ in updates:
+            newest = live.newest[sid]
+            last = newest if last is None or newest > last else last
+        self._latest.apply(updates, counted=live.total_readings, last_update=last)
+
+        for (sid, hour), (count, valid, sums, mins, maxs) in live.hourly.items():
+            if sid in self._sensors:
+                self._rollups.add_aggregate(
+                    sid,
+                    np.datetime64(hour, "ns"),
+                    count,
+                    np.array(valid, dtype=np.int64),
+                    np.array(sums, dtype=np.float64),
+                    np.array(mins, dtype=np.float64),
+                    np.array(maxs, dtype=np.float64),
+                )
+        for (sid, mk, cat), n in live.categories.items():
+            if sid in self._sensors:
+                self._category_counts.add_count(sid, mk, cat, n)
+
+    def ingest(self, sensor_id: str, readings: dict[str, Any], timestamp: datetime | None) -> SensorReading:
+        with span("ingest"):
+            if sensor_id not in self._sensors:
+                INGESTED.inc(result="rejected")
+                raise UnauthorizedSensorError(f"sensor '{sensor_id}' is not authorized")
+
+            ok, errors = DataCleaner.validate_readings(readings, self._config.pollutants)
+            if not ok:
+                INGESTED.inc(result="rejected")
+                raise InvalidReadingError(errors)
+
+            ts = naive_utc(timestamp) if timestamp is not None else datetime.now(timezone.utc).replace(tzinfo=None)
+            reading = SensorReading(sensor_id=sensor_id, readings=readings, timestamp=ts)
+
+            self._persist([reading])
+            if self._shared:
+                self.refresh()
+            else:
+                self._apply([reading])
+            INGESTED.inc(result="accepted")
+            return reading
+
+    def ingest_batch(self, items: list[Any]) -> list[dict[str, Any]]:
+        """Validate a batch of raw ingest objects and persist the accepted ones in one commit.
+
+        Returns one result per input item, in order, with the HTTP-style ``code`` the item
+        would have received from the single-reading endpoint.
+        """
+        with span("ingest_batch"):
+            return self._ingest_batch(items)
+
+    def _ingest_batch(self, items: list[Any]) -> list[dict[str, Any]]:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        results: list[dict[str, Any]] = []
+        candidates: list[tuple[int, str, Any, datetime]] = []
+
+        for i, item in enumerate(items):
+            if not isinstance(item, dict):
+                results.append(_batch_result(i, None, 400, errors=["item must be an object"]))
+                continue
             sid = item.get("sensor_id")
+            if not isinstance(sid, str) or not sid:
+                results.append(_batch_result(i, None, 400, errors=["'sensor_id' must be a non-empty string"]))
+                continue
+            if sid not in self._sensors:
+                results.append(_batch_result(i, sid, 403, errors=[f"sensor '{sid}' is not authorized"]))
+                continue
             ts = item.get("timestamp")
-            if sid in self._sensors and ts:
+            if ts is None:
+                ts = now
+            else:
                 try:
-                    dttm = datetime.fromisoformat(ts)
-                except ValueError:
+                    ts = naive_utc(datetime.fromisoformat(ts))
+                except (TypeError, ValueError):
+                    results.append(_batch_result(i, sid, 400, errors=["'timestamp' must be an ISO 8601 datetime"]))
                     continue
-                self._sensors[sid].last_reading = item.get("readings")
-                self._sensors[sid].last_update = dttm
-                last = dttm if last is None or dttm > last else last
-        self._state.last_update = last
+            results.append({})
+            candidates.append((i, sid, item.get("readings"), ts))
 
-    def ingest(self, sensor_id: str, readings: dict[str, Any], timestamp: datetime | None) -> SensorReading:
-        if sensor_id not in self._sensors:
-            raise UnauthorizedSensorError(f"sensor '{sensor_id}' is not authorized")
+        errors = DataCleaner.validate_readings_batch([c[2] for c in candidates], self._config.pollutants)
+        accepted: list[SensorReading] = []
+        for (i, sid, readings, ts), errs in zip(candidates, errors):
+            if errs:
+                results[i] = _batch_result(i, sid, 400, errors=errs)
+                continue
+            accepted.append(SensorReading(sensor_id=sid, readings=readings, timestamp=ts))
+            results[i] = _batch_result(i, sid, 200, timestamp=ts)
 
-        ok, errors = DataCleaner.validate_readings(readings, self._config.pollutants)
-        if not ok:
-            raise InvalidReadingError(errors)
+        self._commit(accepted)
+        _count_ingested(len(accepted), len(items) - len(accepted))
+        return results
 
-        ts = timestamp or datetime.now(timezone.utc).replace(tzinfo=None)
-        reading = SensorReading(sensor_id=sensor_id, readings=readings, timestamp=ts)
+    def ingest_frame(self, frame: pd.DataFrame, include_accepted: bool = True) -> tuple[int, list[dict[str, Any]]]:
+        """Columnar counterpart of ``ingest_batch`` for decoded CSV/MessagePack/Arrow batches.
 
-        self._storage.append(reading.to_dict())
-        self._state.total_readings += 1
-        self._state.last_update = ts
+        ``frame`` has a ``sensor_id`` column, an optional ``timestamp`` column and one column
+        per reading. Every check runs over whole columns; only accepted rows are turned into
+        ``SensorReading`` objects. Returns the accepted count and the per-row results (only
+        the rejected ones unless ``include_accepted``).
+        """
+        with span("ingest_frame"):
+            return self._ingest_frame(frame, include_accepted)
 
-        info = self._sensors[sensor_id]
-        info.last_reading = readings
-        info.last_update = ts
-        return reading
+    def _ingest_frame(self, frame: pd.DataFrame, include_accepted: bool) -> tuple[int, list[dict[str, Any]]]:
+        n = len(frame)
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        sids = frame["sensor_id"].astype("string") if "sensor_id" in frame.columns else pd.Series(pd.NA, index=frame.index, dtype="string")
+        bad_sid = (sids.isna() | (sids.str.len() == 0)).to_numpy(dtype=bool)
+        unknown = ~bad_sid & ~sids.isin(list(self._sensors)).to_numpy(dtype=bool)
+
+        if "timestamp" in frame.columns:
+            raw_ts = frame["timestamp"]
+            parsed = pd.to_datetime(raw_ts, errors="coerce", utc=True, format="ISO8601").dt.tz_localize(None)
+            bad_ts = (raw_ts.notna() & parsed.isna()).to_numpy(dtype=bool)
+            stamps = parsed.fillna(pd.Timestamp(now))
+        else:
+            bad_ts = np.zeros(n, dtype=bool)
+            stamps = pd.Series(pd.Timestamp(now), index=frame.index)
+
+        values, reading_errors = DataCleaner.validate_columns(frame, self._config.pollutants)
+        bad_readings = np.zeros(n, dtype=bool)
+        bad_readings[list(reading_errors)] = True
+        ok = ~(bad_sid | unknown | bad_ts | bad_readings)
+
+        idx = np.flatnonzero(ok)
+        cols = list(values.columns)
+        sid_list = sids.to_numpy(dtype=object)[idx].tolist()
+        ts_list = list(stamps.iloc[idx].dt.to_pydatetime())
+        accepted = [
+            SensorReading(sensor_id=sid, readings={c: v for c, v in zip(cols, row) if v == v}, timestamp=ts)
+            for sid, ts, row in zip(sid_list, ts_list, values.to_numpy(dtype=np.float64)[idx].tolist())
+        ]
+        self._commit(accepted)
+        _count_ingested(len(accepted), n - len(accepted))
+
+        results: list[dict[str, Any]] = []
+        for i in (range(n) if include_accepted else np.flatnonzero(~ok).tolist()):
+            sid = None if bad_sid[i] else str(sids.iat[i])
+            if bad_sid[i]:
+                results.append(_batch_result(i, None, 400, errors=["'sensor_id' must be a non-empty string"]))
+            elif unknown[i]:
+                results.append(_batch_result(i, sid, 403, errors=[f"sensor '{sid}' is not authorized"]))
+            elif bad_ts[i]:
+                results.append(_batch_result(i, sid, 400, errors=["'timestamp' must be an ISO 8601 datetime"]))
+            elif bad_readings[i]:
+                results.append(_batch_result(i, sid, 400, errors=reading_errors[i]))
+            else:
+                results.append(_batch_result(i, sid, 200, timestamp=stamps.iat[i].to_pydatetime()))
+        return len(accepted), results
+
+    def _commit(self, accepted: list[SensorReading]) -> None:
+        self._persist(accepted)
+        if self._shared:
+            self.refresh()
+        elif accepted:
+            self._apply(accepted)
+
+    def _persist(self, readings: list[SensorReading]) -> None:
+        if not readings:
+            return
+        items = [r.to_dict() for r in readings]
+        if self._writer is not None:
+            ticket = self._writer.submit(items)
+            # refresh() only sees what is in the shared log, so this worker's own readings
+            # have to be written before it re-reads the log, or they would stay invisible
+            # here until the next background flush
+            if self._shared and not self._writer.wait_written(ticket, self.SHARED_FLUSH_TIMEOUT_SECONDS):
+                raise IngestBackpressureError("write-behind flush did not complete")
+            return
+        with span("storage_write"):
+            if len(items) == 1:
+                self._storage.append(items[0])
+            else:
+                self._storage.append_many(items)
+
+    def refresh(self) -> int:
+        """Apply readings appended to the shared log since the last refresh; returns how many.
+
+        A no-op unless the storage is shared. Checking for news costs one directory listing
+        and one ``stat``, so it is cheap to call on every request.
+        """
+        if not self._shared:
+            return 0
+        with self._refresh_lock:
+            if self._storage.end_position() == self._applied:
+                return 0
+            scanned = 0
+            readings: list[SensorReading] = []
+            for item, position in self._storage.scan(self._applied):
+                reading = self._stored_reading(item)
+                # unparseable or unknown-sensor records are counted, like on startup, but change nothing else
+                if reading is not None:
+                    readings.append(reading)
+                self._applied = position
+                scanned += 1
+            if scanned:
+                self._apply(readings, counted=scanned)
+            return scanned
+
+    def _stored_reading(self, item: dict[str, Any]) -> SensorReading | None:
+        try:
+            reading = SensorReading(
+                sensor_id=item["sensor_id"],
+                readings=item.get("readings") or {},
+                timestamp=datetime.fromisoformat(item["timestamp"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+        return reading if reading.sensor_id in self._sensors else None
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if self._checkpointer is not None:
+            self._checkpointer.close()
+        self._storage.close()
+
+    def _apply(self, readings: list[SensorReading], counted: int | None = None) -> None:
+        """Fold accepted readings into the derived state; the latest-state table gets one new version."""
+        state = self._state
+        with self._write_lock:
+            for reading in readings:
+                ts = reading.timestamp
+                state.sensor_versions[reading.sensor_id] = state.sensor_versions.get(reading.sensor_id, 0) + 1
+                state.month_versions[(ts.year, ts.month)] = state.month_versions.get((ts.year, ts.month), 0) + 1
+            if len(readings) < self.VECTORIZE_MIN_READINGS:
+                for reading in readings:
+                    self._index_reading(reading.sensor_id, reading.timestamp, reading.readings)
+            else:
+                self._index_readings(readings)
+            self._latest.apply([(r.sensor_id, r.readings, r.timestamp) for r in readings], counted=counted)
+            if self._hot is not None and readings:
+                pollutants = self._hot.pollutants
+                self._hot.add_many(
+                    [r.sensor_id for r in readings],
+                    np.array([to_datetime64(r.timestamp) for r in readings], dtype="datetime64[ns]"),
+                    np.array([[as_float(r.readings.get(p)) for p in pollutants] for r in readings], dtype=np.float32),
+                )
+
+    def _index_reading(self, sensor_id: str, ts: datetime, readings: dict[str, Any]) -> None:
+        self._rollups.add(sensor_id, ts, readings)
+        self._category_counts.add(sensor_id, ts, readings.get("pm25"))
+
+    def _index_readings(self, readings: list[SensorReading]) -> None:
+        sids = [r.sensor_id for r in readings]
+        ts = np.array([to_datetime64(r.timestamp) for r in readings], dtype="datetime64[ns]")
+        pollutants = self._rollups.pollutants
+        values = np.array(
+            [[float(r.readings.get(p, np.nan)) for p in pollutants] for r in readings], dtype=np.float64
+        ).reshape(len(readings), len(pollutants))
+        self._rollups.add_many(sids, ts, values)
+        pm25 = np.array([np.nan if (v := r.readings.get("pm25")) is None else float(v) for r in readings])
+        self._category_counts.add_many(sids, ts, pm25)
+
+    def latest_snapshot(self) -> LatestSnapshot:
+        """The current latest-state version; immutable, so safe to use without locking."""
+        self.refresh()
+        return self._latest.snapshot()
+
+    def map_view(
+        self, bbox: tuple[float, float, float, float] | None = None
+    ) -> tuple[dict[str, SensorInfo], LatestSnapshot, np.ndarray | None]:
+        """The registry, a latest-state snapshot with the same sensor rows and the rows inside ``bbox``.
+
+        A registry reload changes both, so read them together rather than through
+        ``sensors`` and ``latest_snapshot`` separately. ``bbox`` is ``(min_lon, min_lat,
+        max_lon, max_lat)``; without it the rows are None, meaning every sensor.
+        """
+        self.refresh()
+        with self._registry_lock:
+            sensors, grid, snap = self._sensors, self._grid, self._latest.snapshot()
+        rows = None
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            rows = grid.within_bbox(min_lat, min_lon, max_lat, max_lon)
+        return sensors, snap, rows
+
+    def sensors_in_bbox(
+        self, bbox: tuple[float, float, float, float], limit: int | None = None
+    ) -> tuple[int, list[dict[str, Any]]]:
+        """How many sensors lie inside ``(min_lon, min_lat, max_lon, max_lat)``, and the first ``limit`` of them."""
+        with span("sensors_bbox"):
+            sensors, snap, rows = self.map_view(bbox)
+            return len(rows), [_sensor_entry(sensors, snap, int(i)) for i in rows[:limit]]
+
+    def sensors_near(
+        self, lat: float, lon: float, radius_km: float | None = None, limit: int | None = None
+    ) -> list[dict[str, Any]]:
+        """Sensors nearest to a point first, with ``distance_km``; within ``radius_km`` and at most ``limit``."""
+        with span("sensors_near"):
+            self.refresh()
+            with self._registry_lock:
+                sensors, grid, snap = self._sensors, self._grid, self._latest.snapshot()
+            rows, dist = grid.nearest(lat, lon, radius_km, limit)
+            return [{**_sensor_entry(sensors, snap, int(i)), "distance_km": float(d)} for i, d in zip(rows, dist)]
+
+    def _grid_cell_degrees(self) -> float:
+        return float(self._config.map_config.get("grid_cell_degrees", 0.1))
+
+    def map_version(self) -> int:
+        return self.latest_snapshot().version
+
+    def sensor_version(self, sensor_id: str) -> int:
+        self.refresh()
+        return self._state.sensor_versions.get(sensor_id, 0)
+
+    def month_version(self, year: int, month: int) -> int:
+        self.refresh()
+        return self._state.month_versions.get((year, month), 0)
+
+    def months_version(self, start: tuple[int, int], end: tuple[int, int]) -> tuple[tuple[int, int, int], ...]:
+        self.refresh()
+        # ingest adds month keys under the write lock; iterating without it can see the dict resize
+        with self._write_lock:
+            versions = list(self._state.month_versions.items())
+        return tuple(sorted((y, m, v) for (y, m), v in versions if start <= (y, m) <= end))
 
     def get_status(self) -> dict[str, Any]:
+        snap = self.latest_snapshot()
         now = datetime.now(timezone.utc).replace(tzinfo=None)
         uptime = int((now - self._started_at).total_seconds())
-        active = sum(1 for s in self._sensors.values() if s.last_update is not None)
         return {
-            "status": "healthy" if active > 0 else "degraded",
+            "status": "healthy" if snap.active > 0 else "degraded",
             "uptime_seconds": uptime,
-            "active_sensors": active,
-            "total_readings": self._state.total_readings,
-            "last_update": self._state.last_update,
+            "active_sensors": snap.active,
+            "total_readings": snap.total_readings,
+            "last_update": snap.last_update,
+            "write_behind": self._writer.stats() if self._writer is not None else None,
+            "ready": self._historical_ready.is_set(),
+            "historical": self.historical_state,
         }
 
-    def get_sensor_history(self, sensor_id: str) -> pd.DataFrame:
+    def get_sensor_history(
+        self,
+        sensor_id: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> pd.DataFrame:
         if sensor_id not in self._sensors:
             raise KeyError(sensor_id)
-        return self._historical_df[self._historical_df["sensor_id"] == sensor_id].sort_values("timestamp")
+        self._require_historical()
+        with span("get_sensor_history"):
+            cold = self._history_index.lookup(sensor_id, start, end)
+            if self._hot is None:
+                return cold
+            ts, values = self._hot.window(
+                sensor_id,
+                to_datetime64(start) if start is not None else None,
+                to_datetime64(end) if end is not None else None,
+            )
+            if not len(ts):
+                return cold
+            merged = _with_hot_rows(cold, [sensor_id] * len(ts), ts, values, self._hot.pollutants)
+            return merged.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+    def iter_readings(
+        self,
+        sensor_id: str | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        pollutants: list[str] | None = None,
+        after: ReadingKey | None = None,
+    ) -> Iterator[tuple[ReadingKey, dict[str, Any]]]:
+        """Raw historical and stored live rows in keyset order, resuming after ``after``.
+
+        Arguments are checked here, before the first row is read, so callers can turn
+        errors into a response status before they start streaming.
+        """
+        if sensor_id is not None and sensor_id not in self._sensors:
+            raise KeyError(sensor_id)
+        self._require_historical()
+        if start is not None and end is not None and to_datetime64(start) > to_datetime64(end):
+            raise ValueError("'from' must not be after 'to'")
+        names = pollutants or list(self._config.pollutants)
+        unknown = [p for p in names if p not in self._config.pollutants]
+        if unknown:
+            raise ValueError(f"unknown pollutants: {', '.join(unknown)}")
+        sensor_ids = [sensor_id] if sensor_id is not None else list(self._sensors)
+        return self._readings.rows(sensor_ids, names, start, end, after)
+
+    def get_rollups(
+        self,
+        scope: str,
+        key: str,
+        level: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        pollutants: list[str] | None = None,
+    ) -> dict[str, Any]:
+        self._require_historical()
+        self.refresh()
+        known = self._sensors.keys() if scope == "sensor" else self._rollups.provinces()
+        if key not in known:
+            raise KeyError(key)
+        if start is not None and end is not None and to_datetime64(start) > to_datetime64(end):
+            raise ValueError("'from' must not be after 'to'")
+        return self._rollups.query(scope, key, level, start, end, pollutants)
+
+    def get_distribution_counts(self, start: tuple[int, int], end: tuple[int, int]) -> pd.DataFrame:
+        """PM2.5 category counts per province over months ``start``..``end`` inclusive."""
+        self._require_historical()
+        self.refresh()
+        return self._category_counts.counts(start, end)
 
     def get_month_df(self, year: int, month: int) -> pd.DataFrame:
-        df = self._historical_df.copy()
-        df["year"] = df["timestamp"].dt.year
-        df["month"] = df["timestamp"].dt.month
-        return df[(df["year"] == year) & (df["month"] == month)]
+        self._require_historical()
+        with span("get_month_df"):
+            return self._month_view((year, month), (year, month))
+
+    def get_year_df(self, year: int) -> pd.DataFrame:
+        self._require_historical()
+        return self._month_view((year, 1), (year, 12))
+
+    def get_months_df(self, start: tuple[int, int], end: tuple[int, int]) -> pd.DataFrame:
+        self._require_historical()
+        return self._month_view(start, end)
+
+    def _month_view(self, start: tuple[int, int], end: tuple[int, int]) -> pd.DataFrame:
+        """Historical rows of months ``start``..``end`` followed by the hot-tier rows of those months.
+
+        Months without hot-tier rows are the plain ``iloc`` slice. A merged view is kept
+        until the history is swapped or the hot tier changes, so repeated reads of the
+        current month do not copy it again.
+        """
+        month_index = self._month_index
+        cold = month_index.span(start, end)
+        hot = self._hot
+        if hot is None:
+            return cold
+        version = hot.version
+        key = (start, end)
+        cached = self._month_views.get(key)
+        if cached is not None and cached[0] is month_index and cached[1] == version:
+            return cached[2]
+        lo = np.datetime64(f"{start[0]:04d}-{start[1]:02d}", "M").astype("datetime64[ns]")
+        hi = (np.datetime64(f"{end[0]:04d}-{end[1]:02d}", "M") + 1).astype("datetime64[ns]")
+        sids, ts, values = hot.span(lo, hi)
+        view = _with_hot_rows(cold, sids, ts, values, hot.pollutants) if sids else cold
+        if len(self._month_views) >= self.MONTH_VIEWS_MAX:
+            self._month_views.clear()
+        self._month_views[key] = (month_index, version, view)
+        return view
+
+    def hot_tier_stats(self) -> dict[str, int] | None:
+        return self._hot.stats() if self._hot is not None else None
+
+
+def _sensor_entry(sensors: dict[str, SensorInfo], snap: LatestSnapshot, row: int) -> dict[str, Any]:
+    """A registry entry with its latest reading, for snapshot row ``row``."""
+    info = sensors[snap.sensor_ids[row]]
+    ts = snap.timestamps[row]
+    return {
+        "id": info.id,
+        "latitude": info.latitude,
+        "longitude": info.longitude,
+        "metadata": info.metadata,
+        "latest": {p: float(v[row]) for p, v in snap.values.items() if not np.isnan(v[row])},
+        "last_update": None if np.isnat(ts) else pd.Timestamp(ts).to_pydatetime(),
+    }
+
+
+def _with_hot_rows(
+    cold: pd.DataFrame, sensor_ids: list[str], ts: np.ndarray, values: np.ndarray, pollutants: list[str]
+) -> pd.DataFrame:
+    """``cold`` followed by hot-tier rows in the same compact layout."""
+    hot = DataCleaner.compact_dtypes(
+        pd.DataFrame(
+            {"sensor_id": sensor_ids, "timestamp": ts, **{p: values[:, i] for i, p in enumerate(pollutants)}}
+        )
+    )
+    if cold.empty:
+        return hot
+    return DataCleaner.concat_compact([cold, hot])
+
+
+def _count_ingested(accepted: int, rejected: int) -> None:
+    if accepted:
+        INGESTED.inc(accepted, result="accepted")
+    if rejected:
+        INGESTED.inc(rejected, result="rejected")
+
+
+def _batch_result(
+    index: int,
+    sensor_id: str | None,
+    code: int,
+    timestamp: datetime | None = None,
+    errors: list[str] | None = None,
+) -> dict[str, Any]:
+    return {
+        "index": index,
+        "status": "accepted" if code == 200 else "rejected",
+        "code": code,
+        "sensor_id": sensor_id,
+        "timestamp": timestamp,
+        "errors": errors or [],
+    }
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from typing import Mapping
+
+import numpy as np
+
+from aether.domain.sensor import SensorInfo
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180.0
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distances in km from one point to arrays of points."""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class SensorGrid:
+    """Uniform lat/lon grid over the sensor registry, built once per registry.
+
+    Sensors are sorted by cell (row-major: latitude band, then longitude), so the cells of
+    one latitude band that a box overlaps are a single contiguous slice found with two
+    ``searchsorted`` calls. Only the sensors in those slices are tested exactly, which keeps
+    box and radius queries proportional to the area asked for rather than to the fleet.
+
+    Positions returned by the queries index ``sensor_ids``, which is the registry order
+    (and the row order of the latest-state snapshot built from the same registry).
+    """
+
+    def __init__(self, sensors: Mapping[str, SensorInfo], cell_degrees: float = 0.1):
+        self._cell = float(cell_degrees)
+        if not self._cell > 0:
+            raise ValueError("cell_degrees must be positive")
+        self._cols = int(np.ceil(360.0 / self._cell)) + 1
+        self._sensor_ids = tuple(sensors)
+        self.lats = np.array([s.latitude for s in sensors.values()], dtype=np.float64)
+        self.lons = np.array([s.longitude for s in sensors.values()], dtype=np.float64)
+        keys = self._row(self.lats) * self._cols + self._col(self.lons)
+        self._order = np.argsort(keys, kind="stable")
+        self._keys = keys[self._order]
+
+    @property
+    def sensor_ids(self) -> tuple[str, ...]:
+        return self._sensor_ids
+
+    def __len__(self) -> int:
+        return len(self._sensor_ids)
+
+    def _row(self, lat: np.ndarray | float) -> np.ndarray:
+        return np.floor((np.asarray(lat) + 90.0) / self._cell).astype(np.int64)
+
+    def _col(self, lon: np.ndarray | float) -> np.ndarray:
+        return np.floor((np.asarray(lon) + 180.0) / self._cell).astype(np.int64)
+
+    def _candidates(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Positions of the sensors in the cells overlapping the box (a superset of the answer)."""
+        if not len(self._keys):
+            return np.empty(0, dtype=np.int64)
+        rows = np.arange(int(self._row(min_lat)), int(self._row(max_lat)) + 1, dtype=np.int64)
+        lo = np.searchsorted(self._keys, rows * self._cols + int(self._col(min_lon)), side="left")
+        hi = np.searchsorted(self._keys, rows * self._cols + int(self._col(max_lon)), side="right")
+        parts = [self._order[a:b] for a, b in zip(lo, hi) if b > a]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def within_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Sorted positions of the sensors inside the box, edges included.
+
+        A box with ``min_lon > max_lon`` crosses the antimeridian.
+        """
+        if min_lat > max_lat:
+            raise ValueError("min latitude must not be above max latitude")
+        min_lat, max_lat = max(min_lat, -90.0), min(max_lat, 90.0)
+        ranges = [(min_lon, max_lon)] if min_lon <= max_lon else [(min_lon, 180.0), (-180.0, max_lon)]
+        found = []
+        for lo_lon, hi_lon in ranges:
+            idx = self._candidates(min_lat, max(lo_lon, -180.0), max_lat, min(hi_lon, 180.0))
+            lat, lon = self.lats[idx], self.lons[idx]
+            found.append(idx[(lat >= min_lat) & (lat <= max_lat) & (lon >= lo_lon) & (lon <= hi_lon)])
+        return np.unique(np.concatenate(found))
+
+    def nearest(
+        self, lat: float, lon: float, radius_km: float | None = None, limit: int | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Positions and distances (km) of the sensors closest to a point, nearest first.
+
+        With ``radius_km`` only sensors within it are returned; without it the search box
+        doubles from one cell until ``limit`` sensors are found within its inscribed radius.
+        """
+        if radius_km is None and limit is None:
+            raise ValueError("nearest needs a radius or a limit")
+        radius = radius_km
+        if radius is None:
+            radius = self._cell * KM_PER_DEGREE
+            while True:
+                idx, dist = self._within_radius(lat, lon, radius)
+                if len(idx) >= min(limit, len(self)) or radius >= np.pi * EARTH_RADIUS_KM:
+                    break
+                radius *= 2
+        else:
+            idx, dist = self._within_radius(lat, lon, radius)
+        order = np.argsort(dist, kind="stable")[:limit]
+        return idx[order], dist[order]
+
+    def _within_radius(self, lat: float, lon: float, radius_km: float) -> tuple[np.ndarray, np.ndarray]:
+        dlat = radius_km / KM_PER_DEGREE
+        cos_lat = np.cos(np.radians(lat))
+        if lat - dlat <= -90.0 or lat + dlat >= 90.0 or cos_lat * 180.0 <= dlat:
+            # the circle reaches a pole or spans every longitude
+            idx = self.within_bbox(-90.0, -180.0, 90.0, 180.0)
+        else:
+            dlon = dlat / cos_lat
+            west, east = lon - dlon, lon + dlon
+            west += 360.0 if west < -180.0 else 0.0
+            east -= 360.0 if east > 180.0 else 0.0
+            idx = self.within_bbox(lat - dlat, west, lat + dlat, east)
+        dist = haversine_km(lat, lon, self.lats[idx], self.lons[idx])
+        keep = dist <= radius_km
+        return idx[keep], dist[keep]
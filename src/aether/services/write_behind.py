@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any
+
+from aether.persistence.storage import ReadingStorage
+from aether.services.exceptions import IngestBackpressureError
+from aether.services.metrics import span
+
+log = logging.getLogger(__name__)
+
+FSYNC_POLICIES = ("never", "batch", "interval")
+
+
+class WriteBehindWriter:
+    """Bounded in-memory queue of readings drained to storage by a background thread.
+
+    ``submit`` never blocks: when the queue cannot take the whole submission it raises
+    ``IngestBackpressureError`` and nothing is enqueued. The writer flushes whenever
+    ``flush_batch_size`` records are pending or ``flush_interval_seconds`` has elapsed.
+    ``fsync`` is one of ``never``, ``batch`` (after every flush) or ``interval``
+    (at most once every ``fsync_interval_seconds``).
+
+    ``submit`` returns a ticket; ``wait_written(ticket)`` asks for an immediate flush and
+    blocks until everything submitted up to it is in storage, for callers that must read
+    their own writes back from the log (shared storage with several workers).
+
+    A failed flush (any exception, the storage may be locked or briefly unavailable) puts
+    the batch back at the head of the queue and retries it with a growing back-off.
+    """
+
+    MAX_BACKOFF_SECONDS = 5.0
+    # flush attempts per batch once close() was called, before giving up on the rest
+    SHUTDOWN_ATTEMPTS = 3
+
+    def __init__(
+        self,
+        storage: ReadingStorage,
+        max_queue: int = 10000,
+        flush_batch_size: int = 500,
+        flush_interval_seconds: float = 0.5,
+        fsync: str = "interval",
+        fsync_interval_seconds: float = 1.0,
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync policy must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        self._storage = storage
+        self._max_queue = int(max_queue)
+        self._batch_size = max(1, int(flush_batch_size))
+        self._interval = float(flush_interval_seconds)
+        self._fsync = fsync
+        self._fsync_interval = float(fsync_interval_seconds)
+
+        self._queue: deque[dict[str, Any]] = deque()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._last_sync = time.monotonic()
+        self._submitted = 0
+        self._written = 0
+        self._flush_through = 0
+
+        self._flushes = 0
+        self._records_written = 0
+        self._rejected = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="aether-write-behind", daemon=True)
+        self._thread.start()
+
+    def submit(self, items: list[dict[str, Any]]) -> int:
+        """Queue ``items``; returns the ticket to pass to ``wait_written``."""
+        with self._cond:
+            if self._stopping:
+                raise IngestBackpressureError("writer is shutting down")
+            if len(self._queue) + len(items) > self._max_queue:
+                self._rejected += len(items)
+                raise IngestBackpressureError(
+                    f"ingest queue full ({len(self._queue)}/{self._max_queue} pending)"
+                )
+            self._queue.extend(items)
+            self._submitted += len(items)
+            if len(self._queue) >= self._batch_size:
+                self._cond.notify_all()
+            return self._submitted
+
+    def wait_written(self, ticket: int, timeout: float | None = None) -> bool:
+        """Flush now and wait until the items up to ``ticket`` are written; False on timeout or shutdown."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if ticket > self._flush_through:
+                self._flush_through = ticket
+                self._cond.notify_all()
+            while self._written < ticket:
+                if not self._thread.is_alive():
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                # wake up now and then in case the writer thread gave up
+                self._cond.wait(0.5 if remaining is None else min(remaining, 0.5))
+            return True
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            depth = len(self._queue)
+        return {
+            "queue_depth": depth,
+            "queue_capacity": self._max_queue,
+            "flushes": self._flushes,
+            "records_written": self._records_written,
+            "rejected": self._rejected,
+            "last_flush_ms": round(self._last_flush_ms, 3),
+            "max_flush_ms": round(self._max_flush_ms, 3),
+            "fsync": self._fsync,
+        }
+
+    def _take_batch(self) -> list[dict[str, Any]]:
+        with self._cond:
+            flush_now = self._stopping or self._flush_through > self._written
+            if len(self._queue) < self._batch_size and not flush_now:
+                self._cond.wait(timeout=self._interval)
+            n = min(len(self._queue), self._batch_size)
+            return [self._queue.popleft() for _ in range(n)]
+
+    def _requeue(self, batch: list[dict[str, Any]]) -> None:
+        with self._cond:
+            self._queue.extendleft(reversed(batch))
+
+    def _flush(self, batch: list[dict[str, Any]]) -> None:
+        started = time.perf_counter()
+        with span("storage_write"):
+            self._storage.append_many(batch)
+            now = time.monotonic()
+            if self._fsync == "batch" or (self._fsync == "interval" and now - self._last_sync >= self._fsync_interval):
+                self._storage.sync()
+                self._last_sync = now
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+
+        with self._cond:
+            self._written += len(batch)
+            self._cond.notify_all()
+        self._flushes += 1
+        self._records_written += len(batch)
+        self._last_flush_ms = elapsed_ms
+        self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+
+    def _run(self) -> None:
+        failures = 0
+        while True:
+            batch = self._take_batch()
+            if batch:
+                try:
+                    self._flush(batch)
+                    failures = 0
+                except Exception:  # OSError from the log, sqlite3.OperationalError ("database is locked"), ...
+                    failures += 1
+                    log.exception("Write-behind flush of %d readings failed; retrying", len(batch))
+                    self._requeue(batch)
+                    if self._stopping and failures >= self.SHUTDOWN_ATTEMPTS:
+                        return
+                    # back off while the storage keeps failing, up to MAX_BACKOFF_SECONDS
+                    time.sleep(min(self.MAX_BACKOFF_SECONDS, max(self._interval, 0.01) * 2 ** (failures - 1)))
+                continue
+            with self._cond:
+                if self._stopping and not self._queue:
+                    return
+
+    def close(self, timeout: float | None = 30.0) -> None:
+        """Stop accepting readings, drain everything still queued and fsync."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        with self._cond:
+            remaining = len(self._queue)
+        if remaining:
+            log.error("Write-behind writer stopped with %d readings not persisted", remaining)
+        else:
+            self._storage.sync()
+        log.info("Write-behind writer drained: %s", self.stats())
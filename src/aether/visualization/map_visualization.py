@@ -1,47 +1,87 @@
 from __future__ import annotations
 
-from typing import Any
+import math
+
+import numpy as np
 import pandas as pd
 import plotly.express as px
 
 from aether.config import ServerConfig
 from aether.domain.sensor import SensorInfo
-from aether.services.data_cleaning import DataCleaner
+from aether.services.categorization import CategoryEngine
+from aether.services.latest_state import LatestSnapshot
+from aether.services.metrics import span
 
 
 class MapVisualizer:
     def __init__(self, config: ServerConfig):
         self._config = config
+        self._categories = CategoryEngine(config.thresholds)
+        self._static: tuple[dict[str, SensorInfo], tuple[str, ...], pd.DataFrame] | None = None
+
+    def _static_frame(self, sensors: dict[str, SensorInfo], sensor_ids: tuple[str, ...]) -> pd.DataFrame:
+        """Per-sensor columns that only change with the registry, built once per registry."""
+        cached = self._static
+        if cached is not None and cached[0] is sensors and cached[1] == sensor_ids:
+            return cached[2]
+        rows = [sensors[sid] for sid in sensor_ids]
+        frame = pd.DataFrame(
+            {
+                "sensor_id": list(sensor_ids),
+                "lat": [s.latitude for s in rows],
+                "lon": [s.longitude for s in rows],
+                "province": [s.metadata.get("province", "Unknown") for s in rows],
+                "region": [s.metadata.get("region", "Unknown") for s in rows],
+            }
+        )
+        self._static = (sensors, sensor_ids, frame)
+        return frame
+
+    def create_map_html(
+        self,
+        sensors: dict[str, SensorInfo],
+        snapshot: LatestSnapshot,
+        rows: np.ndarray | None = None,
+        bbox: tuple[float, float, float, float] | None = None,
+    ) -> str:
+        """Map of the snapshot's sensors, or only of snapshot ``rows``, framed on ``bbox`` (min_lon, min_lat, max_lon, max_lat)."""
+        with span("map.figure"):
+            df = self._static_frame(sensors, snapshot.sensor_ids)
+            values = {pol: snapshot.values[pol] for pol in ("pm25", *self._categories.pollutants) if pol in snapshot.values}
+            if rows is not None:
+                df = df.iloc[rows].reset_index(drop=True)
+                values = {pol: arr[rows] for pol, arr in values.items()}
+            df = df.assign(**values)
+            df["category"] = self._categories.categorize("pm25", df["pm25"])
+            df["overall"] = self._categories.worst(df)
 
-    def create_map_html(self, sensors: dict[str, SensorInfo]) -> str:
-        rows: list[dict[str, Any]] = []
-        for s in sensors.values():
-            pm25 = None
-            if s.last_reading and "pm25" in s.last_reading:
-                pm25 = s.last_reading.get("pm25")
-            rows.append(
-                {
-                    "sensor_id": s.id,
-                    "lat": s.latitude,
-                    "lon": s.longitude,
-                    "province": s.metadata.get("province", "Unknown"),
-                    "region": s.metadata.get("region", "Unknown"),
-                    "pm25": pm25,
-                }
+            scatter_fn = getattr(px, "scatter_map", None) or getattr(px, "scatter_mapbox")
+            fig = scatter_fn(
+                df,
+                lat="lat",
+                lon="lon",
+                hover_name="sensor_id",
+                hover_data={"province": True, "region": True, "pm25": True, "overall": True, "lat": False, "lon": False},
+                color="category",
+                zoom=int(self._config.map_config.get("default_zoom", 7)) if bbox is None else _bbox_zoom(bbox),
+                center=None if bbox is None else _bbox_center(bbox),
             )
+            fig.update_layout(mapbox_style=self._config.map_config.get("map_style", "open-street-map"))
+        with span("map.to_html"):
+            return fig.to_html(include_plotlyjs="cdn", full_html=True)
 
-        df = pd.DataFrame(rows)
-        df["category"] = DataCleaner.categorize_pm25(df["pm25"], self._config.thresholds)
-
-        scatter_fn = getattr(px, "scatter_map", None) or getattr(px, "scatter_mapbox")
-        fig = scatter_fn(
-            df,
-            lat="lat",
-            lon="lon",
-            hover_name="sensor_id",
-            hover_data={"province": True, "region": True, "pm25": True, "lat": False, "lon": False},
-            color="category",
-            zoom=int(self._config.map_config.get("default_zoom", 7)),
-        )
-        fig.update_layout(mapbox_style=self._config.map_config.get("map_style", "open-street-map"))
-        return fig.to_html(include_plotlyjs="cdn", full_html=True)
+
+def _bbox_center(bbox: tuple[float, float, float, float]) -> dict[str, float]:
+    min_lon, min_lat, max_lon, max_lat = bbox
+    if min_lon > max_lon:  # across the antimeridian
+        max_lon += 360.0
+    lon = (min_lon + max_lon) / 2
+    return {"lat": (min_lat + max_lat) / 2, "lon": lon - 360.0 if lon > 180.0 else lon}
+
+
+def _bbox_zoom(bbox: tuple[float, float, float, float]) -> int:
+    """Web-mercator zoom level at which the box roughly fills a typical map viewport."""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    width = max_lon - min_lon if min_lon <= max_lon else max_lon - min_lon + 360.0
+    span_deg = max(width, (max_lat - min_lat) * 2, 1e-6)
+    return int(min(18, max(0, math.floor(math.log2(360.0 / span_deg)))))
@@ -1,25 +1,45 @@
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 
 from aether.config import ServerConfig
 from aether.domain.sensor import SensorInfo
-from aether.services.data_cleaning import DataCleaner
+from aether.services.categorization import CATEGORY_LABELS, CategoryEngine
+from aether.services.downsampling import downsample_indices
+from aether.services.metrics import span
 
 
 class TemporalVisualizer:
     def __init__(self, config: ServerConfig):
         self._config = config
+        self._categories = CategoryEngine(config.thresholds)
 
-    def create_time_series_html(self, df: pd.DataFrame, sensor_id: str) -> str:
-        fig = go.Figure()
-        for pol in self._config.pollutants:
-            if pol in df.columns:
-                fig.add_trace(go.Scatter(x=df["timestamp"], y=df[pol], mode="lines", name=pol.upper()))
-        fig.update_layout(title=f"Historical Readings: {sensor_id}", hovermode="x unified")
-        fig.update_xaxes(rangeslider_visible=True)
-        return fig.to_html(include_plotlyjs="cdn", full_html=True)
+    def create_time_series_html(
+        self,
+        df: pd.DataFrame,
+        sensor_id: str,
+        max_points: int | None = None,
+        method: str = "lttb",
+    ) -> str:
+        """Line chart per pollutant, each reduced to at most ``max_points`` points."""
+        with span("history.figure"):
+            ts = df["timestamp"].to_numpy(dtype="datetime64[ns]")
+            x = ts.astype(np.int64)
+            fig = go.Figure()
+            for pol in self._config.pollutants:
+                if pol in df.columns:
+                    y = df[pol].to_numpy(dtype=np.float64)
+                    if max_points is not None and len(y) > max_points:
+                        idx = downsample_indices(x, y, max_points, method)
+                        fig.add_trace(go.Scatter(x=ts[idx], y=y[idx], mode="lines", name=pol.upper()))
+                    else:
+                        fig.add_trace(go.Scatter(x=ts, y=y, mode="lines", name=pol.upper()))
+            fig.update_layout(title=f"Historical Readings: {sensor_id}", hovermode="x unified")
+            fig.update_xaxes(rangeslider_visible=True)
+        with span("history.to_html"):
+            return fig.to_html(include_plotlyjs="cdn", full_html=True)
 
     def create_distribution_html(self, df: pd.DataFrame, sensors: dict[str, SensorInfo], year: int, month: int) -> str:
         if df.empty:
@@ -28,13 +48,27 @@ class TemporalVisualizer:
         province_map = {sid: s.metadata.get("province", "Unknown") for sid, s in sensors.items()}
         df2 = df.copy()
         df2["province"] = df2["sensor_id"].map(province_map).fillna("Unknown")
-        df2["category"] = DataCleaner.categorize_pm25(df2["pm25"], self._config.thresholds)
+        df2["category"] = self._categories.categorize("pm25", df2["pm25"])
+
+        counts = df2.groupby(["province", "category"], observed=True).size().reset_index(name="count")
+        return self.create_distribution_counts_html(counts, f"{year}-{month:02d}")
+
+    def create_distribution_counts_html(self, counts: pd.DataFrame, period: str) -> str:
+        """Stacked per-province PM2.5 category shares from ``province``/``category``/``count`` rows."""
+        counts = counts[counts["count"] > 0].copy()
+        if counts.empty:
+            raise FileNotFoundError("No data")
+        with span("distribution.figure"):
+            fig = self._distribution_figure(counts, period)
+        with span("distribution.to_html"):
+            return fig.to_html(include_plotlyjs="cdn", full_html=True)
 
-        counts = df2.groupby(["province", "category"]).size().reset_index(name="count")
+    def _distribution_figure(self, counts: pd.DataFrame, period: str) -> go.Figure:
+        counts["category"] = counts["category"].astype(str)
         totals = counts.groupby("province")["count"].transform("sum")
         counts["percent"] = (counts["count"] / totals) * 100.0
 
-        categories_order = ["Safe", "Moderate", "Unhealthy", "Dangerous", "No data"]
+        categories_order = list(CATEGORY_LABELS)
         provinces = sorted(counts["province"].unique().tolist())
 
         fig = go.Figure()
@@ -51,8 +85,8 @@ class TemporalVisualizer:
             )
 
         fig.update_layout(
-            title=f"PM2.5 Distribution by Province ({year}-{month:02d})",
+            title=f"PM2.5 Distribution by Province ({period})",
             barmode="stack",
             yaxis=dict(range=[0, 100], title="Percent"),
         )
-        return fig.to_html(include_plotlyjs="cdn", full_html=True)
+        return fig
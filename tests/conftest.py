@@ -5,11 +5,15 @@ import pandas as pd
 import pytest
 from fastapi.testclient import TestClient
 
-from aether.dependencies import reset_services
+from aether.dependencies import reset_services, wait_until_ready
 
 
 @pytest.fixture()
-def client(tmp_path: Path):
+def client_factory(tmp_path: Path):
+    """Build a TestClient over the fixture dataset, with optional server_config overrides.
+
+    Waits for the background historical load unless ``wait_ready=False``.
+    """
     cfg_dir = tmp_path / "config"
     data_dir = tmp_path / "data"
     cfg_dir.mkdir()
@@ -49,12 +53,27 @@ def client(tmp_path: Path):
         "map_config": {"default_zoom": 7, "map_style": "open-street-map"},
         "category_colors": {"No data": "gray", "Safe": "green", "Moderate": "yellow", "Unhealthy": "orange", "Dangerous": "red"},
     }
-    (cfg_dir / "server_config.json").write_text(json.dumps(server_config, indent=2), encoding="utf-8")
+    clients: list[TestClient] = []
 
-    reset_services()
-    from aether.main import create_app
+    def make(wait_ready: bool = True, **overrides) -> TestClient:
+        (cfg_dir / "server_config.json").write_text(json.dumps({**server_config, **overrides}, indent=2), encoding="utf-8")
+        reset_services()
+        from aether.main import create_app
+
+        app = create_app(str(cfg_dir / "server_config.json"), str(cfg_dir / "sensors.json"))
+        c = TestClient(app)
+        c.__enter__()
+        clients.append(c)
+        if wait_ready:
+            assert wait_until_ready(timeout=30)
+        return c
 
-    app = create_app(str(cfg_dir / "server_config.json"), str(cfg_dir / "sensors.json"))
-    with TestClient(app) as c:
-        yield c
+    yield make
+    for c in reversed(clients):
+        c.__exit__(None, None, None)
     reset_services()
+
+
+@pytest.fixture()
+def client(client_factory):
+    return client_factory()
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from aether.services.data_cleaning import DataCleaner
+
+
+def _raw() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "sensor_id": ["a", "b", None, "a", "b", "a", "b"],
+            "timestamp": ["2024-01-01", "2024-01-02", "2024-01-03", "not a date", "2024-01-05", "2024-01-06", "2024-01-07"],
+            "pm25": [10.0, -1.0, 5.0, 5.0, 600.0, np.nan, 7.0],
+            "pm10": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 8.0],
+        }
+    )
+
+
+def test_clean_historical_rule_counts():
+    df, stats = DataCleaner.clean_historical(_raw())
+    assert df["pm25"].tolist() == [10.0, 7.0]
+    assert stats["rows_dropped"] == 5
+    assert stats["dropped_by_rule"] == {
+        "missing_id_or_timestamp": 1,
+        "missing_pollutant": 1,
+        "negative_pollutant": 1,
+        "pm25_out_of_range": 1,
+        "invalid_timestamp": 1,
+    }
+
+
+def test_clean_historical_chunks_matches_single_pass():
+    raw = _raw()
+    whole, whole_stats = DataCleaner.clean_historical(raw)
+    chunked, chunk_stats = DataCleaner.clean_historical_chunks(raw.iloc[i:i + 2] for i in range(0, len(raw), 2))
+
+    assert chunk_stats == whole_stats
+    assert chunked["pm25"].dtype == np.float32
+    assert isinstance(chunked["sensor_id"].dtype, pd.CategoricalDtype)
+    assert chunked["sensor_id"].astype(str).tolist() == whole["sensor_id"].tolist()
+    assert chunked["timestamp"].tolist() == whole["timestamp"].tolist()
+
+
+THRESHOLDS = {
+    "pm25_safe": 25.0,
+    "pm25_moderate": 50.0,
+    "pm25_danger": 75.0,
+    "pm10_safe": 50.0,
+    "pm10_moderate": 100.0,
+    "pm10_danger": 150.0,
+}
+
+
+def test_category_engine_bands_and_worst():
+    from aether.services.categorization import CategoryEngine
+
+    engine = CategoryEngine(THRESHOLDS)
+    assert engine.pollutants == ["pm10", "pm25"]
+
+    pm25 = pd.Series([25.0, 25.1, 50.0, 75.0, 75.1, np.nan])
+    got = engine.categorize("pm25", pm25).astype(str).tolist()
+    assert got == ["Safe", "Moderate", "Moderate", "Unhealthy", "Dangerous", "No data"]
+
+    frame = pd.DataFrame({"pm25": [10.0, np.nan, np.nan], "pm10": [120.0, 60.0, np.nan]})
+    assert engine.worst(frame).astype(str).tolist() == ["Unhealthy", "Moderate", "No data"]
@@ -1,3 +1,10 @@
+import json
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+
 def test_welcome(client):
     r = client.get("/")
     assert r.status_code == 200
@@ -48,3 +55,613 @@ def test_distribution_ok(client):
     r = client.get("/distribution/2024/1")
     assert r.status_code == 200
     assert ("barmode" in r.text.lower()) or ("stack" in r.text.lower())
+
+
+def test_ingest_batch_mixed_results(client):
+    r = client.post(
+        "/ingest/batch",
+        json=[
+            {"sensor_id": "sensor_ok_001", "readings": {"pm25": 12, "pm10": 22, "no2": 4, "o3": 33}},
+            {"sensor_id": "nope", "readings": {"pm25": 1, "pm10": 2, "no2": 3, "o3": 4}},
+            {"sensor_id": "sensor_ok_001", "readings": {"pm25": 12}},
+        ],
+    )
+    assert r.status_code == 200
+    j = r.json()
+    assert (j["accepted"], j["rejected"]) == (1, 2)
+    assert [item["code"] for item in j["results"]] == [200, 403, 400]
+    assert "missing 'pm10'" in j["results"][2]["errors"]
+    assert client.get("/status").json()["total_readings"] == 1
+
+
+def test_ingest_batch_ndjson(client):
+    lines = [
+        '{"sensor_id": "sensor_ok_001", "readings": {"pm25": 1, "pm10": 2, "no2": 3, "o3": 4}, "timestamp": "2024-02-01T00:00:00"}',
+        '{"sensor_id": "sensor_ok_001", "readings": {"pm25": 5, "pm10": 6, "no2": 7, "o3": 8}}',
+    ]
+    r = client.post("/ingest/batch", content="\n".join(lines), headers={"content-type": "application/x-ndjson"})
+    assert r.status_code == 200
+    assert r.json()["accepted"] == 2
+
+
+def test_ingest_batch_malformed(client):
+    r = client.post("/ingest/batch", content="{not json", headers={"content-type": "application/json"})
+    assert r.status_code == 400
+
+
+def test_ingest_batch_size_limits(client_factory):
+    c = client_factory(ingest_batch_max_bytes=300, ingest_batch_max_items=2)
+    # refused on size alone: the body is never decoded, so malformed JSON is not a 400
+    r = c.post("/ingest/batch", content=b"[" + b"x" * 400, headers={"content-type": "application/json"})
+    assert r.status_code == 413 and "bytes" in r.json()["detail"]
+    # chunked, without a Content-Length
+    r = c.post("/ingest/batch", content=iter([b"[" + b"x" * 200] * 3), headers={"content-type": "application/json"})
+    assert r.status_code == 413
+
+    body = {"sensor_id": "sensor_ok_001", "readings": {"pm25": 1, "pm10": 2, "no2": 3, "o3": 4}}
+    assert c.post("/ingest/batch", json=[body, body]).json()["accepted"] == 2
+    r = c.post("/ingest/batch", json=[{}, {}, {}])
+    assert r.status_code == 413 and "items" in r.json()["detail"]
+
+
+def test_write_behind_status_and_drain(client_factory, tmp_path):
+    c = client_factory(write_behind={"enabled": True, "flush_interval_seconds": 0.05, "fsync": "batch"})
+    r = c.post("/ingest", json={"sensor_id": "sensor_ok_001", "readings": {"pm25": 12, "pm10": 22, "no2": 4, "o3": 33}})
+    assert r.status_code == 200
+    j = c.get("/status").json()
+    assert j["total_readings"] == 1
+    assert j["write_behind"]["queue_capacity"] == 10000
+    c.__exit__(None, None, None)
+
+    segments = list((tmp_path / "data" / "readings.segments").glob("*.ndjson"))
+    assert sum(len(p.read_text().splitlines()) for p in segments) == 1
+
+
+def test_write_behind_backpressure(client_factory):
+    c = client_factory(write_behind={"enabled": True, "max_queue": 1, "flush_interval_seconds": 60, "flush_batch_size": 100})
+    body = {"sensor_id": "sensor_ok_001", "readings": {"pm25": 12, "pm10": 22, "no2": 4, "o3": 33}}
+    assert c.post("/ingest", json=body).status_code == 200
+    r = c.post("/ingest", json=body)
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == "1"
+
+
+def test_history_time_range(client):
+    r = client.get("/history/sensor_ok_001", params={"from": "2024-01-01T00:30:00", "to": "2024-01-01T01:00:00"})
+    assert r.status_code == 200
+    r = client.get("/history/sensor_ok_001", params={"from": "2024-02-01T00:00:00"})
+    assert r.status_code == 404
+    r = client.get("/history/sensor_ok_001", params={"from": "2024-01-02T00:00:00", "to": "2024-01-01T00:00:00"})
+    assert r.status_code == 400
+
+
+def test_render_cache_etag_and_invalidation(client):
+    first = client.get("/map")
+    etag = first.headers["etag"]
+    assert client.get("/map", headers={"If-None-Match": etag}).status_code == 304
+
+    client.post("/ingest", json={"sensor_id": "sensor_ok_001", "readings": {"pm25": 12, "pm10": 22, "no2": 4, "o3": 33}})
+    after = client.get("/map", headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["etag"] != etag
+
+    client.get("/history/sensor_ok_001")
+    client.get("/history/sensor_ok_001")
+    stats = client.get("/status").json()["render_cache"]
+    assert stats["hits"] >= 2
+    assert stats["misses"] >= 3
+
+
+def test_history_downsample_params(client):
+    assert client.get("/history/sensor_ok_001", params={"points": 3, "downsample": "minmax"}).status_code == 200
+    assert client.get("/history/sensor_ok_001", params={"downsample": "none"}).status_code == 200
+    assert client.get("/history/sensor_ok_001", params={"downsample": "cubic"}).status_code == 422
+
+
+def test_rollups_sensor_and_province(client):
+    r = client.get("/rollups/sensor/sensor_ok_001", params={"level": "hour"})
+    assert r.status_code == 200
+    j = r.json()
+    assert [b["count"] for b in j["buckets"]] == [1, 1]
+    assert j["total"]["stats"]["pm25"]["max"] == 80.0
+
+    client.post(
+        "/ingest",
+        json={"sensor_id": "sensor_ok_001", "readings": {"pm25": 30, "pm10": 22, "no2": 4, "o3": 33}, "timestamp": "2024-01-01T05:00:00"},
+    )
+    r = client.get("/rollups/province/North Holland", params={"level": "day", "pollutants": "pm25"})
+    j = r.json()
+    assert j["total"]["count"] == 3
+    assert list(j["total"]["stats"]) == ["pm25"]
+    assert j["total"]["stats"]["pm25"]["mean"] == 40.0
+
+
+def test_rollups_unknown_key(client):
+    assert client.get("/rollups/sensor/nope").status_code == 404
+    assert client.get("/rollups/province/Atlantis").status_code == 404
+    assert client.get("/rollups/region/x").status_code == 422
+    r = client.get("/rollups/sensor/sensor_ok_001", params={"pollutants": "pm2.5"})
+    assert r.status_code == 400 and "pm2.5" in r.json()["detail"]
+    mixed = {"from": "2024-01-01T00:00:00Z", "to": "2024-01-01T03:00:00"}
+    assert client.get("/rollups/sensor/sensor_ok_001", params=mixed).json()["total"]["count"] == 2
+    backwards = {"from": "2024-01-02T00:00:00+01:00", "to": "2024-01-01T00:00:00"}
+    assert client.get("/rollups/sensor/sensor_ok_001", params=backwards).json()["detail"] == "'from' must not be after 'to'"
+
+
+def test_distribution_year_and_range(client):
+    assert client.get("/distribution/2024").status_code == 200
+    assert client.get("/distribution/2023").status_code == 404
+    assert client.get("/distribution", params={"from": "2023-11", "to": "2024-02"}).status_code == 200
+    assert client.get("/distribution", params={"from": "2024-02", "to": "2023-11"}).status_code == 400
+    assert client.get("/distribution", params={"from": "2024-1", "to": "2024-02"}).status_code == 422
+
+
+def test_distribution_counts_follow_ingest(client):
+    assert client.get("/distribution/2025/3").status_code == 404
+    client.post(
+        "/ingest",
+        json={"sensor_id": "sensor_ok_001", "readings": {"pm25": 30, "pm10": 22, "no2": 4, "o3": 33}, "timestamp": "2025-03-02T05:00:00"},
+    )
+    r = client.get("/distribution/2025/3")
+    assert r.status_code == 200
+    assert "North Holland" in r.text
+
+
+def test_restart_resumes_from_checkpoint(client_factory, tmp_path, caplog):
+    from aether.persistence.storage import SegmentedReadingStorage
+
+    body = {"sensor_id": "sensor_ok_001", "readings": {"pm25": 12, "pm10": 22, "no2": 4, "o3": 33}}
+    c = client_factory()
+    assert c.post("/ingest", json=body).status_code == 200
+    assert c.post("/ingest", json=body).status_code == 200
+    c.__exit__(None, None, None)
+    assert (tmp_path / "data" / "readings.checkpoint.json").exists()
+
+    storage = SegmentedReadingStorage(tmp_path / "data" / "readings.segments")
+    storage.append({**body, "timestamp": "2025-06-01T00:00:00"})
+    storage.close()
+
+    with caplog.at_level("INFO", logger="aether.services.sensor_manager"):
+        c = client_factory()
+    j = c.get("/status").json()
+    assert j["total_readings"] == 3
+    assert any("checkpoint loaded" in r.getMessage() and "replayed 1 " in r.getMessage() for r in caplog.records)
+    assert c.get("/rollups/sensor/sensor_ok_001", params={"level": "month"}).json()["total"]["count"] == 5
+
+
+def test_offset_timestamps_are_stored_as_utc_and_checkpointed(client_factory, tmp_path):
+    from aether.persistence.storage import SegmentedReadingStorage
+
+    body = {"sensor_id": "sensor_ok_001", "readings": {"pm25": 12, "pm10": 22, "no2": 4, "o3": 33}}
+    c = client_factory()
+    r = c.post("/ingest", json={**body, "timestamp": "2025-06-01T02:00:00+02:00"})
+    assert r.json()["timestamp"] == "2025-06-01T00:00:00"
+    assert c.post("/ingest/batch", json=[{**body, "timestamp": "2025-06-01T01:00:00Z"}]).json()["accepted"] == 1
+    assert c.post("/ingest", json=body).status_code == 200
+    # a reading logged with its offset before timestamps were normalized on ingest
+    storage = SegmentedReadingStorage(tmp_path / "data" / "readings.segments")
+    storage.append({**body, "timestamp": "2025-06-01T03:00:00+01:00"})
+    storage.close()
+    c.__exit__(None, None, None)
+
+    state = json.loads((tmp_path / "data" / "readings.checkpoint.json").read_text(encoding="utf-8"))["state"]
+    assert state["total_readings"] == 4 and "+" not in state["newest"]["sensor_ok_001"]
+    c = client_factory()
+    assert c.get("/status").json()["total_readings"] == 4
+
+
+def test_shared_log_visible_to_every_worker(client_factory, tmp_path):
+    from aether.persistence.storage import SegmentedReadingStorage
+
+    c = client_factory(workers=2)
+    body = {"sensor_id": "sensor_ok_001", "readings": {"pm25": 12, "pm10": 22, "no2": 4, "o3": 33}}
+    assert c.post("/ingest", json=body).status_code == 200
+    etag = c.get("/map").headers["etag"]
+
+    # another worker process appending to the same log
+    other = SegmentedReadingStorage(tmp_path / "data" / "readings.segments", shared=True)
+    other.append({**body, "readings": {**body["readings"], "pm25": 90}, "timestamp": "2025-06-01T00:00:00"})
+    other.close()
+
+    j = c.get("/status").json()
+    assert j["total_readings"] == 2
+    assert j["last_update"].startswith("2025-06-01")
+    assert c.get("/map").headers["etag"] != etag
+
+
+def test_shared_write_behind_sees_its_own_readings(client_factory):
+    c = client_factory(workers=2, write_behind={"enabled": True, "flush_interval_seconds": 60, "flush_batch_size": 1000})
+    body = {"sensor_id": "sensor_ok_001", "readings": {"pm25": 12, "pm10": 22, "no2": 4, "o3": 33}}
+    assert c.post("/ingest", json=body).status_code == 200
+    assert c.post("/ingest/batch", json=[body, body]).json()["accepted"] == 2
+
+    # visible right away, without waiting out the 60s flush interval
+    assert c.get("/status").json()["total_readings"] == 3
+
+
+def test_sqlite_backend_ingest_and_restart(client_factory, tmp_path):
+    body = {"sensor_id": "sensor_ok_001", "readings": {"pm25": 12, "pm10": 22, "no2": 4, "o3": 33}}
+    c = client_factory(storage_backend="sqlite")
+    assert c.post("/ingest", json=body).status_code == 200
+    assert c.post("/ingest/batch", json=[body, body]).json()["accepted"] == 2
+    c.__exit__(None, None, None)
+    assert (tmp_path / "data" / "readings.db").exists()
+
+    c = client_factory(storage_file="sqlite:///" + str(tmp_path / "data" / "readings.db"))
+    assert c.get("/status").json()["total_readings"] == 3
+
+
+def test_readings_stream_merges_history_and_live(client):
+    import json
+
+    body = {"sensor_id": "sensor_ok_001", "readings": {"pm25": 12, "pm10": 22, "no2": 4, "o3": 33}}
+    assert client.post("/ingest", json={**body, "timestamp": "2024-01-01T00:30:00"}).status_code == 200
+
+    r = client.get("/readings", params={"sensor_id": "sensor_ok_001", "pollutants": "pm25"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [(x["timestamp"], x["source"], x["pm25"]) for x in rows] == [
+        ("2024-01-01T00:00:00", "historical", 10.0),
+        ("2024-01-01T00:30:00", "live", 12),
+        ("2024-01-01T01:00:00", "historical", 80.0),
+    ]
+
+    csv_text = client.get("/readings", params={"to": "2024-01-01T00:00:00"}, headers={"accept": "text/csv"}).text
+    assert csv_text.splitlines()[0] == "sensor_id,timestamp,source,pm25,pm10,no2,o3"
+    assert len(csv_text.splitlines()) == 2
+
+
+def test_readings_cursor_pagination(client):
+    import json
+
+    body = {"sensor_id": "sensor_ok_001", "readings": {"pm25": 12, "pm10": 22, "no2": 4, "o3": 33}}
+    client.post("/ingest/batch", json=[{**body, "timestamp": f"2024-01-01T00:{m:02d}:00"} for m in (0, 15, 30)])
+
+    seen, cursor = [], None
+    while True:
+        params = {"sensor_id": "sensor_ok_001", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        lines = [json.loads(line) for line in client.get("/readings", params=params).text.splitlines()]
+        cursor = lines[-1].get("next_cursor")
+        seen += [(x["timestamp"], x["source"]) for x in lines if "next_cursor" not in x]
+        if cursor is None:
+            break
+    assert len(seen) == 5 == len(set(seen))
+    assert seen == sorted(seen, key=lambda s: (s[0], s[1] == "live"))
+
+    assert client.get("/readings", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/readings", params={"sensor_id": "nope"}).status_code == 404
+    assert client.get("/readings", params={"pollutants": "co"}).status_code == 400
+
+
+def test_ingest_batch_columnar_csv(client):
+    csv_body = (
+        "sensor_id,timestamp,pm25,pm10,no2,o3\n"
+        "sensor_ok_001,2024-02-01T00:00:00,12,22,4,33\n"
+        "sensor_ok_001,,13,23,5,34\n"
+        "nope,2024-02-01T00:00:00,1,2,3,4\n"
+        "sensor_ok_001,yesterday,1,2,3,4\n"
+        "sensor_ok_001,2024-02-01T01:00:00,x,2,,4\n"
+    )
+    r = client.post("/ingest/batch", content=csv_body, headers={"content-type": "text/csv"})
+    assert r.status_code == 200
+    j = r.json()
+    assert (j["accepted"], j["rejected"]) == (2, 3)
+    assert [x["code"] for x in j["results"]] == [200, 200, 403, 400, 400]
+    assert j["results"][4]["errors"] == ["'pm25' must be numeric", "missing 'no2'"]
+    assert client.get("/status").json()["total_readings"] == 2
+
+    r = client.post("/ingest/batch?results=rejected", content=csv_body, headers={"content-type": "text/csv"})
+    assert [x["index"] for x in r.json()["results"]] == [2, 3, 4]
+
+
+def test_ingest_batch_optional_formats_without_dependency(client):
+    from aether.services import ingest_formats
+
+    if ingest_formats.msgpack is None:
+        r = client.post("/ingest/batch", content=b"\x90", headers={"content-type": "application/msgpack"})
+        assert r.status_code == 415
+    if ingest_formats.pa_ipc is None:
+        r = client.post("/ingest/batch", content=b"", headers={"content-type": "application/vnd.apache.arrow.stream"})
+        assert r.status_code == 415
+
+
+def test_ingest_batch_msgpack_and_arrow(client):
+    import pytest
+
+    msgpack = pytest.importorskip("msgpack")
+    pa = pytest.importorskip("pyarrow")
+
+    columns = {
+        "sensor_id": ["sensor_ok_001", "sensor_ok_001"],
+        "timestamp": ["2024-02-01T00:00:00", "2024-02-01T01:00:00"],
+        "pm25": [12.0, 13.0], "pm10": [22.0, 23.0], "no2": [4.0, None], "o3": [33.0, 34.0],
+    }
+    r = client.post("/ingest/batch", content=msgpack.packb(columns), headers={"content-type": "application/msgpack"})
+    assert (r.json()["accepted"], r.json()["rejected"]) == (1, 1)
+
+    rows = [{"sensor_id": "sensor_ok_001", "readings": {"pm25": 1, "pm10": 2, "no2": 3, "o3": 4}}]
+    r = client.post("/ingest/batch", content=msgpack.packb(rows), headers={"content-type": "application/msgpack"})
+    assert r.json()["accepted"] == 1
+
+    sink = pa.BufferOutputStream()
+    table = pa.table(columns)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    r = client.post(
+        "/ingest/batch",
+        content=sink.getvalue().to_pybytes(),
+        headers={"content-type": "application/vnd.apache.arrow.stream"},
+    )
+    assert [x["code"] for x in r.json()["results"]] == [200, 400]
+    assert client.get("/status").json()["total_readings"] == 3
+
+
+def test_metrics_exposes_request_and_span_histograms(client):
+    client.post("/ingest", json={"sensor_id": "sensor_ok_001", "readings": {"pm25": 1, "pm10": 2, "no2": 3, "o3": 4}})
+    client.get("/history/sensor_ok_001")
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    text = r.text
+    assert '# TYPE aether_http_request_duration_seconds histogram' in text
+    assert 'aether_http_requests_total{method="GET",route="/history/{sensor_id}",status="200"}' in text
+    assert 'aether_http_request_duration_seconds_count{method="GET",route="/history/{sensor_id}",status="200"}' in text
+    for name in ("ingest", "storage_write", "get_sensor_history", "history.figure", "history.to_html"):
+        assert f'aether_span_duration_seconds_count{{span="{name}"}}' in text
+    assert 'aether_span_duration_seconds_bucket{span="ingest",le="+Inf"}' in text
+    assert 'aether_render_cache_lookups_total{result="miss"}' in text
+    assert "aether_stored_readings 1" in text
+
+
+def test_slow_request_profiler_writes_collapsed_stacks(client_factory, tmp_path):
+    out = tmp_path / "profiles"
+    client = client_factory(
+        profiling={"enabled": True, "slow_request_seconds": 0.0, "interval_seconds": 0.001, "dir": str(out)}
+    )
+    assert client.get("/history/sensor_ok_001").status_code == 200
+    files = list(out.glob("*-GET-history_sensor_id-*.folded"))
+    assert len(files) == 1
+    for line in files[0].read_text(encoding="utf-8").splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert stack and int(count) >= 1
+
+
+def test_history_endpoints_wait_for_background_load(client_factory, monkeypatch):
+    import threading
+
+    from aether import dependencies
+
+    release = threading.Event()
+    load = dependencies._load_historical
+
+    def slow_load(config, hist_path):
+        release.wait(10)
+        return load(config, hist_path)
+
+    monkeypatch.setattr(dependencies, "_load_historical", slow_load)
+    client = client_factory(wait_ready=False)
+
+    j = client.get("/status").json()
+    assert (j["ready"], j["historical"]) == (False, "loading")
+    assert {"config", "sensors", "storage", "live_state", "serving"} <= j["startup_ms"].keys()
+    r = client.get("/history/sensor_ok_001")
+    assert r.status_code == 503 and r.headers["retry-after"]
+    assert client.get("/distribution/2024/1").status_code == 503
+    assert client.get("/readings").status_code == 503
+    assert client.get("/map").status_code == 200
+
+    ingest = {"sensor_id": "sensor_ok_001", "timestamp": "2024-01-01T05:00:00", "readings": {"pm25": 60, "pm10": 2, "no2": 3, "o3": 4}}
+    assert client.post("/ingest", json=ingest).status_code == 200
+
+    release.set()
+    assert dependencies.wait_until_ready(timeout=30)
+    j = client.get("/status").json()
+    assert (j["ready"], j["historical"]) == (True, "ready")
+    assert {"historical_load", "historical_index", "ready"} <= j["startup_ms"].keys()
+    # the reading ingested while loading is kept alongside the two clean historical rows
+    day = client.get("/rollups/sensor/sensor_ok_001", params={"level": "day"}).json()
+    assert day["total"]["count"] == 3
+    assert client.get("/distribution/2024/1").status_code == 200
+
+
+def test_importing_app_does_not_import_plotly():
+    import os
+    import subprocess
+    import sys
+
+    import aether
+
+    src = os.path.dirname(os.path.dirname(aether.__file__))
+    code = "import sys, aether.main; print('plotly' in sys.modules)"
+    env = {**os.environ, "PYTHONPATH": src}
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env)
+    assert out.stdout.strip() == "False"
+
+
+def test_hot_reload_tails_csv_and_registry(client_factory, tmp_path):
+    from aether import dependencies
+
+    client = client_factory(hot_reload={"interval_seconds": 3600})
+    watcher = dependencies.get_source_watcher()
+    sm = dependencies.get_sensor_manager()
+    assert len(sm.get_sensor_history("sensor_ok_001")) == 2
+    page = client.get("/history/sensor_ok_001").headers["etag"]
+    base = sm._history_index.frame
+
+    csv_path = tmp_path / "data" / "historical.csv"
+    with open(csv_path, "a", encoding="utf-8") as f:
+        f.write("sensor_ok_001,2024-02-01T00:00:00,30,40,5,6\n")
+        f.write("sensor_ok_001,2024-02-01T01:00:00,-5,40,5,6\n")  # dropped by cleaning
+        f.write("sensor_new_001,2024-02-01T00:00:00,1,2,3")  # partial line, not yet complete
+    assert watcher.poll() == {"historical_rows": 1, "sensors": 0}
+    assert len(sm.get_sensor_history("sensor_ok_001")) == 3
+    # the appended row sits in the delta; the base frame is neither copied nor re-sorted
+    assert sm._history_index.frame is base and len(sm._history_index.delta.frame) == 1
+    assert len(sm.get_month_df(2024, 2)) >= 1
+    assert client.get("/history/sensor_ok_001").headers["etag"] != page
+    assert client.get("/distribution/2024/2").status_code == 200
+
+    sensors_path = tmp_path / "config" / "sensors.json"
+    sensors = json.loads(sensors_path.read_text(encoding="utf-8"))
+    sensors.append({"id": "sensor_new_001", "location": "POINT(5.1 52.1)", "metadata": {"province": "Utrecht"}})
+    sensors_path.write_text(json.dumps(sensors), encoding="utf-8")
+    with open(csv_path, "a", encoding="utf-8") as f:
+        f.write(",4\n")
+    assert watcher.poll() == {"historical_rows": 1, "sensors": 2}
+    assert len(sm.get_sensor_history("sensor_new_001")) == 1
+
+    r = client.post("/ingest", json={"sensor_id": "sensor_new_001", "readings": {"pm25": 1, "pm10": 2, "no2": 3, "o3": 4}})
+    assert r.status_code == 200
+    assert "sensor_new_001" in client.get("/map").text
+    assert client.get("/status").json()["active_sensors"] == 1
+
+    sensors_path.write_text("[{", encoding="utf-8")  # caught mid-write: keep the current registry
+    assert watcher.poll()["sensors"] == 0
+    sensors_path.write_text(json.dumps(sensors[1:]), encoding="utf-8")  # drop sensor_ok_001
+    assert watcher.poll()["sensors"] == 1
+    r = client.post("/ingest", json={"sensor_id": "sensor_ok_001", "readings": {"pm25": 1, "pm10": 2, "no2": 3, "o3": 4}})
+    assert r.status_code == 403
+
+
+def _old_reading(minute: int, pm25: float) -> dict:
+    return {
+        "sensor_id": "sensor_ok_001",
+        "readings": {"pm25": pm25, "pm10": 20, "no2": 5, "o3": 30},
+        "timestamp": f"2024-03-01T10:{minute:02d}:00",
+    }
+
+
+@pytest.mark.parametrize("backend", ["log", "sqlite"])
+def test_compaction_moves_old_readings_into_history(client_factory, backend):
+    from aether import dependencies
+
+    settings = {"storage_backend": backend, "compaction": {"enabled": True, "max_age_hours": 24, "interval_seconds": 3600}}
+    client = client_factory(**settings)
+    for minute, pm25 in ((0, 10), (20, 40), (40, 70)):
+        assert client.post("/ingest", json=_old_reading(minute, pm25)).status_code == 200
+    rollups = client.get("/rollups/sensor/sensor_ok_001", params={"level": "hour"}).json()
+    counts = dependencies.get_sensor_manager().get_distribution_counts((2024, 3), (2024, 3))
+
+    assert dependencies.get_compactor().compact() == {"readings": 3, "rows": 3}
+    assert dependencies.get_compactor().compact() == {"readings": 0, "rows": 0}
+    sm = dependencies.get_sensor_manager()
+    assert len(sm.get_sensor_history("sensor_ok_001")) == 5
+    assert client.get("/status").json()["total_readings"] == 0
+    assert client.get("/rollups/sensor/sensor_ok_001", params={"level": "hour"}).json() == rollups
+
+    # after a restart the readings come from the partition, not the log, and are counted once
+    client = client_factory(**settings)
+    assert len(dependencies.get_sensor_manager().get_sensor_history("sensor_ok_001")) == 5
+    status = client.get("/status").json()
+    assert status["total_readings"] == 0 and status["active_sensors"] == 1
+    assert client.get("/rollups/sensor/sensor_ok_001", params={"level": "hour"}).json() == rollups
+    assert dependencies.get_sensor_manager().get_distribution_counts((2024, 3), (2024, 3)).equals(counts)
+
+    fresh = {"sensor_id": "sensor_ok_001", "readings": {"pm25": 1, "pm10": 2, "no2": 3, "o3": 4}}
+    assert client.post("/ingest", json=fresh).status_code == 200
+    assert dependencies.get_compactor().compact()["readings"] == 0
+    assert client.get("/status").json()["total_readings"] == 1
+
+
+def test_compaction_downsamples_to_hourly_means(client_factory):
+    from aether import dependencies
+
+    settings = {"storage_backend": "sqlite", "compaction": {"enabled": True, "max_age_hours": 24, "resolution": "hour"}}
+    client = client_factory(**settings)
+    for minute, pm25 in ((0, 10), (20, 40), (40, 70)):
+        client.post("/ingest", json=_old_reading(minute, pm25))
+    client.post("/ingest", json={"sensor_id": "sensor_ok_001", "readings": {"pm25": 1, "pm10": 2, "no2": 3, "o3": 4}})
+
+    assert dependencies.get_compactor().compact() == {"readings": 3, "rows": 1}
+    client = client_factory(**settings)
+    history = dependencies.get_sensor_manager().get_sensor_history("sensor_ok_001")
+    hourly = history[history["timestamp"] == pd.Timestamp("2024-03-01T10:00:00")]
+    assert hourly["pm25"].tolist() == [40.0]
+    assert client.get("/status").json()["total_readings"] == 1
+
+
+def test_live_readings_show_in_history_and_month_views(client_factory):
+    from aether import dependencies
+
+    late = {"sensor_id": "sensor_ok_001", "readings": {"pm25": 30, "pm10": 40, "no2": 5, "o3": 6}, "timestamp": "2024-01-01T00:30:00"}
+    c = client_factory()
+    page = c.get("/history/sensor_ok_001").headers["etag"]
+    assert c.post("/ingest", json=late).status_code == 200
+    assert c.post("/ingest", json={**late, "timestamp": "2024-01-01T05:00:00"}).status_code == 200
+
+    sm = dependencies.get_sensor_manager()
+    history = sm.get_sensor_history("sensor_ok_001")
+    assert history["timestamp"].astype(str).tolist() == [
+        "2024-01-01 00:00:00", "2024-01-01 00:30:00", "2024-01-01 01:00:00", "2024-01-01 05:00:00"
+    ]
+    assert len(sm.get_sensor_history("sensor_ok_001", end=datetime(2024, 1, 1, 1))) == 3
+    assert c.get("/history/sensor_ok_001").headers["etag"] != page
+    month = sm.get_month_df(2024, 1)
+    assert len(month) == 4 and sm.get_month_df(2024, 1) is month
+    assert len(sm.get_year_df(2024)) == 4 and len(sm.get_month_df(2024, 2)) == 0
+
+    # after a restart the readings covered by the checkpoint are loaded back in the background
+    c.__exit__(None, None, None)
+    c = client_factory()
+    assert len(dependencies.get_sensor_manager().get_sensor_history("sensor_ok_001")) == 4
+    assert dependencies.get_startup_timings()["hot_tier"] >= 0
+    assert "aether_hot_tier_readings 2" in c.get("/metrics").text
+
+
+def test_spatial_queries_and_viewport_map(client):
+    from aether import dependencies
+    from aether.domain.sensor import SensorInfo
+
+    sm = dependencies.get_sensor_manager()
+    sensors = dict(sm.sensors)
+    for sid, lon, lat, province in (
+        ("sensor_rtm_001", 4.4777, 51.9244, "South Holland"),
+        ("sensor_gro_001", 6.5665, 53.2194, "Groningen"),
+    ):
+        sensors[sid] = SensorInfo(sid, f"POINT({lon} {lat})", lat, lon, {"province": province})
+    sm.reload_sensors(sensors)
+    client.post("/ingest", json={"sensor_id": "sensor_rtm_001", "readings": {"pm25": 60, "pm10": 2, "no2": 3, "o3": 4}})
+
+    near = client.get("/sensors/near", params={"lat": 52.0, "lon": 4.5, "limit": 2}).json()
+    assert [s["id"] for s in near["sensors"]] == ["sensor_rtm_001", "sensor_ok_001"]
+    assert near["sensors"][0]["latest"]["pm25"] == 60 and 8 < near["sensors"][0]["distance_km"] < 9
+    near = client.get("/sensors/near", params={"lat": 52.0, "lon": 4.5, "radius_km": 30}).json()
+    assert near["count"] == 1 and near["sensors"][0]["last_update"] is not None
+    assert client.get("/sensors/near", params={"lat": 95, "lon": 4.5}).status_code == 422
+
+    box = client.get("/sensors/bbox", params={"bbox": "4,51.5,5.5,52.5", "limit": 1}).json()
+    assert box["count"] == 2 and [s["id"] for s in box["sensors"]] == ["sensor_ok_001"]
+    assert client.get("/sensors/bbox", params={"bbox": "4,52.5,5.5,51.5"}).status_code == 400
+    assert client.get("/sensors/bbox", params={"bbox": "4,51.5"}).status_code == 400
+
+    page = client.get("/map", params={"bbox": "4,51.5,5.5,52.5"})
+    assert page.status_code == 200
+    assert "sensor_rtm_001" in page.text and "sensor_gro_001" not in page.text
+    assert "sensor_gro_001" in client.get("/map").text
+    assert client.get("/map", params={"bbox": "0,0,1,1"}).status_code == 200
+
+
+def test_months_version_while_new_months_are_ingested(client):
+    import threading
+
+    from aether import dependencies
+
+    sm = dependencies.get_sensor_manager()
+    body = {"sensor_id": "sensor_ok_001", "readings": {"pm25": 1, "pm10": 2, "no2": 3, "o3": 4}}
+    errors = []
+
+    def read():
+        try:
+            for _ in range(300):
+                sm.months_version((1900, 1), (2100, 12))
+        except RuntimeError as e:
+            errors.append(e)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for year in range(1950, 2050):
+        sm.ingest_batch([{**body, "timestamp": f"{year}-{m:02d}-01T00:00:00"} for m in range(1, 13)])
+    reader.join()
+    assert not errors
+    assert len(sm.months_version((1950, 1), (2049, 12))) == 1200
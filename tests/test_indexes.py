@@ -0,0 +1,254 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from aether.services.historical_index import MonthPartitionIndex, SensorHistoryIndex
+
+
+def _frame() -> pd.DataFrame:
+    df = pd.DataFrame(
+        {
+            "sensor_id": ["b", "a", "b", "a", "a"],
+            "timestamp": pd.to_datetime(
+                ["2024-01-02", "2024-01-03", "2024-01-01", "2024-01-01", "2024-01-02"]
+            ),
+            "pm25": [1.0, 2.0, 3.0, 4.0, 5.0],
+        }
+    )
+    return df
+
+
+def test_history_index_sorted_slices():
+    idx = SensorHistoryIndex(_frame())
+    assert idx.lookup("a")["pm25"].tolist() == [4.0, 5.0, 2.0]
+    assert idx.lookup("b")["pm25"].tolist() == [3.0, 1.0]
+    assert idx.lookup("missing").empty
+
+
+def test_history_index_time_bounds():
+    idx = SensorHistoryIndex(_frame())
+    got = idx.lookup("a", start=datetime(2024, 1, 2), end=datetime(2024, 1, 3))
+    assert got["pm25"].tolist() == [5.0, 2.0]
+    assert idx.lookup("a", end=datetime(2023, 12, 31)).empty
+
+
+def test_month_partitions():
+    df = pd.DataFrame(
+        {
+            "sensor_id": ["a", "a", "b", "b"],
+            "timestamp": pd.to_datetime(["2024-03-05", "2023-12-31", "2024-01-10", "2024-03-01"]),
+            "pm25": [1.0, 2.0, 3.0, 4.0],
+        }
+    )
+    idx = MonthPartitionIndex(df)
+    assert idx.months() == [(2023, 12), (2024, 1), (2024, 3)]
+    assert idx.month(2024, 3)["pm25"].tolist() == [1.0, 4.0]
+    assert idx.month(2024, 2).empty
+    assert idx.year(2024)["pm25"].tolist() == [3.0, 1.0, 4.0]
+    assert idx.span((2023, 12), (2024, 1))["pm25"].tolist() == [2.0, 3.0]
+    assert idx._df is df and df["pm25"].tolist() == [1.0, 2.0, 3.0, 4.0]  # positions only, the frame is not reordered
+
+
+def test_appended_rows_go_to_a_delta_until_it_folds():
+    idx = SensorHistoryIndex(_frame())
+    df = idx.frame
+    rows = pd.DataFrame(
+        {"sensor_id": ["c", "a"], "timestamp": pd.to_datetime(["2024-01-02 00:00", "2024-01-02 12:00"]), "pm25": [6.0, 7.0]}
+    )
+    grown = idx.with_rows(rows)
+    assert grown.frame is df and idx.delta is None and len(grown.delta.frame) == 2
+    assert grown.lookup("a")["pm25"].tolist() == [4.0, 5.0, 7.0, 2.0]
+    assert grown.lookup("c")["pm25"].tolist() == [6.0]
+    assert grown.sensor_ids() == ["a", "b", "c"]
+
+    months = MonthPartitionIndex(df).with_delta(grown.delta.frame)
+    assert months.month(2024, 1)["pm25"].tolist() == [4.0, 5.0, 7.0, 2.0, 3.0, 1.0, 6.0]
+
+    grown.DELTA_MAX_ROWS = 2
+    folded = grown.with_rows(rows.iloc[:1])
+    assert folded.delta is None and len(folded.frame) == 8
+    assert folded.lookup("c")["pm25"].tolist() == [6.0, 6.0]
+
+
+def test_downsampling_keeps_endpoints_and_peaks():
+    import numpy as np
+
+    from aether.services.downsampling import lttb_indices, minmax_indices
+
+    x = np.arange(10_000, dtype=np.float64)
+    y = np.sin(x / 300.0)
+    y[4321] = 50.0
+
+    idx = lttb_indices(x, y, 200)
+    assert len(idx) == 200
+    assert idx[0] == 0 and idx[-1] == len(x) - 1
+    assert np.all(np.diff(idx) > 0)
+    assert 4321 in idx
+
+    idx = minmax_indices(y, 200)
+    assert len(idx) <= 200
+    assert idx[0] == 0 and idx[-1] == len(x) - 1
+    assert 4321 in idx
+
+
+def test_category_count_table_build_and_add():
+    from aether.services.categorization import CategoryEngine
+    from aether.services.category_counts import CategoryCountTable
+
+    df = pd.DataFrame(
+        {
+            "sensor_id": ["a", "a", "b"],
+            "timestamp": pd.to_datetime(["2024-01-05", "2024-02-01", "2024-01-09"]),
+            "pm25": [10.0, 60.0, 80.0],
+        }
+    )
+    engine = CategoryEngine({"pm25_safe": 25.0, "pm25_moderate": 50.0, "pm25_danger": 75.0})
+    table = CategoryCountTable(df, {"a": "North", "b": "South"}, engine)
+
+    jan = table.counts((2024, 1), (2024, 1)).set_index(["province", "category"])["count"].to_dict()
+    assert jan == {("North", "Safe"): 1, ("South", "Dangerous"): 1}
+
+    table.add("c", datetime(2024, 2, 3), 30.0)
+    q1 = table.counts((2024, 1), (2024, 3))
+    assert q1["count"].sum() == 4
+    assert ("Unknown", "Moderate") in set(zip(q1["province"], q1["category"]))
+
+
+def test_latest_state_snapshots_are_versioned_and_immutable():
+    from aether.services.latest_state import LatestStateTable
+
+    table = LatestStateTable(["a", "b", "c"], ["pm25", "pm10"])
+    before = table.snapshot()
+    after = table.apply([("a", {"pm25": 10}, datetime(2024, 1, 1)), ("x", {"pm25": 1}, datetime(2024, 1, 2))])
+    table.apply([("a", {"pm25": 12, "pm10": 3}, datetime(2024, 1, 3))], counted=1)
+    latest = table.snapshot()
+
+    assert (before.version, after.version, latest.version) == (0, 1, 2)
+    assert np.isnan(before.values["pm25"]).all() and before.active == 0
+    assert after.values["pm25"][0] == 10 and after.active == 1 and after.total_readings == 2
+    assert latest.values["pm10"][0] == 3 and latest.active == 1 and latest.total_readings == 3
+    assert latest.last_update == datetime(2024, 1, 3)
+    assert not latest.values["pm25"].flags.writeable
+    assert latest.frame()["sensor_id"].tolist() == ["a", "b", "c"]
+
+
+def test_hot_tier_caps_merges_and_evicts():
+    from aether.services.hot_tier import HotTier
+
+    tier = HotTier(["pm25"], max_bytes_per_sensor=12 * 10)  # 10 slots, 8 readings kept
+    assert tier.capacity == 8
+    hours = np.datetime64("2024-01-01T00:00", "ns") + np.arange(20) * np.timedelta64(1, "h")
+    for i in range(12):
+        tier.add_many(["a"], hours[i:i + 1], np.array([[float(i)]]))
+    tier.add_many(["a", "b", "a"], hours[[12, 3, 13]], np.array([[12.0], [3.0], [13.0]]))
+
+    ts, values = tier.window("a", None, None)
+    assert ts.tolist() == hours[6:14].tolist() and values[:, 0].tolist() == list(range(6, 14))
+    tier.add_many(["a"], hours[[7]], np.array([[70.0]]))  # late: merged in order, oldest dropped
+    ts, values = tier.window("a", hours[7], hours[8])
+    assert values[:, 0].tolist() == [7.0, 70.0, 8.0]
+    assert tier.stats()["readings"] == 9 and tier.stats()["bytes"] <= 2 * 12 * 10
+
+    sids, ts, _ = tier.span(hours[0], hours[8])
+    assert sorted(zip(sids, ts.tolist())) == [("a", hours[7].item())] * 2 + [("b", hours[3].item())]
+    assert tier.evict(["a", "b"], hours[[7, 3]]) == 3
+    assert tier.window("b", None, None)[0].size == 0
+    assert tier.window("a", None, None)[0].tolist() == hours[8:14].tolist()
+
+
+def test_sensor_grid_matches_brute_force():
+    from aether.domain.sensor import SensorInfo
+    from aether.services.spatial_index import SensorGrid, haversine_km
+
+    rng = np.random.default_rng(5)
+    lats = np.concatenate([rng.uniform(50.7, 53.6, 3000), [10.0, -10.0, 89.95]])
+    lons = np.concatenate([rng.uniform(3.3, 7.3, 3000), [179.9, -179.9, 0.0]])
+    sensors = {f"s{i}": SensorInfo(f"s{i}", "", float(la), float(lo), {}) for i, (la, lo) in enumerate(zip(lats, lons))}
+    grid = SensorGrid(sensors, cell_degrees=0.1)
+
+    found = grid.within_bbox(52.0, 4.5, 52.5, 5.0)
+    expected = np.flatnonzero((lats >= 52.0) & (lats <= 52.5) & (lons >= 4.5) & (lons <= 5.0))
+    assert found.tolist() == expected.tolist() and len(found) > 10
+    assert grid.within_bbox(-20.0, 179.0, 20.0, -179.0).tolist() == [3000, 3001]  # across the antimeridian
+
+    dist = haversine_km(52.37, 4.9, lats, lons)
+    rows, km = grid.nearest(52.37, 4.9, radius_km=15.0)
+    assert rows.tolist() == np.flatnonzero(dist <= 15.0)[np.argsort(dist[dist <= 15.0], kind="stable")].tolist()
+    rows, km = grid.nearest(52.37, 4.9, limit=5)
+    assert rows.tolist() == np.argsort(dist, kind="stable")[:5].tolist() and np.all(np.diff(km) >= 0)
+    assert grid.nearest(89.9, 120.0, limit=1)[0].tolist() == [3002]  # the search box reaches the pole
+    assert grid.nearest(0.0, 0.0, limit=10_000)[0].size == len(sensors)
+
+
+def test_rollup_delta_is_folded_into_the_flat_arrays():
+    from aether.services.rollups import RollupStore, RollupTable
+
+    df = pd.DataFrame(
+        {
+            "sensor_id": ["a", "a", "b"],
+            "timestamp": pd.to_datetime(["2024-01-01 00:10", "2024-01-01 05:00", "2024-01-02 00:00"]),
+            "pm25": [1.0, 2.0, 3.0],
+        }
+    )
+    folded, kept = RollupStore(df, ["pm25"], {"a": "P", "b": "Q"}), RollupStore(df, ["pm25"], {"a": "P", "b": "Q"})
+    rng = np.random.default_rng(1)
+    sids = rng.choice(["a", "b", "c"], 500).tolist()
+    ts = np.datetime64("2024-01-01T00:00", "ns") + rng.integers(0, 400, 500) * np.timedelta64(1, "h")
+    values = rng.uniform(0, 100, (500, 1))
+    RollupTable.DELTA_MAX_CELLS, saved = 16, RollupTable.DELTA_MAX_CELLS
+    try:
+        folded.add_many(sids, ts, values)
+    finally:
+        RollupTable.DELTA_MAX_CELLS = saved
+    kept.add_many(sids, ts, values)
+
+    table = folded._tables[("hour", "sensor")]
+    assert len(table._count) > 3 and table._delta_cells < kept._tables[("hour", "sensor")]._delta_cells
+    for scope, key in (("sensor", "a"), ("sensor", "c"), ("province", "P")):
+        for level in ("hour", "day", "month"):
+            assert folded.query(scope, key, level) == kept.query(scope, key, level)
+
+
+def test_rollups_skip_missing_pollutants():
+    from datetime import datetime
+
+    from aether.services.categorization import CategoryEngine
+    from aether.services.checkpoint import LiveState
+    from aether.services.rollups import RollupStore
+
+    df = pd.DataFrame(
+        {
+            "sensor_id": ["a", "a"],
+            "timestamp": pd.to_datetime(["2024-01-01 00:10", "2024-01-01 00:20"]),
+            "pm25": [10.0, 20.0],
+            "pm10": [30.0, np.nan],
+        }
+    )
+    store = RollupStore(df, ["pm25", "pm10"], {"a": "P"})
+    store.add("a", datetime(2024, 1, 1, 0, 30), {"pm25": 30.0})  # no pm10 in this reading
+    store.add_many(["a"], np.array(["2024-01-01T00:40"], dtype="datetime64[ns]"), np.array([[np.nan, 50.0]]))
+
+    for level in ("hour", "month"):
+        total = store.query("sensor", "a", level)["total"]
+        assert total["count"] == 4
+        assert total["stats"]["pm25"] == {"count": 3, "sum": 60.0, "min": 10.0, "max": 30.0, "mean": 20.0}
+        assert total["stats"]["pm10"] == {"count": 2, "sum": 80.0, "min": 30.0, "max": 50.0, "mean": 40.0}
+    assert store.query("sensor", "a", "hour", pollutants=["pm10"])["buckets"][0]["stats"]["pm10"]["count"] == 2
+
+    state = LiveState(pollutants=["pm25", "pm10"])
+    engine = CategoryEngine({"pm25_safe": 25.0, "pm25_moderate": 50.0, "pm25_danger": 75.0})
+    state.apply({"sensor_id": "a", "readings": {"pm25": 10.0, "pm10": 30.0}, "timestamp": "2024-01-01T00:10:00"}, engine)
+    state.apply({"sensor_id": "a", "readings": {"pm25": 20.0}, "timestamp": "2024-01-01T00:20:00"}, engine)
+    ((count, valid, sums, mins, maxs),) = state.hourly.values()
+    assert (count, valid, sums, mins, maxs) == (2, [2, 1], [30.0, 30.0], [10.0, 30.0], [20.0, 30.0])
+
+
+def test_conversions_share_one_semantics():
+    from datetime import timedelta, timezone
+
+    from aether.services.conversions import as_float, naive_utc
+
+    assert as_float("2.5") == 2.5 and np.isnan(as_float(None)) and np.isnan(as_float("n/a"))
+    aware = datetime(2024, 1, 1, 2, tzinfo=timezone(timedelta(hours=2)))
+    assert naive_utc(aware) == datetime(2024, 1, 1) and naive_utc(datetime(2024, 1, 1)) == datetime(2024, 1, 1)
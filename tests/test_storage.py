@@ -0,0 +1,233 @@
+import json
+from pathlib import Path
+
+from aether.persistence.storage import SegmentedReadingStorage
+
+
+def _item(i: int) -> dict:
+    return {"sensor_id": "sensor_ok_001", "readings": {"pm25": float(i)}, "timestamp": f"2024-01-01T00:00:{i:02d}"}
+
+
+def test_segmented_append_and_rotate(tmp_path: Path):
+    storage = SegmentedReadingStorage(tmp_path / "readings.segments", segment_max_bytes=200)
+    for i in range(10):
+        storage.append(_item(i))
+    storage.close()
+
+    assert len(storage.segments()) > 1
+    reopened = SegmentedReadingStorage(tmp_path / "readings.segments", segment_max_bytes=200)
+    assert [r["readings"]["pm25"] for r in reopened.iter_all()] == [float(i) for i in range(10)]
+
+
+def test_segmented_migrates_legacy_json(tmp_path: Path):
+    legacy = tmp_path / "readings.json"
+    legacy.write_text(json.dumps([_item(1), _item(2)]), encoding="utf-8")
+
+    storage = SegmentedReadingStorage(tmp_path / "readings.segments", legacy_path=legacy)
+    storage.append(_item(3))
+    storage.close()
+
+    again = SegmentedReadingStorage(tmp_path / "readings.segments", legacy_path=legacy)
+    assert [r["timestamp"][-2:] for r in again.load_all()] == ["01", "02", "03"]
+
+
+def test_segmented_skips_torn_record(tmp_path: Path):
+    storage = SegmentedReadingStorage(tmp_path / "readings.segments")
+    storage.append(_item(1))
+    storage.close()
+    with open(storage.segments()[-1], "a", encoding="utf-8") as fh:
+        fh.write('{"sensor_id": "sensor_ok')
+
+    storage = SegmentedReadingStorage(tmp_path / "readings.segments")
+    storage.append(_item(2))
+    storage.close()
+    assert [r["readings"]["pm25"] for r in storage.iter_all()] == [1.0, 2.0]
+
+
+def test_historical_cache_roundtrip_and_invalidation(tmp_path: Path):
+    import os
+
+    import numpy as np
+    import pandas as pd
+
+    from aether.persistence.historical_cache import ColumnarHistoricalCache
+    from aether.services.data_cleaning import DataCleaner
+
+    csv = tmp_path / "historical.csv"
+    csv.write_text("sensor_id,timestamp,pm25\na,2024-01-01T00:00:00,1.5\nb,2024-01-01T01:00:00,2.5\n", encoding="utf-8")
+    df, stats = DataCleaner.clean_historical(pd.read_csv(csv))
+    cache = ColumnarHistoricalCache(tmp_path / "historical.cache")
+    assert cache.load(csv) is None
+
+    cache.store(csv, DataCleaner.compact_dtypes(df), stats)
+    loaded, loaded_stats = cache.load(csv)
+    assert loaded_stats == stats
+    assert loaded["pm25"].dtype == np.float32
+    assert isinstance(loaded["sensor_id"].dtype, pd.CategoricalDtype)
+    assert loaded["sensor_id"].tolist() == ["a", "b"]
+
+    st = csv.stat()
+    os.utime(csv, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert cache.load(csv) is not None
+
+    with open(csv, "a", encoding="utf-8") as fh:
+        fh.write("a,2024-01-01T02:00:00,3.5\n")
+    assert cache.load(csv) is None
+
+
+def test_shared_writers_interleave_and_follow_rotation(tmp_path: Path):
+    a = SegmentedReadingStorage(tmp_path / "readings.segments", segment_max_bytes=200, shared=True)
+    b = SegmentedReadingStorage(tmp_path / "readings.segments", segment_max_bytes=200, shared=True)
+    for i in range(10):
+        (a if i % 2 else b).append(_item(i))
+    a.close()
+    b.close()
+
+    reader = SegmentedReadingStorage(tmp_path / "readings.segments")
+    assert [r["readings"]["pm25"] for r in reader.iter_all()] == [float(i) for i in range(10)]
+    assert len(reader.segments()) > 1
+    assert all(seg.stat().st_size < 200 + 100 for seg in reader.segments())
+
+
+def test_sqlite_storage_migrates_scans_and_queries(tmp_path: Path):
+    from datetime import datetime
+
+    from aether.persistence.storage import SqliteReadingStorage
+
+    legacy = tmp_path / "readings.json"
+    legacy.write_text(json.dumps([_item(1), _item(2)]), encoding="utf-8")
+    storage = SqliteReadingStorage(tmp_path / "readings.db", legacy_path=legacy)
+    storage.append_many([_item(3), {**_item(4), "sensor_id": "other"}])
+
+    items = list(storage.scan())
+    assert [i["readings"]["pm25"] for i, _ in items] == [1.0, 2.0, 3.0, 4.0]
+    assert [i["readings"]["pm25"] for i, _ in storage.scan(items[1][1])] == [3.0, 4.0]
+    assert storage.end_position() == items[-1][1]
+
+    hits = storage.query("sensor_ok_001", datetime(2024, 1, 1, 0, 0, 2), datetime(2024, 1, 1, 0, 0, 3))
+    assert [(i["readings"]["pm25"], pos) for i, pos in hits] == [(2.0, items[1][1]), (3.0, items[2][1])]
+    plan = storage._conn.execute("EXPLAIN QUERY PLAN " + storage._RANGE, ("x", 0, 1)).fetchall()
+    assert "readings_sensor_ts" in str(plan)
+    storage.close()
+
+    again = SqliteReadingStorage(tmp_path / "readings.db", legacy_path=legacy)
+    assert len(again.load_all()) == 4
+    again.close()
+
+
+def test_expired_prefix_is_scanned_and_truncated(tmp_path: Path):
+    from datetime import datetime
+
+    from aether.persistence.storage import SqliteReadingStorage
+
+    young = {**_item(0), "timestamp": "2024-06-01T00:00:00"}
+    for storage in (
+        SegmentedReadingStorage(tmp_path / "readings.segments", segment_max_bytes=200),
+        SqliteReadingStorage(tmp_path / "readings.db"),
+    ):
+        for i in range(4):
+            storage.append(_item(i))
+        storage.append(young)
+        storage.append(_item(9))  # old, but behind a young reading: stays
+        cutoff = datetime(2024, 3, 1)
+
+        end = storage.expired(cutoff)
+        moved = [i["readings"]["pm25"] for i, _ in storage.scan(end=end)]
+        assert moved and moved == [float(i) for i in range(len(moved))]
+        assert young["timestamp"] not in [i["timestamp"] for i, _ in storage.scan(end=end)]
+        last = storage.end_position()
+        storage.truncate(end)
+
+        assert storage.contains(end) and storage.contains(last)
+        assert [i["readings"]["pm25"] for i in storage.iter_all()][-2:] == [0.0, 9.0]
+        assert storage.expired(cutoff) is None
+        storage.append(_item(5))
+        assert storage.end_position() != last
+        assert [i["readings"]["pm25"] for i, _ in storage.scan(last)] == [5.0]
+        storage.close()
+
+    # a segment whose readings all expired is sealed, so the active one can be compacted too
+    quiet = SegmentedReadingStorage(tmp_path / "quiet.segments")
+    quiet.append(_item(1))
+    end = quiet.expired(datetime(2024, 3, 1))
+    quiet.truncate(end)
+    quiet.append(_item(2))
+    assert [i["readings"]["pm25"] for i in quiet.iter_all()] == [2.0]
+    assert quiet.contains(end)
+    quiet.close()
+
+
+def test_write_behind_retries_non_os_storage_errors(tmp_path: Path):
+    import sqlite3
+
+    from aether.services.write_behind import WriteBehindWriter
+
+    class LockedOnce:
+        def __init__(self):
+            self.rows, self.failures = [], 2
+
+        def append_many(self, items):
+            if self.failures:
+                self.failures -= 1
+                raise sqlite3.OperationalError("database is locked")
+            self.rows += items
+
+        def sync(self):
+            pass
+
+    storage = LockedOnce()
+    writer = WriteBehindWriter(storage, flush_batch_size=2, flush_interval_seconds=0.01)
+    writer.submit([{"n": 1}, {"n": 2}])
+    writer.submit([{"n": 3}])
+    writer.close(timeout=5)
+    assert storage.rows == [{"n": 1}, {"n": 2}, {"n": 3}]
+    assert writer.stats()["records_written"] == 3 and writer.stats()["queue_depth"] == 0
+
+
+def test_segmented_query_ranges_scans_once_and_reads_back_in_order(tmp_path: Path):
+    from datetime import datetime
+
+    storage = SegmentedReadingStorage(tmp_path / "readings.segments", segment_max_bytes=300)
+    for i in (5, 1, 7, 3, 2):
+        storage.append({**_item(i), "sensor_id": f"s{i % 2}"})
+    with open(storage.segments()[0], "ab") as fh:
+        fh.write(b"{not json\n")
+    storage.append({**_item(4), "sensor_id": "s0"})
+    positions = {item["timestamp"]: pos for item, pos in storage.scan()}
+
+    scans = []
+    records = storage._records
+    storage._records = lambda *a: scans.append(a) or records(*a)
+    ranges = [("s0", None, None), ("s1", datetime(2024, 1, 1, 0, 0, 2), datetime(2024, 1, 1, 0, 0, 5)), ("s9", None, None)]
+    found = {sid: [(item["timestamp"][-2:], pos) for item, pos in hits] for sid, hits in storage.query_ranges(ranges)}
+    assert len(scans) == 1 and len(storage.segments()) > 1
+    assert [t for t, _ in found["s0"]] == ["02", "04"] and [t for t, _ in found["s1"]] == ["03", "05"]
+    assert all(pos == positions[f"2024-01-01T00:00:{t}"] for t, pos in found["s0"] + found["s1"])
+    assert found["s9"] == []
+    assert [i["timestamp"][-2:] for i, _ in storage.query("s1")] == ["01", "03", "05", "07"]
+
+
+def test_checkpoint_appends_only_changed_cells(tmp_path: Path):
+    from aether.services.categorization import CategoryEngine
+    from aether.services.checkpoint import CheckpointStore, LiveState
+
+    engine = CategoryEngine({"pm25_safe": 25.0, "pm25_moderate": 50.0, "pm25_danger": 75.0})
+    store = CheckpointStore(tmp_path / "readings.checkpoint.json", {"pollutants": ["pm25"]})
+    state = LiveState(pollutants=["pm25"])
+    for hour in range(24):
+        state.apply({"sensor_id": "s1", "readings": {"pm25": hour}, "timestamp": f"2024-01-01T{hour:02d}:30:00"}, engine)
+    store.save(state)
+    main_size = store.path.stat().st_size
+    (cells,) = tmp_path.glob("readings.checkpoint.json.*.cells")
+    lines = len(cells.read_text(encoding="utf-8").splitlines())
+
+    state.apply({"sensor_id": "s1", "readings": {"pm25": 99}, "timestamp": "2024-01-01T05:10:00"}, engine)
+    store.save(state)
+    data = json.loads(store.path.read_text(encoding="utf-8"))
+    # the JSON stays the same size; only the changed hourly and category cells are appended
+    assert "hourly" not in data["state"] and abs(store.path.stat().st_size - main_size) < 16
+    assert len(cells.read_text(encoding="utf-8").splitlines()) == lines + 2
+
+    restored = CheckpointStore(store.path, {"pollutants": ["pm25"]}).load()
+    assert restored.hourly == state.hourly and restored.categories == state.categories
+    assert sorted(cell[0] for cell in restored.hourly.values()).count(2) == 1